@@ -4,6 +4,8 @@ import numpy as np
 import plotly.express as px
 from components.metrics import metric_card, analysis_card
 from utils.plotting import plot_correlation_matrix, plot_distribution
+from core.sampling import mean_confidence_interval, proportion_confidence_interval
+from analysis.missingness import perform_missingness_analysis, analyze_missingness, summarize_missingness
 
 def perform_descriptive_analysis(df):
     """Realiza análise estatística descritiva"""
@@ -25,10 +27,10 @@ def perform_descriptive_analysis(df):
         analysis_card("📌 Tipos de Dados", type_info)
     
     with col2:
-        numeric_cols = df.select_dtypes(include=[np.number]).columns
+        numeric_cols = df.select_dtypes(include=[np.number, 'bool']).columns
         if len(numeric_cols) > 0:
             #analysis_card("🧮 Estatísticas Numéricas", df[numeric_cols].describe().style.format("{:.2f}").to_html(), is_html=True)
-            analysis_card("🧮 Estatísticas Numéricas", df[numeric_cols].describe().style.format("{:.2f}").to_html())
+            analysis_card("🧮 Estatísticas Numéricas", df[numeric_cols].astype(float).describe().style.format("{:.2f}").to_html())
         else:
             st.warning("Nenhuma coluna numérica encontrada.")
     
@@ -38,8 +40,10 @@ def perform_descriptive_analysis(df):
     
     if len(missing_data) > 0:
         plot_missing_values(missing_data)
+        missingness = perform_missingness_analysis(df)
     else:
         st.success("✅ Nenhum valor ausente encontrado.")
+        missingness = summarize_missingness(None)
     
     # Gráficos de distribuição
     if len(numeric_cols) > 0:
@@ -50,15 +54,39 @@ def perform_descriptive_analysis(df):
     if len(numeric_cols) > 1:
         plot_correlation_matrix(df[numeric_cols])
     
-    results.update({
+    results.update(summarize_descriptive(df, missingness))
+    
+    return results
+
+def summarize_descriptive(df, missingness=None):
+    """Calcula o resumo descritivo sem renderizar a interface"""
+    if missingness is None:
+        missingness = summarize_missingness(analyze_missingness(df))
+    return {
         'shape': df.shape,
         'missing_values': df.isnull().sum().sum(),
         'duplicates': df.duplicated().sum(),
-        'numeric_columns': len(numeric_cols),
-        'categorical_columns': len(df.select_dtypes(include=['object']).columns)
-    })
+        'numeric_columns': len(df.select_dtypes(include=[np.number, 'bool']).columns),
+        'categorical_columns': len(df.select_dtypes(include=['object', 'category']).columns),
+        'missingness': missingness
+    }
+
+def show_sample_estimates(df, population_size):
+    """Exibe médias e proporções da amostra com intervalos de confiança de 95%"""
+    rows = []
+    for col in df.select_dtypes(include=[np.number]).columns:
+        mean, lower, upper = mean_confidence_interval(df[col], population_size)
+        rows.append({'variável': col, 'estimativa': 'média', 'valor': mean, 'IC 95% inf.': lower, 'IC 95% sup.': upper})
     
-    return results
+    for col in df.select_dtypes(include=['bool']).columns:
+        p = df[col].mean()
+        lower, upper = proportion_confidence_interval(p, len(df), population_size)
+        rows.append({'variável': col, 'estimativa': 'proporção', 'valor': p, 'IC 95% inf.': lower, 'IC 95% sup.': upper})
+    
+    if rows:
+        estimates = pd.DataFrame(rows).set_index('variável')
+        analysis_card("📏 Estimativas com Margem de Erro (amostra)",
+                      estimates.style.format("{:.3f}", subset=['valor', 'IC 95% inf.', 'IC 95% sup.']).to_html())
 
 def plot_missing_values(missing_data):
     """Plota gráfico de valores ausentes"""
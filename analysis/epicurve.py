@@ -0,0 +1,151 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import plotly.graph_objects as go
+from core.data_processor import parse_dates
+from core.model_registry import get_dataset_fingerprint
+import config
+
+# Granularidades disponíveis (regra de reamostragem do pandas)
+GRANULARITIES = {
+    'Dia': 'D',
+    'Semana epidemiológica': 'W-SAT',
+    'Semana (ISO)': 'W-SUN',
+    'Mês': 'MS'
+}
+
+# Coluna dos casos sem valor na variável de agrupamento
+MISSING_GROUP = '(ausente)'
+
+def ensure_datetime(df, date_col):
+    """Coluna de data convertida, sem alterar o DataFrame (compartilhado com as demais páginas)"""
+    if not pd.api.types.is_datetime64_any_dtype(df[date_col]):
+        return parse_dates(df[date_col])
+    return df[date_col]
+
+def daily_counts(dates, groups=None):
+    """Conta casos por dia (série contínua, dias sem casos = 0) em uma única passada"""
+    days = dates.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+    valid = ~np.isnat(days)
+    ordinals = days[valid].astype(np.int64)
+    if len(ordinals) == 0:
+        return pd.DataFrame()
+
+    start, end = ordinals.min(), ordinals.max()
+    n_days = int(end - start + 1)
+    index = pd.date_range(pd.Timestamp(start, unit='D'), periods=n_days, freq='D')
+
+    if groups is None:
+        counts = np.bincount(ordinals - start, minlength=n_days)
+        return pd.DataFrame({'casos': counts}, index=index)
+
+    codes, labels = pd.factorize(groups, sort=True)
+    codes = codes[valid]
+    labels = [str(label) for label in labels]
+    # Grupo ausente vira uma coluna própria: o total continua igual ao da curva sem agrupamento
+    if (codes < 0).any():
+        codes = np.where(codes < 0, len(labels), codes)
+        labels.append(MISSING_GROUP)
+    combined = (ordinals - start) * len(labels) + codes
+    counts = np.bincount(combined, minlength=n_days * len(labels)).reshape(n_days, len(labels))
+    return pd.DataFrame(counts, index=index, columns=labels)
+
+def resample_counts(daily, granularity):
+    """Reagrega a série diária na granularidade pedida (rótulo = início do período)"""
+    rule = GRANULARITIES[granularity]
+    if rule == 'D':
+        return daily
+    if not rule.startswith('W'):
+        return daily.resample(rule).sum()
+
+    # Semanas terminam no dia da regra; o rótulo vira o primeiro dia da semana
+    resampled = daily.resample(rule, closed='right', label='left').sum()
+    resampled.index = resampled.index + pd.Timedelta(days=1)
+    return resampled
+
+def epi_week_labels(week_starts):
+    """Rótulos de semana epidemiológica (domingo a sábado; a semana 1 contém a 1ª quarta-feira do ano)"""
+    wednesdays = week_starts + pd.Timedelta(days=3)
+    weeks = (wednesdays.dayofyear - 1) // 7 + 1
+    return [f"{year}-SE{week:02d}" for year, week in zip(wednesdays.year, weeks)]
+
+def add_trend_metrics(counts, window):
+    """Média móvel e taxa de crescimento (variação % da média móvel entre períodos)"""
+    total = counts.sum(axis=1)
+    trend = pd.DataFrame({'casos': total}, index=counts.index)
+    trend['media_movel'] = total.rolling(window, min_periods=1).mean()
+    trend['crescimento'] = trend['media_movel'].pct_change().replace([np.inf, -np.inf], np.nan) * 100
+    return trend
+
+def get_epicurve(df, date_col, granularity, group_col=None):
+    """Série agregada com cache por granularidade (a série diária é calculada uma vez)"""
+    cache = st.session_state.setdefault('epicurve_cache', {})
+    key = (get_dataset_fingerprint(df), date_col, group_col)
+    if key not in cache:
+        dates = ensure_datetime(df, date_col)
+        groups = df[group_col] if group_col else None
+        cache[key] = {'D': daily_counts(dates, groups)}
+
+    series = cache[key]
+    if granularity not in series:
+        series[granularity] = resample_counts(series['D'], granularity)
+    return series[granularity]
+
+def perform_epicurve_analysis(df, date_col, granularity, group_col=None, window=None):
+    """Realiza a análise da curva epidêmica"""
+    counts = get_epicurve(df, date_col, granularity, group_col)
+    if counts.empty:
+        st.warning("Nenhuma data válida encontrada na coluna selecionada.")
+        return {}
+
+    window = window or config.EPICURVE_ROLLING_WINDOWS[GRANULARITIES[granularity]]
+    trend = add_trend_metrics(counts, window)
+    plot_epicurve(counts, trend, granularity, window)
+
+    peak = trend['casos'].idxmax()
+    last_growth = trend['crescimento'].dropna()
+    period_label = (epi_week_labels(pd.DatetimeIndex([peak]))[0]
+                    if granularity == 'Semana epidemiológica' else peak.strftime('%d/%m/%Y'))
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Total de casos", f"{int(trend['casos'].sum()):,}")
+    col2.metric("Pico", f"{int(trend['casos'].max()):,}", help=f"Período: {period_label}")
+    if not last_growth.empty:
+        col3.metric("Crescimento recente", f"{last_growth.iloc[-1]:.1f}%")
+
+    return {
+        'date_column': date_col,
+        'granularity': granularity,
+        'periods': len(trend),
+        'start': trend.index.min().strftime('%d/%m/%Y'),
+        'end': trend.index.max().strftime('%d/%m/%Y'),
+        'total_cases': int(trend['casos'].sum()),
+        'peak_period': period_label,
+        'peak_cases': int(trend['casos'].max()),
+        'rolling_window': window,
+        'last_growth_rate': last_growth.iloc[-1] if not last_growth.empty else None
+    }
+
+def plot_epicurve(counts, trend, granularity, window):
+    """Plota a curva epidêmica (barras por grupo) com a média móvel"""
+    fig = go.Figure()
+    hover = epi_week_labels(counts.index) if granularity == 'Semana epidemiológica' else None
+    for col in counts.columns:
+        fig.add_trace(go.Bar(x=counts.index, y=counts[col], name=str(col), hovertext=hover))
+
+    fig.add_trace(go.Scatter(
+        x=trend.index,
+        y=trend['media_movel'],
+        mode='lines',
+        name=f'Média móvel ({window} períodos)',
+        line=dict(color='red')
+    ))
+
+    fig.update_layout(
+        title=f'Curva Epidêmica por {granularity}',
+        xaxis_title='Período',
+        yaxis_title='Casos',
+        barmode='stack',
+        hovermode='x'
+    )
+    st.plotly_chart(fig, use_container_width=True)
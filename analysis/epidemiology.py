@@ -0,0 +1,360 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import plotly.express as px
+from scipy import stats
+from components.metrics import analysis_card
+import config
+
+AGE_BAND_COL = 'faixa_etaria'
+Z_95 = stats.norm.ppf(0.975)
+
+def make_age_bands(ages, bins=config.AGE_BANDS):
+    """Agrupa idades em faixas etárias [início, fim)"""
+    labels = [
+        f"{int(lower)}+" if np.isinf(upper) else f"{int(lower)}-{int(upper) - 1}"
+        for lower, upper in zip(bins[:-1], bins[1:])
+    ]
+    values = pd.to_numeric(ages, errors='coerce').to_numpy(dtype=float)
+    codes = np.searchsorted(bins, values, side='right') - 1
+    codes[np.isnan(values) | (codes < 0) | (codes >= len(labels))] = -1
+    return pd.Series(pd.Categorical.from_codes(codes, categories=labels), index=ages.index)
+
+def prepare_frame(df, event_col, strata=(), age_col=None, person_time_col=None):
+    """Monta um frame colunar mínimo (evento, tempo-pessoa e estratos) para agregação"""
+    columns = {'_event': pd.to_numeric(df[event_col], errors='coerce').astype(float)}
+    if person_time_col:
+        columns['_pt'] = pd.to_numeric(df[person_time_col], errors='coerce').astype(float)
+    for col in dict.fromkeys(strata):
+        if col == AGE_BAND_COL and age_col:
+            columns[col] = make_age_bands(df[age_col])
+        else:
+            columns[col] = df[col]
+
+    frame = pd.DataFrame(columns, index=df.index)
+    return frame.dropna(subset=[c for c in ['_event', '_pt'] if c in frame.columns])
+
+def _key_codes(column):
+    """Códigos inteiros e rótulos ordenados de uma coluna de estrato"""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy(), column.cat.categories
+    return pd.factorize(column, sort=True)
+
+def aggregate_counts(frame, keys):
+    """Conta registros, eventos e tempo-pessoa por estrato em uma única passada vetorizada"""
+    has_pt = '_pt' in frame.columns
+    events = frame['_event'].to_numpy()
+    person_time = frame['_pt'].to_numpy() if has_pt else None
+
+    if not keys:
+        counts = {'n': len(frame), 'events': events.sum()}
+        if has_pt:
+            counts['person_time'] = person_time.sum()
+        return pd.DataFrame([counts], index=pd.Index(['Total'], name='estrato'))
+
+    # Combina os códigos de todos os estratos em uma única chave inteira
+    codes, levels = zip(*(_key_codes(frame[key]) for key in keys))
+    valid = np.logical_and.reduce([c >= 0 for c in codes])
+    dims = tuple(len(level) for level in levels)
+    combined = np.ravel_multi_index(tuple(c[valid] for c in codes), dims)
+
+    if np.prod(dims, dtype=float) <= config.EPI_MAX_DENSE_STRATA:
+        size = int(np.prod(dims))
+        observed = np.flatnonzero(np.bincount(combined, minlength=size))
+        position = np.full(size, -1, dtype=np.int64)
+        position[observed] = np.arange(len(observed))
+        inverse = position[combined]
+    else:
+        inverse, observed = pd.factorize(combined, sort=True)
+
+    counts = {
+        'n': np.bincount(inverse, minlength=len(observed)),
+        'events': np.bincount(inverse, weights=events[valid], minlength=len(observed))
+    }
+    if has_pt:
+        counts['person_time'] = np.bincount(inverse, weights=person_time[valid], minlength=len(observed))
+
+    index = pd.MultiIndex(levels=list(levels), codes=list(np.unravel_index(observed, dims)), names=list(keys))
+    if len(keys) == 1:
+        index = index.get_level_values(0)
+    return pd.DataFrame(counts, index=index)
+
+def wilson_interval(events, n):
+    """Intervalo de Wilson (95%) para proporções, vetorizado"""
+    events, n = np.asarray(events, dtype=float), np.asarray(n, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = events / n
+        denom = 1 + Z_95 ** 2 / n
+        center = (p + Z_95 ** 2 / (2 * n)) / denom
+        margin = Z_95 * np.sqrt(p * (1 - p) / n + Z_95 ** 2 / (4 * n ** 2)) / denom
+    return center - margin, center + margin
+
+def poisson_interval(events, person_time):
+    """Intervalo exato de Poisson (95%) para taxas de incidência, vetorizado"""
+    events, person_time = np.asarray(events, dtype=float), np.asarray(person_time, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lower = np.where(events > 0, stats.chi2.ppf(0.025, 2 * events) / 2, 0.0) / person_time
+        upper = stats.chi2.ppf(0.975, 2 * (events + 1)) / 2 / person_time
+    return lower, upper
+
+def add_rates(counts, multiplier=1):
+    """Acrescenta taxa e IC 95%: incidência por tempo-pessoa ou proporção (risco/prevalência)"""
+    counts = counts.copy()
+    if 'person_time' in counts.columns:
+        counts['rate'] = counts['events'] / counts['person_time']
+        lower, upper = poisson_interval(counts['events'], counts['person_time'])
+    else:
+        counts['rate'] = counts['events'] / counts['n']
+        lower, upper = wilson_interval(counts['events'], counts['n'])
+
+    counts['rate'] *= multiplier
+    counts['ci_lower'] = lower * multiplier
+    counts['ci_upper'] = upper * multiplier
+    return counts
+
+def rates_table(frame, strata=(), multiplier=1):
+    """Taxas por estrato a partir de um frame preparado"""
+    return add_rates(aggregate_counts(frame, list(strata)), multiplier)
+
+def effects_table(frame, exposure_col, reference=None, strata=()):
+    """Medidas de efeito por estrato (e combinadas) a partir de um frame preparado"""
+    strata = list(strata)
+    counts = aggregate_counts(frame, strata + [exposure_col]).reset_index()
+
+    if reference is None:
+        reference = counts[exposure_col].iloc[0]
+
+    exposed = counts[counts[exposure_col] != reference]
+    unexposed = counts[counts[exposure_col] == reference].drop(columns=[exposure_col])
+    if strata:
+        table = exposed.merge(unexposed, on=strata, suffixes=('_exp', '_ref'))
+    else:
+        table = exposed.merge(unexposed, how='cross', suffixes=('_exp', '_ref'))
+
+    a, n1 = table['events_exp'].to_numpy(float), table['n_exp'].to_numpy(float)
+    c, n0 = table['events_ref'].to_numpy(float), table['n_ref'].to_numpy(float)
+    b, d = n1 - a, n0 - c
+
+    # Correção de Haldane quando alguma célula da tabela 2x2 é zero
+    zero = (a == 0) | (b == 0) | (c == 0) | (d == 0)
+    ac, bc_, cc, dc = (x + 0.5 * zero for x in (a, b, c, d))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rr = (ac / (ac + bc_)) / (cc / (cc + dc))
+        se_log_rr = np.sqrt(1 / ac - 1 / (ac + bc_) + 1 / cc - 1 / (cc + dc))
+        odds_ratio = (ac * dc) / (bc_ * cc)
+        se_log_or = np.sqrt(1 / ac + 1 / bc_ + 1 / cc + 1 / dc)
+
+    result = table[strata + [exposure_col]].copy()
+    result['reference'] = reference
+    result['events_exp'], result['n_exp'] = a, n1
+    result['events_ref'], result['n_ref'] = c, n0
+    result['risk_ratio'] = rr
+    result['rr_ci_lower'] = np.exp(np.log(rr) - Z_95 * se_log_rr)
+    result['rr_ci_upper'] = np.exp(np.log(rr) + Z_95 * se_log_rr)
+    result['odds_ratio'] = odds_ratio
+    result['or_ci_lower'] = np.exp(np.log(odds_ratio) - Z_95 * se_log_or)
+    result['or_ci_upper'] = np.exp(np.log(odds_ratio) + Z_95 * se_log_or)
+
+    pooled = mantel_haenszel(table, exposure_col) if strata else None
+    return result, pooled
+
+def mantel_haenszel(table, exposure_col):
+    """RR e OR combinados de Mantel-Haenszel entre estratos (variância de Greenland-Robins)"""
+    pooled = []
+    for level, group in table.groupby(exposure_col, observed=True, sort=False):
+        a, n1 = group['events_exp'].to_numpy(float), group['n_exp'].to_numpy(float)
+        c, n0 = group['events_ref'].to_numpy(float), group['n_ref'].to_numpy(float)
+        b, d = n1 - a, n0 - c
+        N = n1 + n0
+
+        # Razão de riscos
+        rr_num, rr_den = np.sum(a * n0 / N), np.sum(c * n1 / N)
+        rr = rr_num / rr_den
+        var_log_rr = np.sum((n1 * n0 * (a + c) - a * c * N) / N ** 2) / (rr_num * rr_den)
+
+        # Razão de chances
+        P, Q, R, S = (a + d) / N, (b + c) / N, a * d / N, b * c / N
+        odds_ratio = R.sum() / S.sum()
+        var_log_or = (
+            np.sum(P * R) / (2 * R.sum() ** 2)
+            + np.sum(P * S + Q * R) / (2 * R.sum() * S.sum())
+            + np.sum(Q * S) / (2 * S.sum() ** 2)
+        )
+
+        pooled.append({
+            exposure_col: level,
+            'strata': len(group),
+            'risk_ratio_mh': rr,
+            'rr_ci_lower': np.exp(np.log(rr) - Z_95 * np.sqrt(var_log_rr)),
+            'rr_ci_upper': np.exp(np.log(rr) + Z_95 * np.sqrt(var_log_rr)),
+            'odds_ratio_mh': odds_ratio,
+            'or_ci_lower': np.exp(np.log(odds_ratio) - Z_95 * np.sqrt(var_log_or)),
+            'or_ci_upper': np.exp(np.log(odds_ratio) + Z_95 * np.sqrt(var_log_or))
+        })
+    return pd.DataFrame(pooled)
+
+def standardized_table(frame, group_col=None, standard_population=None, multiplier=1):
+    """Padronização direta por idade a partir de um frame com a coluna de faixa etária"""
+    keys = ([group_col] if group_col else []) + [AGE_BAND_COL]
+    counts = aggregate_counts(frame, keys)
+
+    if 'person_time' in counts.columns:
+        counts['rate'] = counts['events'] / counts['person_time']
+        counts['variance'] = counts['events'] / counts['person_time'] ** 2
+    else:
+        counts['rate'] = counts['events'] / counts['n']
+        counts['variance'] = counts['rate'] * (1 - counts['rate']) / counts['n']
+
+    # Pesos da população padrão por faixa etária
+    if standard_population is None:
+        standard = counts.groupby(level=AGE_BAND_COL, observed=True)['n'].sum()
+    else:
+        standard = pd.Series(standard_population, dtype=float)
+    weights = standard / standard.sum()
+
+    band_weights = weights.reindex(counts.index.get_level_values(AGE_BAND_COL).astype(str)).to_numpy()
+    # Faixa sem registros no grupo não entra como taxa 0: os pesos são renormalizados entre as presentes
+    present = counts['rate'].notna().to_numpy() & (np.nan_to_num(band_weights) > 0)
+    counts['weighted_rate'] = np.where(present, counts['rate'] * band_weights, 0.0)
+    counts['weighted_variance'] = np.where(present, counts['variance'] * band_weights ** 2, 0.0)
+    counts['covered_weight'] = np.where(present, band_weights, 0.0)
+    counts['present_bands'] = present.astype(int)
+
+    # Soma os componentes ponderados de cada faixa etária dentro de cada grupo
+    sums = [col for col in ['n', 'events', 'person_time', 'weighted_rate', 'weighted_variance',
+                            'covered_weight', 'present_bands'] if col in counts.columns]
+    if group_col:
+        summary = counts[sums].groupby(level=group_col, observed=True).sum()
+    else:
+        summary = counts[sums].sum().to_frame('Total').T
+        summary.index.name = 'estrato'
+
+    denominator = summary.pop('person_time') if 'person_time' in summary.columns else summary['n']
+    summary['crude_rate'] = summary['events'] / denominator
+    covered = summary.pop('covered_weight').replace(0, np.nan)
+    summary['standardized_rate'] = summary.pop('weighted_rate') / covered
+    summary['variance'] = summary.pop('weighted_variance') / covered ** 2
+    missing_bands = int((weights > 0).sum()) - summary.pop('present_bands').astype(int)
+
+    se = np.sqrt(summary.pop('variance'))
+    summary['ci_lower'] = (summary['standardized_rate'] - Z_95 * se).clip(lower=0) * multiplier
+    summary['ci_upper'] = (summary['standardized_rate'] + Z_95 * se) * multiplier
+    summary['standardized_rate'] *= multiplier
+    summary['crude_rate'] *= multiplier
+    summary['missing_bands'] = missing_bands
+    return summary
+
+def stratified_rates(df, event_col, strata=(), age_col=None, person_time_col=None, multiplier=1):
+    """Taxas brutas (sem estratos) ou estratificadas com IC 95%"""
+    frame = prepare_frame(df, event_col, strata, age_col, person_time_col)
+    return rates_table(frame, strata, multiplier)
+
+def effect_measures(df, event_col, exposure_col, reference=None, strata=(), age_col=None):
+    """Razão de riscos e razão de chances (IC 95%) de cada nível da exposição contra a referência"""
+    frame = prepare_frame(df, event_col, list(strata) + [exposure_col], age_col)
+    return effects_table(frame, exposure_col, reference, strata)
+
+def age_standardized_rates(df, event_col, age_col, group_col=None, standard_population=None,
+                           person_time_col=None, multiplier=1):
+    """Padronização direta por idade (população padrão: distribuição etária do próprio dataset)"""
+    keys = ([group_col] if group_col else []) + [AGE_BAND_COL]
+    frame = prepare_frame(df, event_col, keys, age_col, person_time_col)
+    return standardized_table(frame, group_col, standard_population, multiplier)
+
+def compute_epidemiology(df, event_col, strata=(), age_col=None, exposure_col=None,
+                         reference=None, person_time_col=None, multiplier=100):
+    """Calcula todas as tabelas epidemiológicas sem renderizar a interface"""
+    strata = list(strata)
+    group_col = exposure_col or next((col for col in strata if col != AGE_BAND_COL), None)
+
+    # Um único frame colunar com todas as chaves atende todas as agregações
+    keys = strata + ([exposure_col] if exposure_col else [])
+    if age_col:
+        keys += [group_col, AGE_BAND_COL] if group_col else [AGE_BAND_COL]
+    frame = prepare_frame(df, event_col, [key for key in keys if key], age_col, person_time_col)
+
+    tables = {'crude': rates_table(frame, (), multiplier)}
+    if strata:
+        tables['stratified'] = rates_table(frame, strata, multiplier)
+    if exposure_col:
+        tables['effects'], pooled = effects_table(frame, exposure_col, reference, strata)
+        if pooled is not None:
+            tables['mantel_haenszel'] = pooled
+    if age_col:
+        tables['age_standardized'] = standardized_table(frame, group_col, multiplier=multiplier)
+
+    return tables
+
+def _to_records(table):
+    """Converte uma tabela em registros serializáveis (estratos como texto)"""
+    table = table.reset_index() if table.index.name or len(table.index.names) > 1 else table
+    labels = table.select_dtypes(exclude=[np.number]).columns
+    return table.astype({col: str for col in labels}).to_dict('records')
+
+def summarize_epidemiology(tables, multiplier):
+    """Monta o dicionário de resultados a partir das tabelas calculadas"""
+    crude = tables['crude'].iloc[0]
+    results = {
+        'multiplier': multiplier,
+        'crude_rate': {'rate': crude['rate'], 'ci_lower': crude['ci_lower'], 'ci_upper': crude['ci_upper'],
+                       'events': crude['events'], 'n': crude['n']}
+    }
+    for name in ['stratified', 'effects', 'mantel_haenszel', 'age_standardized']:
+        if name in tables:
+            results[name] = _to_records(tables[name])
+    return results
+
+def compute_epidemiological_results(df, params):
+    """Recalcula os indicadores epidemiológicos sem renderizar a interface"""
+    return summarize_epidemiology(compute_epidemiology(df, **params), params.get('multiplier', 100))
+
+def perform_epidemiological_analysis(df, event_col, strata, age_col=None, exposure_col=None,
+                                     reference=None, person_time_col=None, multiplier=100):
+    """Realiza análise epidemiológica de taxas, medidas de efeito e padronização por idade"""
+    tables = compute_epidemiology(df, event_col, strata, age_col, exposure_col,
+                                  reference, person_time_col, multiplier)
+    label = "Taxa de incidência" if person_time_col else "Risco/Prevalência"
+
+    row = tables['crude'].iloc[0]
+    analysis_card("🧪 Taxa Bruta", f"""
+    - **{label}:** {row['rate']:.2f} por {multiplier:,} (IC 95%: {row['ci_lower']:.2f} – {row['ci_upper']:.2f})
+    - **Eventos:** {int(row['events']):,} em {int(row['n']):,} registros
+    """)
+
+    if 'stratified' in tables:
+        st.markdown(f"#### {label} por estrato (por {multiplier:,})")
+        st.dataframe(tables['stratified'].style.format("{:.2f}"), use_container_width=True)
+        plot_stratified_rates(tables['stratified'], label)
+
+    if 'effects' in tables:
+        st.markdown(f"#### Medidas de efeito por {exposure_col}")
+        st.dataframe(tables['effects'], use_container_width=True)
+    if 'mantel_haenszel' in tables:
+        st.markdown("#### Estimativas combinadas (Mantel-Haenszel)")
+        st.dataframe(tables['mantel_haenszel'], use_container_width=True)
+
+    if 'age_standardized' in tables:
+        st.markdown(f"#### Taxas padronizadas por idade (método direto, por {multiplier:,})")
+        standardized = tables['age_standardized']
+        st.dataframe(standardized.style.format("{:.2f}", subset=standardized.columns.drop('missing_bands')),
+                     use_container_width=True)
+        incomplete = standardized.index[standardized['missing_bands'] > 0]
+        if len(incomplete):
+            st.warning(f"Faixas etárias sem registros em: {', '.join(map(str, incomplete))}. "
+                       "A taxa padronizada desses grupos usa só as faixas presentes (pesos renormalizados) "
+                       "e não é totalmente comparável com a dos demais.")
+
+    return summarize_epidemiology(tables, multiplier)
+
+def plot_stratified_rates(rates, label):
+    """Plota as taxas por estrato com barras de erro"""
+    data = rates.reset_index()
+    keys = list(rates.index.names)
+    data['estrato'] = data[keys].astype(str).agg(' | '.join, axis=1)
+    fig = px.bar(data, x='estrato', y='rate',
+                 error_y=data['ci_upper'] - data['rate'],
+                 error_y_minus=data['rate'] - data['ci_lower'],
+                 labels={'estrato': 'Estrato', 'rate': label},
+                 title=f'{label} por Estrato (IC 95%)')
+    st.plotly_chart(fig, use_container_width=True)
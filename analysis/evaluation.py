@@ -0,0 +1,338 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from utils.plotting import curve_decimation_indices
+import config
+
+METRIC_LABELS = {
+    'accuracy': 'Acurácia',
+    'precision': 'Precisão',
+    'recall': 'Recall',
+    'f1': 'F1-Score',
+    'roc_auc': 'AUC-ROC',
+    'average_precision': 'AUC-PR',
+    'brier': 'Brier',
+    'ece': 'Erro de calibração'
+}
+
+def encode_labels(y_true, y_pred, classes):
+    """Códigos (posição em classes) dos rótulos reais e preditos; -1 para rótulos desconhecidos"""
+    categories = pd.Index(classes)
+    return categories.get_indexer(pd.Series(y_true)), categories.get_indexer(pd.Series(y_pred))
+
+def label_metrics(tp, predicted, support, n):
+    """Acurácia e precisão/recall/F1 ponderados pelo suporte, a partir das contagens por classe"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Classes sem predições/suporte contam como 0, como no classification_report
+        precision = np.where(predicted > 0, tp / predicted, 0.0)
+        recall = np.where(support > 0, tp / support, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    share = support / support.sum(axis=1, keepdims=True)
+    return {
+        'accuracy': tp.sum(axis=1) / n,
+        'precision': (share * precision).sum(axis=1),
+        'recall': (share * recall).sum(axis=1),
+        'f1': (share * f1).sum(axis=1)
+    }
+
+def ranking_counts(hits, weights, last):
+    """Verdadeiros positivos e total acumulados até cada limiar distinto (dados já ordenados)"""
+    positives = weights * hits
+    np.cumsum(positives, axis=1, out=positives)
+    totals = np.cumsum(weights, axis=1)
+    if last is None:
+        return positives, totals
+    return positives[:, last], totals[:, last]
+
+def ranking_areas(tps, totals):
+    """AUC-ROC (regra do trapézio) e precisão média a partir das contagens acumuladas por limiar"""
+    positives = tps[:, -1]
+    negatives = totals[:, -1] - positives
+    gain_tp = np.diff(tps, axis=1, prepend=0)
+    gain_fp = np.diff(totals, axis=1, prepend=0)
+    gain_fp -= gain_tp
+    # Cada faixa de falsos positivos sob a média dos verdadeiros positivos nas bordas: (2·VP - ganho) / 2
+    area = 2 * np.einsum('ij,ij->i', gain_fp, tps) - np.einsum('ij,ij->i', gain_fp, gain_tp)
+    precision = np.divide(tps, totals, out=np.zeros_like(tps), where=totals > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Reamostras sem positivos ou sem negativos ficam indefinidas (NaN)
+        auc = area / (2 * positives * negatives)
+        ap = np.einsum('ij,ij->i', gain_tp, precision) / positives
+    return auc, ap
+
+def class_rankings(codes, proba, n_classes):
+    """Ordenação por score de cada classe (uma por classe; só a positiva no caso binário)"""
+    rankings = []
+    for k in ([1] if n_classes == 2 else range(n_classes)):
+        order = np.argsort(-proba[:, k], kind='stable')
+        scores = proba[order, k]
+        # Último índice de cada bloco de scores empatados: um ponto da curva por limiar
+        last = np.append(np.flatnonzero(np.diff(scores)), len(scores) - 1)
+        rankings.append({'class': k, 'order': order, 'hits': (codes[order] == k).astype(float),
+                         'last': None if len(last) == len(scores) else last, 'thresholds': scores[last]})
+    return rankings
+
+def calibration_inputs(codes, proba):
+    """Probabilidade avaliada e acerto por registro: classe positiva (binário) ou classe prevista"""
+    if proba.shape[1] == 2:
+        return proba[:, 1], (codes == 1).astype(float)
+    top = proba.argmax(axis=1)
+    return proba[np.arange(len(proba)), top], (codes == top).astype(float)
+
+def resample_metrics(data, weights):
+    """Todas as métricas para um bloco de reamostras (pesos por registro, na ordem base dos dados)"""
+    n, k, bins = weights.shape[1], data['n_classes'], data['n_bins']
+    # Um único produto matricial soma todas as contagens por classe e por faixa de calibração
+    features = data['features32'] if weights.dtype == np.float32 else data['features']
+    sums = weights @ features
+    tp, predicted, support = sums[:, :k], sums[:, k:2 * k], sums[:, 2 * k:3 * k]
+    metrics = label_metrics(tp, predicted, support, n)
+    if not data['rankings']:
+        return metrics
+
+    aucs, precisions = [], []
+    for ranking in data['rankings']:
+        ranked = weights if ranking['position'] is None else weights[:, ranking['position']]
+        auc, ap = ranking_areas(*ranking_counts(ranking['hits_base'], ranked, ranking['last']))
+        aucs.append(auc)
+        precisions.append(ap)
+    # Multiclasse: média macro das curvas um-contra-todos
+    metrics['roc_auc'] = np.mean(aucs, axis=0)
+    metrics['average_precision'] = np.mean(precisions, axis=0)
+
+    metrics['brier'] = sums[:, 3 * k] / n
+    _, confidence, outcome = calibration_sums(sums, k, bins)
+    # Erro de calibração esperado: média ponderada de |observado - previsto| nas faixas
+    metrics['ece'] = np.abs(outcome - confidence).sum(axis=1) / n
+    return metrics
+
+def calibration_sums(sums, n_classes, n_bins):
+    """Registros, soma das probabilidades e soma dos acertos por faixa de calibração"""
+    start = 3 * n_classes + 1
+    return tuple(sums[:, start + i * n_bins:start + (i + 1) * n_bins] for i in range(3))
+
+def _bootstrap_block(data, size, seed):
+    """Métricas de um bloco de reamostras com gerador próprio"""
+    n = data['n']
+    rng = np.random.default_rng(seed)
+    # Pesos = quantas vezes cada registro foi sorteado (a ordenação por score é reaproveitada);
+    # float32 representa as contagens sem erro e reduz pela metade a memória percorrida
+    weights = np.empty((size, n), dtype=np.float32)
+    for row in weights:
+        row[:] = np.bincount(rng.integers(0, n, n), minlength=n)
+    return resample_metrics(data, weights)
+
+def bootstrap_metrics(data, n_bootstrap, random_state, workers=config.EVAL_BOOTSTRAP_WORKERS):
+    """Métricas de n_bootstrap reamostras, em blocos de tamanho limitado e em paralelo quando grandes"""
+    n = data['n']
+    block = max(1, config.EVAL_BOOTSTRAP_BLOCK_CELLS // n)
+    sizes = [min(block, n_bootstrap - start) for start in range(0, n_bootstrap, block)]
+    # Uma semente por bloco: o resultado não depende do número de threads
+    seeds = np.random.SeedSequence(random_state).spawn(len(sizes))
+
+    if len(sizes) > 1 and n * n_bootstrap >= config.EVAL_BOOTSTRAP_PARALLEL_MIN_CELLS:
+        # Threads: cumsum, matmul e bincount do numpy liberam o GIL e os dados não são copiados
+        with ThreadPoolExecutor(max_workers=min(workers, len(sizes)), thread_name_prefix="sisade-bootstrap") as executor:
+            blocks = list(executor.map(_bootstrap_block, [data] * len(sizes), sizes, seeds))
+    else:
+        blocks = [_bootstrap_block(data, size, seed) for size, seed in zip(sizes, seeds)]
+    return {name: np.concatenate([b[name] for b in blocks]).astype(float) for name in blocks[0]}
+
+def evaluation_inputs(y_true, y_pred, proba, classes):
+    """Codificações compartilhadas pela estimativa pontual e pelo bootstrap"""
+    codes, pred_codes = encode_labels(y_true, y_pred, classes)
+    known = codes >= 0
+    codes, pred_codes = codes[known], pred_codes[known]
+    n_classes, n_bins = len(classes), config.EVAL_CALIBRATION_BINS
+    eye = np.eye(n_classes)
+    true_hot = eye[codes]
+    pred_hot = np.where(pred_codes[:, None] >= 0, eye[pred_codes], 0.0)
+    columns = [true_hot * pred_hot, pred_hot, true_hot]
+    rankings = []
+
+    if proba is not None:
+        proba = np.asarray(proba, dtype=float)[known]
+        confidence, outcome = calibration_inputs(codes, proba)
+        bins_hot = np.eye(n_bins)[np.minimum((confidence * n_bins).astype(int), n_bins - 1)]
+        # Brier binário sobre a classe positiva; multiclasse somando o erro de todas as classes
+        squared = ((proba[:, 1] - true_hot[:, 1]) ** 2 if n_classes == 2
+                   else ((proba - true_hot) ** 2).sum(axis=1))
+        columns += [squared[:, None], bins_hot, bins_hot * confidence[:, None], bins_hot * outcome[:, None]]
+        rankings = class_rankings(codes, proba, n_classes)
+
+    features = np.hstack(columns)
+    if rankings:
+        # Ordem base = ordenação da primeira classe: os pesos do bootstrap já nascem nessa ordem
+        # (reamostrar e depois permutar tem a mesma distribuição) e as demais classes a reindexam
+        base = rankings[0]['order']
+        rank_of = np.empty(len(base), dtype=np.intp)
+        rank_of[base] = np.arange(len(base))
+        features = features[base]
+        for i, ranking in enumerate(rankings):
+            ranking['position'] = None if i == 0 else rank_of[ranking['order']]
+            ranking['hits_base'] = ranking['hits'].astype(np.float32)
+    features = np.ascontiguousarray(features)
+    return {
+        'n': len(codes),
+        'n_classes': n_classes,
+        'n_bins': n_bins,
+        'features': features,
+        'features32': features.astype(np.float32),
+        'rankings': rankings
+    }
+
+def classification_curves(data, classes):
+    """Curvas ROC e precisão-recall (decimadas) e tabela de calibração"""
+    roc, pr = [], []
+    ones = np.ones((1, data['n']))
+    for ranking in data['rankings']:
+        tps, totals = ranking_counts(ranking['hits'], ones, ranking['last'])
+        tps, fps = tps[0], totals[0] - tps[0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            tpr = np.append(0.0, tps / tps[-1])
+            fpr = np.append(0.0, fps / fps[-1])
+            precision = np.append(1.0, tps / (tps + fps))
+        thresholds = np.append(np.inf, ranking['thresholds'])
+        name = str(classes[ranking['class']])
+        keep = curve_decimation_indices(fpr, tpr, config.EVAL_CURVE_POINTS)
+        roc.append({'name': name, 'fpr': fpr[keep], 'tpr': tpr[keep], 'threshold': thresholds[keep]})
+        keep = curve_decimation_indices(tpr, precision, config.EVAL_CURVE_POINTS)
+        pr.append({'name': name, 'recall': tpr[keep], 'precision': precision[keep], 'threshold': thresholds[keep]})
+
+    count, confidence, outcome = (sums[0] for sums in calibration_sums(ones @ data['features'], data['n_classes'],
+                                                                       data['n_bins']))
+    edges = np.linspace(0, 1, config.EVAL_CALIBRATION_BINS + 1)
+    calibration = pd.DataFrame({
+        'faixa': [f"{lo:.1f}–{hi:.1f}" for lo, hi in zip(edges[:-1], edges[1:])],
+        'registros': count.round().astype(int),
+        'prob_media': confidence / np.maximum(count, 1),
+        'freq_observada': outcome / np.maximum(count, 1)
+    })
+    return roc, pr, calibration[calibration['registros'] > 0].reset_index(drop=True)
+
+def evaluate_classifier(y_true, y_pred, proba, classes, n_bootstrap=config.EVAL_BOOTSTRAP_SAMPLES,
+                        ci_level=config.EVAL_CI_LEVEL, random_state=0):
+    """Métricas pontuais, IC por bootstrap, curvas ROC/PR e calibração de um classificador"""
+    classes = list(classes)
+    data = evaluation_inputs(y_true, y_pred, proba, classes)
+    n = data['n']
+    if n == 0:
+        raise ValueError("Nenhum registro com classe conhecida pelo modelo no conjunto de avaliação")
+
+    point = {name: float(values[0]) for name, values in resample_metrics(data, np.ones((1, n))).items()}
+    evaluation = {
+        'classes': classes,
+        'positive_class': classes[1] if len(classes) == 2 else None,
+        'n': n,
+        'metrics': point,
+        'ci': {},
+        'n_bootstrap': n_bootstrap,
+        'ci_level': ci_level
+    }
+    if n_bootstrap:
+        tail = (1 - ci_level) / 2 * 100
+        for name, values in bootstrap_metrics(data, n_bootstrap, random_state).items():
+            # Reamostras sem uma das classes não têm AUC definida e ficam de fora
+            if np.isfinite(values).any():
+                lower, upper = np.nanpercentile(values, [tail, 100 - tail])
+                evaluation['ci'][name] = (float(lower), float(upper))
+    if data['rankings']:
+        evaluation['roc'], evaluation['pr'], evaluation['calibration'] = classification_curves(data, classes)
+    return evaluation
+
+def summarize_evaluation(evaluation):
+    """Métricas com IC em formato serializável (relatório, IA e tarefas em segundo plano)"""
+    return {
+        'metrics': {
+            name: {'value': value, **dict(zip(('lower', 'upper'), evaluation['ci'].get(name, (None, None))))}
+            for name, value in evaluation['metrics'].items()
+        },
+        'positive_class': evaluation['positive_class'],
+        'n': evaluation['n'],
+        'n_bootstrap': evaluation['n_bootstrap'],
+        'ci_level': evaluation['ci_level']
+    }
+
+def get_classification_evaluation(n_bootstrap=config.EVAL_BOOTSTRAP_SAMPLES, ci_level=config.EVAL_CI_LEVEL):
+    """Avaliação do último modelo treinado, com cache por modelo e configuração do bootstrap"""
+    fitted = st.session_state.predictive_model
+    cache = st.session_state.setdefault('evaluation_cache', {})
+    key = (n_bootstrap, ci_level)
+    if key not in cache:
+        model = fitted['model']
+        y_pred = fitted['y_pred'] if 'y_pred' in fitted else model.predict(fitted['X_test'])
+        with st.spinner(f"Calculando curvas e IC por bootstrap ({n_bootstrap} reamostras)..."):
+            cache[key] = evaluate_classifier(fitted['y_test'], y_pred, fitted.get('y_proba'), model.classes_,
+                                             n_bootstrap, ci_level, fitted['params'].get('random_state', 0))
+    return cache[key]
+
+def format_metric(evaluation, name):
+    """Valor da métrica com o intervalo de confiança, quando houver"""
+    value = evaluation['metrics'][name]
+    if name not in evaluation['ci']:
+        return f"{value:.3f}"
+    lower, upper = evaluation['ci'][name]
+    return f"{value:.3f} ({lower:.3f}–{upper:.3f})"
+
+def render_classification_evaluation(evaluation):
+    """Exibe métricas com IC, curvas ROC/PR e calibração"""
+    names = [name for name in METRIC_LABELS if name in evaluation['metrics']]
+    for row in range(0, len(names), 4):
+        for col, name in zip(st.columns(4), names[row:row + 4]):
+            col.metric(METRIC_LABELS[name], f"{evaluation['metrics'][name]:.3f}")
+            if name in evaluation['ci']:
+                lower, upper = evaluation['ci'][name]
+                col.caption(f"IC {evaluation['ci_level']:.0%}: {lower:.3f}–{upper:.3f}")
+    if evaluation['n_bootstrap']:
+        st.caption(f"📏 Intervalos por bootstrap ({evaluation['n_bootstrap']} reamostras do conjunto de teste, "
+                   f"{evaluation['n']:,} registros).")
+
+    if 'roc' not in evaluation:
+        st.info("O modelo não fornece probabilidades; curvas ROC/PR e calibração indisponíveis.")
+        return
+
+    positive = evaluation['positive_class']
+    suffix = f" (classe positiva: {positive})" if positive is not None else " (um contra todos)"
+    col1, col2 = st.columns(2)
+    with col1:
+        st.plotly_chart(build_roc_figure(evaluation['roc'], "Curva ROC" + suffix), use_container_width=True)
+    with col2:
+        st.plotly_chart(build_pr_figure(evaluation['pr'], "Curva Precisão-Recall" + suffix), use_container_width=True)
+    st.plotly_chart(build_calibration_figure(evaluation['calibration'], positive), use_container_width=True)
+
+def build_roc_figure(curves, title):
+    """Curvas ROC com a diagonal de referência"""
+    fig = go.Figure()
+    for curve in curves:
+        fig.add_trace(go.Scattergl(x=curve['fpr'], y=curve['tpr'], mode='lines', name=curve['name'],
+                                   customdata=curve['threshold'],
+                                   hovertemplate="FPR %{x:.3f}<br>TPR %{y:.3f}<br>limiar %{customdata:.3f}"))
+    fig.add_shape(type='line', x0=0, y0=0, x1=1, y1=1, line=dict(color='gray', dash='dash'))
+    fig.update_layout(title=title, xaxis_title='Taxa de falsos positivos', yaxis_title='Sensibilidade')
+    return fig
+
+def build_pr_figure(curves, title):
+    """Curvas precisão-recall"""
+    fig = go.Figure()
+    for curve in curves:
+        fig.add_trace(go.Scattergl(x=curve['recall'], y=curve['precision'], mode='lines', name=curve['name'],
+                                   customdata=curve['threshold'],
+                                   hovertemplate="Recall %{x:.3f}<br>Precisão %{y:.3f}<br>limiar %{customdata:.3f}"))
+    fig.update_layout(title=title, xaxis_title='Recall', yaxis_title='Precisão', yaxis_range=[0, 1.05])
+    return fig
+
+def build_calibration_figure(calibration, positive_class):
+    """Curva de calibração: probabilidade prevista vs frequência observada por faixa"""
+    label = f"Frequência observada de {positive_class}" if positive_class is not None else "Taxa de acerto observada"
+    fig = go.Figure(go.Scatter(x=calibration['prob_media'], y=calibration['freq_observada'], mode='lines+markers',
+                               marker=dict(size=np.sqrt(calibration['registros'] / calibration['registros'].max()) * 20 + 4),
+                               customdata=calibration['registros'], name='Modelo',
+                               hovertemplate="Prevista %{x:.3f}<br>Observada %{y:.3f}<br>%{customdata} registros"))
+    fig.add_shape(type='line', x0=0, y0=0, x1=1, y1=1, line=dict(color='gray', dash='dash'))
+    fig.update_layout(title="Curva de Calibração", xaxis_title='Probabilidade prevista', yaxis_title=label,
+                      xaxis_range=[0, 1], yaxis_range=[0, 1.05])
+    return fig
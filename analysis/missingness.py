@@ -0,0 +1,221 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+from scipy import stats
+
+from components.metrics import analysis_card
+from core.model_registry import get_dataset_fingerprint
+import config
+
+def null_bit_words(null_masks, n_rows, n_cols):
+    """Compacta as máscaras de ausência (uma por coluna) em palavras de 64 bits por linha"""
+    words = np.zeros((-(-n_cols // 64), n_rows), dtype=np.uint64)
+    for j, mask in enumerate(null_masks):
+        np.bitwise_or(words[j // 64], np.uint64(1 << (j % 64)), out=words[j // 64], where=mask)
+    return words.T
+
+def missing_patterns(words, n_cols):
+    """Padrões distintos de ausência: (padrões booleanos, contagens, padrão de cada linha)"""
+    # Uma única passagem de unique: inteiros até 64 colunas, blocos de bytes acima disso
+    if words.shape[1] == 1:
+        keys = words[:, 0]
+    else:
+        keys = np.ascontiguousarray(words).view(np.dtype((np.void, 8 * words.shape[1]))).ravel()
+    _, first, inverse, counts = np.unique(keys, return_index=True, return_inverse=True, return_counts=True)
+
+    bits = np.arange(n_cols)
+    unique_words = words[first]
+    patterns = (unique_words[:, bits // 64] >> (bits % 64).astype(np.uint64)) & np.uint64(1)
+    return patterns.astype(bool), counts, inverse.ravel()
+
+def cooccurrence_matrix(patterns, counts):
+    """Linhas com ausência simultânea em cada par de colunas (produto matricial sobre os padrões)"""
+    weighted = patterns.astype(float)
+    return (weighted * counts[:, None]).T @ weighted
+
+def _pattern_moments(values, observed, inverse, n_patterns):
+    """Contagens, somas e produtos cruzados dos valores observados, por padrão de ausência"""
+    order = np.argsort(inverse, kind='stable')
+    filled = np.where(observed, values, 0.0)[order]
+    counts = np.bincount(inverse, minlength=n_patterns)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    sums = np.add.reduceat(filled, starts, axis=0)
+    cross = np.stack([filled[s:s + n].T @ filled[s:s + n] for s, n in zip(starts, counts)])
+    return counts, sums, cross
+
+def _em_moments(observed_sets, counts, sums, cross, max_iter, tol):
+    """Média e covariância por EM a partir dos momentos de cada padrão (custo independente do nº de linhas)"""
+    k = sums.shape[1]
+    n = counts.sum()
+    n_observed = sum(c * o for c, o in zip(counts, observed_sets))
+    mu = sum(s * o for s, o in zip(sums, observed_sets)) / n_observed
+    sigma = np.diag(np.maximum(
+        sum(np.diag(c) * o for c, o in zip(cross, observed_sets)) / n_observed - mu ** 2, 1e-12
+    ))
+
+    for _ in range(max_iter):
+        total = np.zeros(k)
+        total_cross = np.zeros((k, k))
+        for obs, n_j, s_j, c_j in zip(observed_sets, counts, sums, cross):
+            o, m = np.flatnonzero(obs), np.flatnonzero(~obs)
+            s_o, c_oo = s_j[o], c_j[np.ix_(o, o)]
+            if len(m) == 0:
+                total += s_j
+                total_cross += c_j
+                continue
+
+            # E[x_M | x_O] = a + B x_O, com B = Σ_MO Σ_OO⁻¹
+            b = np.linalg.lstsq(sigma[np.ix_(o, o)], sigma[np.ix_(o, m)], rcond=None)[0].T
+            a = mu[m] - b @ mu[o]
+            s_m = n_j * a + b @ s_o
+            c_mo = np.outer(a, s_o) + b @ c_oo
+            c_mm = (n_j * np.outer(a, a) + np.outer(a, s_o) @ b.T + b @ np.outer(s_o, a) + b @ c_oo @ b.T
+                    + n_j * (sigma[np.ix_(m, m)] - b @ sigma[np.ix_(o, m)]))
+
+            total[o] += s_o
+            total[m] += s_m
+            total_cross[np.ix_(o, o)] += c_oo
+            total_cross[np.ix_(m, o)] += c_mo
+            total_cross[np.ix_(o, m)] += c_mo.T
+            total_cross[np.ix_(m, m)] += c_mm
+
+        new_mu = total / n
+        new_sigma = total_cross / n - np.outer(new_mu, new_mu)
+        converged = (np.abs(new_mu - mu).max() < tol and np.abs(new_sigma - sigma).max() < tol)
+        mu, sigma = new_mu, new_sigma
+        if converged:
+            break
+    return mu, sigma
+
+def little_mcar_test(df, columns, max_iter=config.MCAR_MAX_ITER, tol=config.MCAR_TOL):
+    """Teste MCAR de Little (H0: os dados são ausentes completamente ao acaso)"""
+    # Em bases muito grandes o teste usa uma amostra aleatória (sob H0 a distribuição é a mesma)
+    if len(df) > config.MCAR_MAX_ROWS:
+        rng = np.random.default_rng(config.DEFAULT_RANDOM_STATE)
+        df = df.iloc[np.sort(rng.choice(len(df), config.MCAR_MAX_ROWS, replace=False))]
+
+    values = df[columns].to_numpy(dtype=float, na_value=np.nan)
+    observed = ~np.isnan(values)
+    # Linhas sem nenhum valor observado não informam o teste
+    rows = observed.any(axis=1)
+    values, observed = values[rows], observed[rows]
+
+    words = null_bit_words((~observed[:, j] for j in range(len(columns))), len(values), len(columns))
+    patterns, _, inverse = missing_patterns(words, len(columns))
+    observed_sets = ~patterns
+    counts, sums, cross = _pattern_moments(values, observed, inverse, len(patterns))
+    mu, sigma = _em_moments(observed_sets, counts, sums, cross, max_iter, tol)
+
+    statistic = 0.0
+    for obs, n_j, s_j in zip(observed_sets, counts, sums):
+        o = np.flatnonzero(obs)
+        diff = s_j[o] / n_j - mu[o]
+        statistic += n_j * diff @ np.linalg.lstsq(sigma[np.ix_(o, o)], diff, rcond=None)[0]
+
+    dof = int(observed_sets.sum() - len(columns))
+    return {
+        'statistic': float(statistic),
+        'df': dof,
+        'p_value': float(stats.chi2.sf(statistic, dof)) if dof > 0 else None,
+        'n_patterns': len(patterns),
+        'n_rows': len(values),
+        'columns': list(columns)
+    }
+
+def mcar_columns(df):
+    """Colunas numéricas do teste de Little (as com mais ausentes, até o limite configurado)"""
+    numeric = df.select_dtypes(include=[np.number, 'bool'])
+    missing = numeric.isna().sum()
+    return missing.sort_values(ascending=False).index[:config.MCAR_MAX_COLUMNS].tolist()
+
+def analyze_missingness(df):
+    """Padrões, coocorrência e teste MCAR das colunas com valores ausentes"""
+    columns = [col for col in df.columns if df[col].hasnans]
+    if not columns:
+        return None
+
+    masks = (df[col].isna().to_numpy() for col in columns)
+    patterns, counts, _ = missing_patterns(null_bit_words(masks, len(df), len(columns)), len(columns))
+    order = np.argsort(counts)[::-1]
+    patterns, counts = patterns[order], counts[order]
+
+    mcar = None
+    test_columns = mcar_columns(df)
+    if len(test_columns) >= 2 and df[test_columns].isna().any().any():
+        mcar = little_mcar_test(df, test_columns)
+
+    return {
+        'columns': columns,
+        'patterns': patterns,
+        'counts': counts,
+        'cooccurrence': cooccurrence_matrix(patterns, counts),
+        'n_rows': len(df),
+        'mcar': mcar
+    }
+
+def get_missingness(df):
+    """Análise de ausentes com cache por dataset"""
+    cache = st.session_state.setdefault('missingness_cache', {})
+    key = get_dataset_fingerprint(df)
+    if key not in cache:
+        cache[key] = analyze_missingness(df)
+    return cache[key]
+
+def pattern_table(analysis, top=config.MISSING_TOP_PATTERNS):
+    """Padrões mais frequentes (✗ = ausente) com contagem e proporção"""
+    table = pd.DataFrame(np.where(analysis['patterns'][:top], '✗', ''), columns=analysis['columns'])
+    table.insert(0, 'registros', analysis['counts'][:top])
+    table.insert(1, 'proporção', analysis['counts'][:top] / analysis['n_rows'])
+    return table
+
+def conditional_missing(analysis):
+    """P(coluna ausente | linha ausente): coocorrência dividida pelo total de ausentes da linha"""
+    co = analysis['cooccurrence']
+    return pd.DataFrame(co / np.diag(co)[:, None], index=analysis['columns'], columns=analysis['columns'])
+
+def summarize_missingness(analysis):
+    """Resumo serializável da estrutura de ausentes"""
+    if analysis is None:
+        return {'n_patterns': 1, 'complete_rows': 1.0}
+    complete = analysis['counts'][~analysis['patterns'].any(axis=1)].sum()
+    top = pattern_table(analysis, 5)
+    return {
+        'n_patterns': len(analysis['counts']),
+        'complete_rows': float(complete / analysis['n_rows']),
+        'top_patterns': [
+            {'missing': [col for col in analysis['columns'] if row[col] == '✗'],
+             'rows': int(row['registros']), 'share': round(float(row['proporção']), 4)}
+            for _, row in top.iterrows()
+        ],
+        'mcar': analysis['mcar']
+    }
+
+def perform_missingness_analysis(df):
+    """Exibe padrões de ausência, coocorrência entre colunas e o teste MCAR"""
+    analysis = get_missingness(df)
+    if analysis is None:
+        return summarize_missingness(None)
+
+    summary = summarize_missingness(analysis)
+    st.markdown(f"**Padrões de ausência:** {summary['n_patterns']:,} distintos; "
+                f"{summary['complete_rows']:.1%} dos registros estão completos.")
+    st.dataframe(pattern_table(analysis).style.format({'proporção': '{:.1%}'}), use_container_width=True)
+
+    if len(analysis['columns']) > 1:
+        fig = px.imshow(conditional_missing(analysis), text_auto='.0%', color_continuous_scale='Reds',
+                        range_color=[0, 1], labels={'x': 'Também ausente', 'y': 'Ausente', 'color': 'P'},
+                        title='Coocorrência de Ausentes: P(coluna ausente | linha ausente)')
+        st.plotly_chart(fig, use_container_width=True)
+
+    mcar = analysis['mcar']
+    if mcar is not None and mcar['p_value'] is not None:
+        verdict = ("compatível com MCAR (ausência ao acaso)" if mcar['p_value'] >= 0.05
+                   else "não compatível com MCAR: a ausência depende dos dados; prefira imputação multivariada")
+        analysis_card("🧩 Teste MCAR de Little", f"""
+        - **χ²:** {mcar['statistic']:.2f} ({mcar['df']} g.l.)
+        - **p-valor:** {mcar['p_value']:.4f}
+        - **Conclusão:** {verdict}
+        """)
+    return summary
@@ -0,0 +1,166 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+from scipy import stats
+
+from core.model_registry import get_dataset_fingerprint
+from utils.plotting import build_survival_figure, km_curve
+import config
+
+# Distribuições disponíveis: nome exibido -> classe do lifelines
+DISTRIBUTIONS = {
+    'Weibull': 'WeibullFitter',
+    'Log-normal': 'LogNormalFitter',
+    'Log-logística': 'LogLogisticFitter',
+    'Exponencial': 'ExponentialFitter'
+}
+
+def _fit_distribution(name, durations, events, weights):
+    """Ajusta uma distribuição (executado em um processo separado)"""
+    import lifelines
+
+    fitter = getattr(lifelines, DISTRIBUTIONS[name])()
+    try:
+        fitter.fit(durations, events, weights=weights)
+    except Exception as e:
+        return {'distribution': name, 'error': str(e)}
+
+    n_params = len(fitter.params_)
+    log_likelihood = fitter.log_likelihood_
+    return {
+        'distribution': name,
+        'params': fitter.params_.to_dict(),
+        'log_likelihood': log_likelihood,
+        'aic': -2 * log_likelihood + 2 * n_params,
+        'bic': -2 * log_likelihood + n_params * np.log(weights.sum())
+    }
+
+def survival_at(fit, times):
+    """Sobrevivência S(t) da distribuição ajustada, vetorizada para qualquer horizonte"""
+    t = np.asarray(times, dtype=float)
+    p = fit['params']
+    with np.errstate(divide='ignore'):
+        if fit['distribution'] == 'Weibull':
+            return np.exp(-(t / p['lambda_']) ** p['rho_'])
+        if fit['distribution'] == 'Exponencial':
+            return np.exp(-t / p['lambda_'])
+        if fit['distribution'] == 'Log-normal':
+            return stats.norm.sf((np.log(t) - p['mu_']) / p['sigma_'])
+        if fit['distribution'] == 'Log-logística':
+            return 1 / (1 + (t / p['alpha_']) ** p['beta_'])
+    raise ValueError(f"Distribuição não suportada: {fit['distribution']}")
+
+@st.cache_resource(show_spinner=False)
+def get_fit_executor():
+    """Pool de processos compartilhado para os ajustes paramétricos"""
+    # spawn: processos novos, sem herdar as threads do servidor do Streamlit
+    return ProcessPoolExecutor(max_workers=min(config.PARAMETRIC_WORKERS, os.cpu_count() or 1),
+                               mp_context=multiprocessing.get_context('spawn'))
+
+def fit_parametric_models(df, time_col, event_col):
+    """Ajusta as distribuições em paralelo e as ordena por AIC"""
+    df_surv = df[[time_col, event_col]].dropna()
+    # As distribuições paramétricas exigem tempos positivos
+    df_surv = df_surv[df_surv[time_col] > 0]
+
+    # Pares (tempo, evento) repetidos viram pesos: a verossimilhança é a mesma com muito menos linhas
+    pairs = df_surv.groupby([time_col, event_col], observed=True).size().reset_index(name='weight')
+    durations = pairs[time_col].to_numpy(dtype=float)
+    events = pairs[event_col].to_numpy(dtype=float)
+    weights = pairs['weight'].to_numpy(dtype=float)
+
+    executor = get_fit_executor()
+    futures = [executor.submit(_fit_distribution, name, durations, events, weights) for name in DISTRIBUTIONS]
+    fits = [future.result() for future in futures]
+
+    failed = {fit['distribution']: fit['error'] for fit in fits if 'error' in fit}
+    fits = sorted([fit for fit in fits if 'error' not in fit], key=lambda fit: fit['aic'])
+    return {
+        'fits': fits,
+        'failed': failed,
+        'n': len(df_surv),
+        'excluded_non_positive': int(len(df[[time_col, event_col]].dropna()) - len(df_surv))
+    }
+
+def get_parametric_models(df, time_col, event_col):
+    """Ajustes paramétricos com cache por (dataset, tempo, evento)"""
+    cache = st.session_state.setdefault('parametric_cache', {})
+    key = (get_dataset_fingerprint(df), time_col, event_col)
+    if key not in cache:
+        cache[key] = fit_parametric_models(df, time_col, event_col)
+    return cache[key]
+
+def ranking_table(fits):
+    """Tabela de comparação por AIC/BIC (ΔAIC em relação ao melhor ajuste)"""
+    table = pd.DataFrame([
+        {'Distribuição': fit['distribution'], 'Log-verossimilhança': fit['log_likelihood'],
+         'AIC': fit['aic'], 'BIC': fit['bic']}
+        for fit in fits
+    ])
+    table['ΔAIC'] = table['AIC'] - table['AIC'].min()
+    table['ΔBIC'] = table['BIC'] - table['BIC'].min()
+    return table.set_index('Distribuição')
+
+def extrapolation_table(fits, horizons):
+    """Sobrevivência prevista por cada distribuição nos horizontes pedidos"""
+    return pd.DataFrame(
+        {fit['distribution']: survival_at(fit, horizons) for fit in fits},
+        index=[f"{h:g}_dias" for h in horizons]
+    ).T
+
+def summarize_parametric(fitted, horizons):
+    """Resumo serializável dos ajustes paramétricos"""
+    fits = fitted['fits']
+    return {
+        'best_model_aic': fits[0]['distribution'] if fits else None,
+        'ranking': ranking_table(fits)[['AIC', 'BIC', 'ΔAIC']].round(2).to_dict(orient='index') if fits else {},
+        'parameters': {fit['distribution']: fit['params'] for fit in fits},
+        'extrapolation': extrapolation_table(fits, horizons).round(4).to_dict(orient='index') if fits else {},
+        'failed': fitted['failed'],
+        'n': fitted['n']
+    }
+
+def compute_parametric_results(df, params):
+    """Calcula os ajustes paramétricos sem renderizar a interface"""
+    fitted = fit_parametric_models(df, params['time_col'], params['event_col'])
+    return summarize_parametric(fitted, params['horizons'])
+
+def perform_parametric_analysis(df, time_col, event_col, kmf, horizons, n_overlay=3):
+    """Compara distribuições paramétricas e sobrepõe as melhores à curva KM"""
+    with st.spinner("Ajustando distribuições paramétricas em paralelo..."):
+        fitted = get_parametric_models(df, time_col, event_col)
+
+    fits = fitted['fits']
+    if not fits:
+        st.warning("Nenhuma distribuição paramétrica pôde ser ajustada.")
+        return {}
+
+    if fitted['excluded_non_positive']:
+        st.caption(f"{fitted['excluded_non_positive']:,} registros com tempo ≤ 0 foram excluídos dos ajustes.")
+    for name, error in fitted['failed'].items():
+        st.caption(f"⚠️ {name}: não convergiu ({error[:120]})")
+
+    st.markdown("**Comparação por critérios de informação (menor é melhor):**")
+    st.dataframe(ranking_table(fits).round(2), use_container_width=True)
+
+    plot_parametric_overlay(kmf, fits[:n_overlay], max(horizons))
+
+    st.markdown("**Sobrevivência extrapolada:**")
+    st.dataframe(extrapolation_table(fits, horizons).style.format('{:.2%}'), use_container_width=True)
+
+    return summarize_parametric(fitted, horizons)
+
+def plot_parametric_overlay(kmf, fits, horizon):
+    """Sobrepõe as curvas paramétricas à estimativa KM (decimada)"""
+    fig = build_survival_figure([km_curve(kmf)], 'Kaplan-Meier vs Modelos Paramétricos', show_ci=False)
+
+    grid = np.linspace(0, max(horizon, kmf.timeline.max()), config.SURVIVAL_PLOT_POINTS)[1:]
+    for fit in fits:
+        fig.add_trace(go.Scattergl(x=grid, y=survival_at(fit, grid), mode='lines',
+                                   line=dict(dash='dash'), name=fit['distribution']))
+    st.plotly_chart(fig, use_container_width=True)
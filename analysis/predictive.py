@@ -2,89 +2,379 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
-from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.ensemble import (RandomForestClassifier, RandomForestRegressor,
+                              HistGradientBoostingClassifier, HistGradientBoostingRegressor)
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import (classification_report, mean_squared_error, 
-                            r2_score, accuracy_score, confusion_matrix)
+from sklearn.metrics import mean_squared_error, r2_score, confusion_matrix
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.feature_selection import mutual_info_classif, mutual_info_regression
 from sklearn.impute import SimpleImputer
 from components.metrics import analysis_card
-from utils.plotting import plot_feature_importance, plot_mutual_info
+from analysis.evaluation import (evaluate_classifier, get_classification_evaluation, render_classification_evaluation,
+                                 summarize_evaluation)
+from utils.plotting import plot_feature_importance, plot_mutual_info, plot_permutation_importance
+from core.model_registry import get_dataset_fingerprint, save_model, load_model
+from core.sampling import get_population_df
+from core.cohort import active_cohort
+import config
 
-def perform_predictive_analysis(df, target_col):
+def predictive_settings():
+    """Widgets de configuração do modelo (fora do botão, para persistirem entre reruns)"""
+    engine = config.PREDICTIVE_ENGINES[st.selectbox("Algoritmo:", list(config.PREDICTIVE_ENGINES), key="pred_engine")]
+    test_size = st.slider("Tamanho do conjunto de teste:", 0.1, 0.5, 0.2, 0.05, key="pred_test_size")
+    random_state = st.number_input("Random state:", 0, 100, 42, key="pred_random_state")
+    if engine == 'hist_gradient_boosting':
+        n_estimators = st.slider("Máximo de iterações:", 50, 1000, config.HGB_MAX_ITER, 50, key="pred_max_iter")
+    else:
+        n_estimators = st.slider("Número de árvores:", 10, 200, 100, 10, key="pred_n_estimators")
+    max_depth = st.selectbox("Profundidade máxima:", [None, 5, 10, 20, 30], key="pred_max_depth")
+    
+    return {
+        'test_size': test_size,
+        'random_state': random_state,
+        'n_estimators': n_estimators,
+        'max_depth': max_depth,
+        'engine': engine
+    }
+
+def perform_predictive_analysis(df, target_col, params):
     """Realiza análise preditiva"""
     results = {}
+    engine, random_state = params['engine'], params['random_state']
     
-    # Configurações da análise
-    test_size = st.slider("Tamanho do conjunto de teste:", 0.1, 0.5, 0.2, 0.05)
-    random_state = st.number_input("Random state:", 0, 100, 42)
-    n_estimators = st.slider("Número de árvores:", 10, 200, 100, 10)
-    max_depth = st.selectbox("Profundidade máxima:", [None, 5, 10, 20, 30])
-    
-    # Preparação dos dados
+    # Preparação dos dados e treino
     with st.spinner("Preparando dados..."):
-        df_clean = df.dropna(subset=[target_col])
-        X = df_clean.drop(columns=[target_col])
-        y = df_clean[target_col]
-        
-        # Codificar variáveis categóricas
-        X_encoded, le_dict = encode_categorical_features(X)
-        
-        # Imputar e normalizar dados
-        X_processed = preprocess_features(X_encoded)
-        
-        # Dividir dados
-        X_train, X_test, y_train, y_test = split_data(X_processed, y, test_size, random_state)
+        fit = fit_predictive_model(df, target_col, **params)
     
-    # Treinar modelo
-    model, model_type = train_model(X_train, y_train, n_estimators, max_depth, random_state)
-    y_pred = model.predict(X_test)
+    model, model_type = fit['model'], fit['model_type']
+    y_test, y_pred = fit['y_test'], fit['y_pred']
     
     # Resultados
     if model_type == "Regressão":
         metrics = evaluate_regression(y_test, y_pred)
         plot_regression_results(y_test, y_pred)
     else:
-        metrics = evaluate_classification(y_test, y_pred)
+        metrics = classification_metrics(y_test, y_pred, fit['y_proba'], model.classes_)
+    
+    # Guarda o modelo ajustado e o conjunto de teste para análises posteriores
+    cache_fitted_model(fit, target_col, params, metrics, df)
+    
+    if model_type == "Classificação":
+        results['evaluation'] = summarize_evaluation(evaluate_classification())
         plot_classification_results(y_test, y_pred)
     
     # Feature importance
-    plot_feature_importance(model, X.columns)
-    plot_mutual_info(X_processed, y, X.columns, model_type, random_state)
+    plot_feature_importance(fit['feature_names'], fit['importances'])
+    if engine == 'hist_gradient_boosting':
+        # A informação mútua exige dados imputados, etapa que este algoritmo dispensa
+        st.caption(f"Parada antecipada em {model.n_iter_} iterações; importância calculada por permutação.")
+    else:
+        plot_mutual_info(fit['X_processed'], fit['y'], fit['feature_names'], model_type, random_state)
+    
+    results.update(summarize_predictive(fit, metrics))
+    results['params'] = params
+    
+    return results
+
+def cache_fitted_model(fit, target_col, params, metrics, df):
+    """Mantém na sessão o último modelo ajustado com seu conjunto de teste"""
+    st.session_state.predictive_model = {
+        'model': fit['model'],
+        'model_type': fit['model_type'],
+        'target_col': target_col,
+        'feature_names': list(fit['feature_names']),
+        'preprocessing': fit['preprocessing'],
+        'params': params,
+        'metrics': metrics,
+        'n_rows': len(df),
+        'dataset_fingerprint': get_dataset_fingerprint(df),
+        'X_test': fit['X_test'],
+        'y_test': fit['y_test'],
+        'y_pred': fit['y_pred'],
+        'y_proba': fit['y_proba']
+    }
+    st.session_state.permutation_cache = {}
+    st.session_state.evaluation_cache = {}
+
+def save_fitted_model():
+    """Salva no registro o último modelo treinado, com pré-processamento e metadados"""
+    fitted = st.session_state.predictive_model
+    bundle = {key: fitted[key] for key in ('model', 'model_type', 'feature_names', 'preprocessing')}
+    metadata = {key: fitted[key] for key in ('target_col', 'model_type', 'feature_names', 'params',
+                                             'metrics', 'n_rows', 'dataset_fingerprint')}
+    metadata['sample'] = fitted['n_rows'] < len(get_population_df())
+    metadata['cohort'] = active_cohort()[0]
+    model_id = save_model(bundle, metadata)
+    fitted['registry_id'] = model_id
+    return model_id
+
+def restore_registered_model(meta, df):
+    """Recarrega um modelo do registro e o avalia no dataset atual, sem retreinar"""
+    bundle = load_model(meta['id'])
+    target_col = meta['target_col']
+    missing = [col for col in meta['feature_names'] + [target_col] if col not in df.columns]
+    if missing:
+        raise ValueError(f"Colunas ausentes no dataset atual: {', '.join(missing)}")
     
-    results.update({
+    df_clean = df.dropna(subset=[target_col])
+    X = transform_features(df_clean, bundle['preprocessing'])
+    y = df_clean[target_col]
+    
+    # Mesmo dataset do treino: reconstrói o conjunto de teste original; senão, avalia em todos os dados
+    same_data = get_dataset_fingerprint(df) == meta['dataset_fingerprint']
+    if same_data:
+        _, X_eval, _, y_eval = split_data(X, y, meta['params']['test_size'], meta['params']['random_state'])
+    else:
+        X_eval, y_eval = X.reset_index(drop=True), y
+    
+    model = bundle['model']
+    y_pred = model.predict(X_eval)
+    y_proba = predict_probabilities(model, X_eval, bundle['model_type'])
+    if bundle['model_type'] == "Regressão":
+        metrics = regression_metrics(y_eval, y_pred)
+    else:
+        metrics = classification_metrics(y_eval, y_pred, y_proba, model.classes_)
+    
+    st.session_state.predictive_model = {
+        **{key: bundle[key] for key in ('model', 'model_type', 'feature_names', 'preprocessing')},
+        'target_col': target_col,
+        'params': meta['params'],
+        'metrics': metrics,
+        'n_rows': meta['n_rows'],
+        'dataset_fingerprint': meta['dataset_fingerprint'],
+        'registry_id': meta['id'],
+        'X_test': X_eval,
+        'y_test': y_eval,
+        'y_pred': y_pred,
+        'y_proba': y_proba
+    }
+    st.session_state.permutation_cache = {}
+    st.session_state.evaluation_cache = {}
+    return metrics, same_data
+
+def _permutation_scores(model, X, y, column, seeds):
+    """Score do modelo ao embaralhar uma coluna, para cada semente"""
+    # Cópia rasa: as demais colunas continuam compartilhadas com X; só a embaralhada é nova
+    X_permuted = X.copy(deep=False)
+    name = X.columns[column]
+    # take preserva o dtype (inclusive categórico, usado pelo HistGradientBoosting)
+    original = X[name].array
+    scores = []
+    for seed in seeds:
+        X_permuted[name] = original.take(np.random.default_rng(seed).permutation(len(original)))
+        scores.append(model.score(X_permuted, y))
+    return column, scores
+
+def compute_permutation_importance(model, X, y, feature_names, n_repeats=5, max_samples=None,
+                                   random_state=42, n_jobs=-1):
+    """Importância por permutação no conjunto de teste, em paralelo por variável e repetição"""
+    from joblib import Parallel, delayed, effective_n_jobs
+    
+    X = X.reset_index(drop=True)
+    y = np.asarray(y)
+    rng = np.random.default_rng(random_state)
+    
+    # Subamostra opcional de linhas para limitar o custo
+    if max_samples and len(X) > max_samples:
+        rows = np.sort(rng.choice(len(X), size=max_samples, replace=False))
+        X, y = X.iloc[rows].reset_index(drop=True), y[rows]
+    
+    baseline = model.score(X, y)
+    seeds = rng.integers(0, 2 ** 31 - 1, size=(X.shape[1], n_repeats))
+    
+    # Com poucas variáveis, as repetições são divididas entre os workers
+    workers = effective_n_jobs(n_jobs)
+    chunks = max(1, min(n_repeats, -(-workers // X.shape[1])))
+    tasks = [(column, seed_block)
+             for column in range(X.shape[1])
+             for seed_block in np.array_split(seeds[column], chunks)]
+    
+    # Threads: o modelo e os dados são compartilhados sem cópia entre os workers
+    outputs = Parallel(n_jobs=n_jobs, prefer='threads')(
+        delayed(_permutation_scores)(model, X, y, column, block) for column, block in tasks
+    )
+    
+    drops = [[] for _ in range(X.shape[1])]
+    for column, scores in outputs:
+        drops[column].extend(baseline - np.array(scores))
+    
+    return pd.DataFrame({
+        'feature': feature_names,
+        'importance_mean': [np.mean(d) for d in drops],
+        'importance_std': [np.std(d) for d in drops]
+    }).sort_values('importance_mean', ascending=False)
+
+def perform_permutation_importance(n_repeats, max_samples):
+    """Calcula (com cache) e exibe a importância por permutação do último modelo treinado"""
+    fitted = st.session_state.predictive_model
+    cache = st.session_state.setdefault('permutation_cache', {})
+    key = (n_repeats, max_samples)
+    
+    if key not in cache:
+        with st.spinner("Calculando importância por permutação..."):
+            cache[key] = compute_permutation_importance(
+                fitted['model'], fitted['X_test'], fitted['y_test'], fitted['feature_names'],
+                n_repeats=n_repeats, max_samples=max_samples
+            )
+    
+    importance = cache[key]
+    plot_permutation_importance(importance)
+    return importance
+
+def fit_predictive_model(df, target_col, test_size, random_state, n_estimators, max_depth,
+                         engine='random_forest'):
+    """Prepara os dados, treina o modelo e gera predições no conjunto de teste"""
+    df_clean = df.dropna(subset=[target_col])
+    X = df_clean.drop(columns=[target_col])
+    y = df_clean[target_col]
+    
+    preprocessing = {'engine': engine, 'feature_names': list(X.columns)}
+    if engine == 'hist_gradient_boosting':
+        # Ausentes e categorias são tratados pelo próprio modelo
+        X_processed, preprocessing['categories'] = prepare_native_features(X)
+    else:
+        # Codificar variáveis categóricas
+        X_encoded, le_dict = encode_categorical_features(X)
+        
+        # Imputar e normalizar dados
+        X_processed, imputer, scaler = preprocess_features(X_encoded)
+        preprocessing.update({'encoders': le_dict, 'imputer': imputer, 'scaler': scaler})
+    
+    # Dividir dados
+    X_train, X_test, y_train, y_test = split_data(X_processed, y, test_size, random_state)
+    
+    # Treinar modelo
+    model, model_type = train_model(X_train, y_train, n_estimators, max_depth, random_state, engine)
+    
+    if hasattr(model, 'feature_importances_'):
+        importances = model.feature_importances_
+    else:
+        # O HistGradientBoosting não tem importância por impureza
+        importances = compute_permutation_importance(
+            model, X_test, y_test, X.columns, n_repeats=config.PERMUTATION_N_REPEATS,
+            max_samples=config.PERMUTATION_MAX_SAMPLES, random_state=random_state
+        ).set_index('feature')['importance_mean'].reindex(X.columns).to_numpy()
+    
+    return {
+        'model': model,
         'model_type': model_type,
+        'feature_names': X.columns,
+        'importances': importances,
+        'preprocessing': preprocessing,
+        'X_processed': X_processed,
+        'y': y,
+        'X_test': X_test,
+        'y_test': y_test,
+        'y_pred': model.predict(X_test),
+        'y_proba': predict_probabilities(model, X_test, model_type)
+    }
+
+def predict_probabilities(model, X, model_type):
+    """Probabilidades por classe (colunas na ordem de model.classes_); None na regressão"""
+    if model_type == "Classificação" and hasattr(model, 'predict_proba'):
+        return model.predict_proba(X)
+    return None
+
+def summarize_predictive(fit, metrics):
+    """Monta o dicionário de resultados da análise preditiva"""
+    return {
+        'model_type': fit['model_type'],
         'metrics': metrics,
         'feature_importance': pd.DataFrame({
-            'feature': X.columns,
-            'importance': model.feature_importances_
+            'feature': fit['feature_names'],
+            'importance': fit['importances']
         }).sort_values('importance', ascending=False).to_dict(),
-        'predictions_made': len(y_pred)
-    })
+        'predictions_made': len(fit['y_pred']),
+        'iterations': getattr(fit['model'], 'n_iter_', None)
+    }
+
+def compute_predictive_results(df, target_col, params):
+    """Calcula os resultados preditivos sem renderizar a interface"""
+    fit = fit_predictive_model(df, target_col, **params)
+    if fit['model_type'] == "Regressão":
+        metrics = regression_metrics(fit['y_test'], fit['y_pred'])
+        evaluation = None
+    else:
+        evaluation = evaluate_classifier(fit['y_test'], fit['y_pred'], fit['y_proba'], fit['model'].classes_,
+                                         random_state=params['random_state'])
+        metrics = evaluation['metrics']
     
+    results = summarize_predictive(fit, metrics)
+    results['params'] = params
+    if evaluation is not None:
+        results['evaluation'] = summarize_evaluation(evaluation)
     return results
 
 def encode_categorical_features(X):
     """Codifica features categóricas"""
     le_dict = {}
-    for col in X.select_dtypes(include=['object']).columns:
+    # Datas viram número de dias desde 1970 para entrar no modelo
+    for col in X.select_dtypes(include=['datetime']).columns:
+        X[col] = (X[col] - pd.Timestamp(0)).dt.days
+    
+    for col in X.select_dtypes(include=['object', 'category']).columns:
         le = LabelEncoder()
         X[col] = le.fit_transform(X[col].astype(str))
         le_dict[col] = le
     return X, le_dict
 
+def prepare_native_features(X):
+    """Prepara features para o HistGradientBoosting (mantém ausentes, sem normalização)"""
+    X = X.copy()
+    for col in X.select_dtypes(include=['datetime']).columns:
+        X[col] = (X[col] - pd.Timestamp(0)).dt.days
+    for col in X.select_dtypes(include=['bool']).columns:
+        X[col] = X[col].astype(np.int8)
+    
+    categories = {}
+    for col in X.select_dtypes(include=['object', 'category']).columns:
+        categorical = X[col].astype('category')
+        categories[col] = categorical.cat.categories
+        X[col] = _native_category(categorical, len(categories[col]) <= config.HGB_MAX_CATEGORIES)
+    return X, categories
+
+def _native_category(categorical, native):
+    """Mantém a coluna categórica ou, em alta cardinalidade, usa códigos ordinais com ausentes"""
+    if native:
+        return categorical
+    return categorical.cat.codes.astype(float).replace(-1, np.nan)
+
+def transform_features(X, preprocessing):
+    """Aplica o pré-processamento ajustado no treino a novos dados"""
+    X = X[preprocessing['feature_names']].copy()
+    for col in X.select_dtypes(include=['datetime']).columns:
+        X[col] = (X[col] - pd.Timestamp(0)).dt.days
+    
+    if preprocessing['engine'] == 'hist_gradient_boosting':
+        for col in X.select_dtypes(include=['bool']).columns:
+            X[col] = X[col].astype(np.int8)
+        for col, categories in preprocessing['categories'].items():
+            categorical = X[col].astype(pd.CategoricalDtype(categories))
+            X[col] = _native_category(categorical, len(categories) <= config.HGB_MAX_CATEGORIES)
+        return X
+    
+    # Categorias não vistas no treino recebem código -1
+    for col, le in preprocessing['encoders'].items():
+        X[col] = pd.Categorical(X[col].astype(str), categories=le.classes_).codes
+    X_processed = pd.DataFrame(preprocessing['imputer'].transform(X), columns=X.columns)
+    scaler = preprocessing['scaler']
+    if scaler is not None:
+        scaled = list(scaler.feature_names_in_)
+        X_processed[scaled] = scaler.transform(X_processed[scaled])
+    return X_processed
+
 def preprocess_features(X):
     """Preprocessa features (imputação e normalização)"""
     imputer = SimpleImputer(strategy='median')
     X_imputed = pd.DataFrame(imputer.fit_transform(X), columns=X.columns)
     
+    scaler = None
     numeric_cols = X.select_dtypes(include=[np.number]).columns
     if len(numeric_cols) > 0:
         scaler = StandardScaler()
         X_imputed[numeric_cols] = scaler.fit_transform(X_imputed[numeric_cols])
     
-    return X_imputed
+    return X_imputed, imputer, scaler
 
 def split_data(X, y, test_size, random_state):
     """Divide dados em treino e teste"""
@@ -92,9 +382,18 @@ def split_data(X, y, test_size, random_state):
         X, y, test_size=test_size, random_state=random_state
     )
 
-def train_model(X_train, y_train, n_estimators, max_depth, random_state):
-    """Treina modelo RandomForest apropriado"""
-    if pd.api.types.is_numeric_dtype(y_train):
+def is_classification_target(y):
+    """Alvo categórico ou desfecho binário 0/1 (modelos de risco) é tratado como classificação"""
+    if not pd.api.types.is_numeric_dtype(y) or pd.api.types.is_bool_dtype(y):
+        return True
+    return set(pd.unique(y.dropna())) <= {0, 1}
+
+def train_model(X_train, y_train, n_estimators, max_depth, random_state, engine='random_forest'):
+    """Treina modelo RandomForest ou HistGradientBoosting apropriado"""
+    if engine == 'hist_gradient_boosting':
+        return train_hist_gradient_boosting(X_train, y_train, n_estimators, max_depth, random_state)
+    
+    if not is_classification_target(y_train):
         model = RandomForestRegressor(n_estimators=n_estimators, 
                                     max_depth=max_depth, 
                                     random_state=random_state)
@@ -108,41 +407,60 @@ def train_model(X_train, y_train, n_estimators, max_depth, random_state):
     model.fit(X_train, y_train)
     return model, model_type
 
-def evaluate_regression(y_test, y_pred):
-    """Avalia modelo de regressão"""
-    mse = mean_squared_error(y_test, y_pred)
-    rmse = np.sqrt(mse)
-    r2 = r2_score(y_test, y_pred)
-    mae = np.mean(np.abs(y_test - y_pred))
+def train_hist_gradient_boosting(X_train, y_train, max_iter, max_depth, random_state):
+    """Treina HistGradientBoosting com categorias nativas e parada antecipada (multithread via OpenMP)"""
+    params = {
+        'max_iter': max_iter,
+        'max_depth': max_depth,
+        'learning_rate': config.HGB_LEARNING_RATE,
+        'categorical_features': 'from_dtype',
+        'early_stopping': True,
+        'validation_fraction': config.HGB_VALIDATION_FRACTION,
+        'n_iter_no_change': config.HGB_N_ITER_NO_CHANGE,
+        'random_state': random_state
+    }
+    if not is_classification_target(y_train):
+        model = HistGradientBoostingRegressor(**params)
+        model_type = "Regressão"
+    else:
+        model = HistGradientBoostingClassifier(**params)
+        model_type = "Classificação"
     
-    col1, col2, col3 = st.columns(3)
-    col1.metric("R² Score", f"{r2:.3f}")
-    col2.metric("RMSE", f"{rmse:.3f}")
-    col3.metric("MAE", f"{mae:.3f}")
+    model.fit(X_train, y_train)
+    return model, model_type
+
+def regression_metrics(y_test, y_pred):
+    """Calcula métricas de regressão"""
+    mse = mean_squared_error(y_test, y_pred)
     
     return {
-        'r2': r2,
-        'rmse': rmse,
-        'mae': mae
+        'r2': r2_score(y_test, y_pred),
+        'rmse': np.sqrt(mse),
+        'mae': np.mean(np.abs(y_test - y_pred))
     }
 
-def evaluate_classification(y_test, y_pred):
-    """Avalia modelo de classificação"""
-    accuracy = accuracy_score(y_test, y_pred)
-    report = classification_report(y_test, y_pred, output_dict=True)
+def evaluate_regression(y_test, y_pred):
+    """Avalia modelo de regressão"""
+    metrics = regression_metrics(y_test, y_pred)
     
-    col1, col2, col3, col4 = st.columns(4)
-    col1.metric("Acurácia", f"{accuracy:.3f}")
-    col2.metric("Precisão", f"{report['weighted avg']['precision']:.3f}")
-    col3.metric("Recall", f"{report['weighted avg']['recall']:.3f}")
-    col4.metric("F1-Score", f"{report['weighted avg']['f1-score']:.3f}")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("R² Score", f"{metrics['r2']:.3f}")
+    col2.metric("RMSE", f"{metrics['rmse']:.3f}")
+    col3.metric("MAE", f"{metrics['mae']:.3f}")
     
-    return {
-        'accuracy': accuracy,
-        'precision': report['weighted avg']['precision'],
-        'recall': report['weighted avg']['recall'],
-        'f1': report['weighted avg']['f1-score']
-    }
+    return metrics
+
+def classification_metrics(y_test, y_pred, y_proba=None, classes=None):
+    """Calcula métricas de classificação (com AUC, precisão média, Brier e calibração se houver probabilidades)"""
+    if classes is None:
+        classes = np.union1d(np.asarray(y_test), np.asarray(y_pred))
+    return evaluate_classifier(y_test, y_pred, y_proba, classes, n_bootstrap=0)['metrics']
+
+def evaluate_classification(n_bootstrap=config.EVAL_BOOTSTRAP_SAMPLES, ci_level=config.EVAL_CI_LEVEL):
+    """Avalia o último modelo de classificação: métricas com IC por bootstrap, curvas ROC/PR e calibração"""
+    evaluation = get_classification_evaluation(n_bootstrap, ci_level)
+    render_classification_evaluation(evaluation)
+    return evaluation
 
 def plot_regression_results(y_test, y_pred):
     """Plota resultados de regressão"""
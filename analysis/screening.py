@@ -0,0 +1,308 @@
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+from scipy import stats
+
+from components.metrics import analysis_card
+from core.model_registry import get_dataset_fingerprint
+from core.schema import build_schema, get_schema
+import config
+
+NUMERIC_TESTS = ('Mann-Whitney', 't de Welch')
+
+def welch_t_test(X, groups):
+    """Teste t de Welch em todas as colunas de X de uma vez (ausentes ignorados por coluna)"""
+    observed = ~np.isnan(X)
+    filled = np.where(observed, X, 0.0)
+    counts = observed.sum(axis=0)
+    # Somas por grupo como produtos matriciais; centrar na média evita cancelamento numérico
+    centered = np.where(observed, filled - filled.sum(axis=0) / np.maximum(counts, 1), 0.0)
+    G = np.stack([groups == 1, groups == 0], axis=1).astype(float)
+    n = G.T @ observed.astype(float)
+    sums = G.T @ centered
+    squares = G.T @ centered ** 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = sums / n
+        var = (squares - sums * mean) / (n - 1)
+        se2 = var[0] / n[0] + var[1] / n[1]
+        t = (mean[0] - mean[1]) / np.sqrt(se2)
+        dof = se2 ** 2 / ((var[0] / n[0]) ** 2 / (n[0] - 1) + (var[1] / n[1]) ** 2 / (n[1] - 1))
+        p = 2 * stats.t.sf(np.abs(t), dof)
+    valid = (n[0] >= 2) & (n[1] >= 2)
+    return (np.where(valid, t, np.nan), np.where(valid, dof, np.nan), np.where(valid, p, np.nan),
+            (n[0] + n[1]).astype(int))
+
+def _sorted_observed(values):
+    """Valores ordenados sem ausentes (np.sort deixa NaN no fim)"""
+    values = np.sort(values)
+    return values[:np.searchsorted(values, np.nan)] if len(values) and np.isnan(values[-1]) else values
+
+def mann_whitney_u(values, first):
+    """Estatística U, termo de empates Σ(t³ - t) e tamanhos dos grupos de uma coluna"""
+    a, b = _sorted_observed(values[first]), _sorted_observed(values[~first])
+    n1 = len(a)
+    if n1 == 0 or len(b) == 0:
+        return np.nan, 0.0, n1, len(b)
+
+    # Ordenação estável (timsort) funde as duas sequências já ordenadas em tempo linear
+    combined = np.concatenate((a, b))
+    order = np.argsort(combined, kind='stable')
+    merged = combined[order]
+    starts = np.flatnonzero(np.concatenate(([True], merged[1:] != merged[:-1])))
+    ends = np.append(starts[1:], len(merged))
+    runs = (ends - starts).astype(float)
+
+    # Posto médio de cada grupo de empates vezes quantos valores do primeiro grupo ele contém
+    in_first = np.add.reduceat((order < n1).astype(float), starts)
+    rank_sum = ((starts + ends + 1) / 2) @ in_first
+    return float(rank_sum - n1 * (n1 + 1) / 2), float((runs ** 3 - runs).sum()), n1, len(b)
+
+def mann_whitney_test(X, groups):
+    """Mann-Whitney (aproximação normal com correção de empates e de continuidade) em todas as colunas"""
+    first = groups == 1
+    u, ties, n1, n0 = np.array([mann_whitney_u(X[:, j], first) for j in range(X.shape[1])]).reshape(-1, 4).T
+    n = n1 + n0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma = np.sqrt(n1 * n0 / 12 * ((n + 1) - ties / (n * (n - 1))))
+        z = (np.abs(u - n1 * n0 / 2) - 0.5) / sigma
+        p = np.minimum(2 * stats.norm.sf(z), 1.0)
+    valid = (n1 >= 1) & (n0 >= 1) & (sigma > 0)
+    return np.where(valid, u, np.nan), np.where(valid, p, np.nan), n.astype(int)
+
+def categorical_test(codes, y):
+    """Qui-quadrado da tabela níveis x desfecho; Fisher exato em tabelas 2x2 com esperados pequenos"""
+    valid = codes >= 0
+    codes, y = codes[valid], y[valid]
+    table = np.bincount(codes * 2 + y, minlength=2 * (codes.max() + 1 if len(codes) else 1)).reshape(-1, 2)
+    table = table[table.sum(axis=1) > 0]
+    n = int(table.sum())
+    if table.shape[0] < 2 or (table.sum(axis=0) == 0).any():
+        return {'teste': 'Qui-quadrado', 'estatistica': np.nan, 'gl': np.nan, 'p_valor': np.nan, 'n': n}
+
+    expected = stats.contingency.expected_freq(table)
+    if table.shape == (2, 2) and expected.min() < config.SCREENING_FISHER_MIN_EXPECTED:
+        odds_ratio, p = stats.fisher_exact(table)
+        return {'teste': 'Fisher exato', 'estatistica': odds_ratio, 'gl': np.nan, 'p_valor': p, 'n': n}
+    chi2, p, dof, _ = stats.chi2_contingency(table, correction=False)
+    return {'teste': 'Qui-quadrado', 'estatistica': chi2, 'gl': dof, 'p_valor': p, 'n': n}
+
+def logrank_test(codes, time_idx, event, n_times):
+    """Log-rank para k grupos com um índice de tempos compartilhado (contagens por tempo x grupo)"""
+    valid = codes >= 0
+    if not valid.all():
+        codes, time_idx, event = codes[valid], time_idx[valid], event[valid]
+    # Renumera os grupos presentes após descartar ausentes (sem ordenar as linhas)
+    present = np.bincount(codes) > 0 if len(codes) else np.zeros(0, dtype=bool)
+    codes = (np.cumsum(present) - 1)[codes]
+    k = int(present.sum())
+    if k < 2:
+        return {'teste': 'Log-rank', 'estatistica': np.nan, 'gl': np.nan, 'p_valor': np.nan, 'n': len(codes)}
+
+    cells = time_idx * k + codes
+    removed = np.bincount(cells, minlength=n_times * k).reshape(n_times, k)
+    deaths = np.bincount(cells, weights=event, minlength=n_times * k).reshape(n_times, k)
+    at_risk = removed[::-1].cumsum(axis=0)[::-1].astype(float)
+
+    n_t, d_t = at_risk.sum(axis=1), deaths.sum(axis=1)
+    use = (d_t > 0) & (n_t > 0)
+    at_risk, n_t, d_t = at_risk[use], n_t[use], d_t[use]
+
+    expected = ((d_t / n_t)[:, None] * at_risk).sum(axis=0)
+    diff = deaths.sum(axis=0) - expected
+    c = np.where(n_t > 1, d_t * (n_t - d_t) / np.maximum(n_t - 1, 1), 0.0)
+    variance = np.diag((c / n_t) @ at_risk) - (at_risk * (c / n_t ** 2)[:, None]).T @ at_risk
+
+    statistic = float(diff[:-1] @ np.linalg.lstsq(variance[:-1, :-1], diff[:-1], rcond=None)[0])
+    return {'teste': 'Log-rank', 'estatistica': statistic, 'gl': k - 1,
+            'p_valor': float(stats.chi2.sf(statistic, k - 1)), 'n': len(codes)}
+
+def screen_block(block, outcome, numeric_test):
+    """Testa um bloco de colunas contra o desfecho (executado em um processo separado)"""
+    rows = []
+    names, X = block['numeric']
+    if outcome['mode'] == 'binary':
+        y = outcome['y']
+        if names and numeric_test == 't de Welch':
+            t, dof, p, n = welch_t_test(X, y)
+            rows += [{'variavel': name, 'tipo': 'numérica', 'teste': 't de Welch', 'estatistica': t[j],
+                      'gl': dof[j], 'p_valor': p[j], 'n': int(n[j])} for j, name in enumerate(names)]
+        elif names:
+            u, p, n = mann_whitney_test(X, y)
+            rows += [{'variavel': name, 'tipo': 'numérica', 'teste': 'Mann-Whitney', 'estatistica': u[j],
+                      'gl': np.nan, 'p_valor': p[j], 'n': int(n[j])} for j, name in enumerate(names)]
+        for name, codes in block['categorical']:
+            rows.append({'variavel': name, 'tipo': 'categórica', **categorical_test(codes, y)})
+        return rows
+
+    time_idx, event, n_times = outcome['time_idx'], outcome['event'], outcome['n_times']
+    # Numéricas entram no log-rank divididas pela mediana
+    for j, name in enumerate(names):
+        values = X[:, j]
+        codes = np.where(np.isnan(values), -1, values > np.nanmedian(values)) if not np.isnan(values).all() \
+            else np.full(len(values), -1)
+        rows.append({'variavel': name, 'tipo': 'numérica (mediana)',
+                     **logrank_test(codes.astype(np.int64), time_idx, event, n_times)})
+    for name, codes in block['categorical']:
+        rows.append({'variavel': name, 'tipo': 'categórica', **logrank_test(codes, time_idx, event, n_times)})
+    return rows
+
+def benjamini_hochberg(p_values):
+    """Valores q de Benjamini-Hochberg (testes sem p-valor ficam de fora da correção)"""
+    p_values = np.asarray(p_values, dtype=float)
+    q = np.full_like(p_values, np.nan)
+    valid = ~np.isnan(p_values)
+    if valid.any():
+        q[valid] = stats.false_discovery_control(p_values[valid], method='bh')
+    return q
+
+def screening_columns(schema, exclude):
+    """Colunas candidatas: numéricas e categóricas (até SCREENING_MAX_LEVELS níveis), sem ids e datas"""
+    candidates = schema[~schema['id'].astype(bool) & ~schema['date'].astype(bool) & ~schema.index.isin(exclude)]
+    numeric = candidates.index[candidates['kind'] == 'numeric'].tolist()
+    categorical = candidates.index[candidates['kind'].isin(['binary', 'categorical'])
+                                   & (candidates['n_unique'] <= config.SCREENING_MAX_LEVELS)].tolist()
+    skipped = [col for col in candidates.index if col not in numeric and col not in categorical]
+    return numeric, categorical, skipped
+
+def prepare_outcome(df, params):
+    """Desfecho codificado e as linhas válidas (sem ausentes no desfecho)"""
+    if params['mode'] == 'binary':
+        y = df[params['event_col']]
+        valid = y.notna().to_numpy()
+        return {'mode': 'binary', 'y': y.to_numpy(dtype=float, na_value=np.nan)[valid].astype(np.int64)}, valid
+
+    times, events = df[params['time_col']], df[params['event_col']]
+    valid = (times.notna() & events.notna()).to_numpy()
+    _, time_idx = np.unique(times.to_numpy(dtype=float, na_value=np.nan)[valid], return_inverse=True)
+    return {
+        'mode': 'survival',
+        'time_idx': time_idx.ravel(),
+        'event': events.to_numpy(dtype=float, na_value=np.nan)[valid],
+        'n_times': int(time_idx.max()) + 1 if len(time_idx) else 0
+    }, valid
+
+def _category_codes(series):
+    """Códigos inteiros dos níveis (-1 para ausentes), sem comparar textos quando já é categórica"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(dtype=np.int64)
+    return pd.factorize(series, sort=True)[0].astype(np.int64)
+
+def iter_blocks(df, numeric, categorical, valid, block_cells=config.SCREENING_BLOCK_CELLS):
+    """Blocos de trabalho já codificados (matriz numérica + códigos), com memória limitada por bloco"""
+    rows = None if valid.all() else np.flatnonzero(valid)
+    take = (lambda values: values) if rows is None else (lambda values: values[rows])
+    n_rows = int(valid.sum())
+    width = max(1, block_cells // max(n_rows, 1))
+
+    for start in range(0, len(numeric), width):
+        names = numeric[start:start + width]
+        # Ordem Fortran: cada coluna contígua na memória, como as reduções e ordenações a percorrem
+        X = np.empty((n_rows, len(names)), order='F')
+        for j, col in enumerate(names):
+            X[:, j] = take(df[col].to_numpy(dtype=float, na_value=np.nan))
+        yield {'numeric': (names, X), 'categorical': []}
+    for start in range(0, len(categorical), width):
+        yield {'numeric': ([], np.empty((n_rows, 0))),
+               'categorical': [(col, take(_category_codes(df[col]))) for col in categorical[start:start + width]]}
+
+@st.cache_resource(show_spinner=False)
+def get_screening_executor():
+    """Pool de processos compartilhado para a triagem"""
+    # spawn: processos novos, sem herdar as threads do servidor do Streamlit
+    return ProcessPoolExecutor(max_workers=min(config.SCREENING_WORKERS, os.cpu_count() or 1),
+                               mp_context=multiprocessing.get_context('spawn'))
+
+def run_screening(df, params, schema):
+    """Testa todas as variáveis candidatas contra o desfecho e corrige por Benjamini-Hochberg"""
+    outcome_cols = [params['event_col']] + ([params['time_col']] if params['mode'] == 'survival' else [])
+    numeric, categorical, skipped = screening_columns(schema, outcome_cols)
+    outcome, valid = prepare_outcome(df, params)
+
+    # Bases pequenas: o custo de iniciar processos supera o ganho
+    workers = min(config.SCREENING_WORKERS, os.cpu_count() or 1)
+    cells = int(valid.sum()) * (len(numeric) + len(categorical))
+    blocks = iter_blocks(df, numeric, categorical, valid)
+
+    rows = []
+    if workers > 1 and cells >= config.SCREENING_PARALLEL_MIN_CELLS:
+        # No máximo dois blocos por processo em trânsito, para não acumular cópias em memória
+        executor, pending = get_screening_executor(), deque()
+        for block in blocks:
+            pending.append(executor.submit(screen_block, block, outcome, params['numeric_test']))
+            if len(pending) >= 2 * workers:
+                rows += pending.popleft().result()
+        while pending:
+            rows += pending.popleft().result()
+    else:
+        for block in blocks:
+            rows += screen_block(block, outcome, params['numeric_test'])
+
+    table = pd.DataFrame(rows, columns=['variavel', 'tipo', 'teste', 'estatistica', 'gl', 'n', 'p_valor'])
+    table['q_valor'] = benjamini_hochberg(table['p_valor'])
+    table = table.sort_values(['q_valor', 'p_valor'], na_position='last').reset_index(drop=True)
+    return {'table': table, 'skipped': skipped, 'n_rows': int(valid.sum())}
+
+def get_screening(df, params):
+    """Triagem com cache por (dataset, desfecho, teste numérico)"""
+    cache = st.session_state.setdefault('screening_cache', {})
+    key = (get_dataset_fingerprint(df), tuple(sorted(params.items())))
+    if key not in cache:
+        cache[key] = run_screening(df, params, get_schema(df))
+    return cache[key]
+
+def summarize_screening(screening, params):
+    """Resumo serializável da triagem"""
+    table = screening['table']
+    alpha = params.get('alpha', config.SCREENING_ALPHA)
+    significant = table[table['q_valor'] < alpha]
+    top = significant.head(config.SCREENING_TOP)[['variavel', 'teste', 'p_valor', 'q_valor']]
+    return {
+        'outcome': params['event_col'] if params['mode'] == 'binary' else f"{params['time_col']} / {params['event_col']}",
+        'mode': params['mode'],
+        'alpha': alpha,
+        'n_tested': int(table['p_valor'].notna().sum()),
+        'n_significant': len(significant),
+        'significant': top.round(6).to_dict(orient='records'),
+        'skipped': screening['skipped'],
+        'n_rows': screening['n_rows']
+    }
+
+def compute_screening_results(df, params):
+    """Calcula a triagem sem renderizar a interface"""
+    return summarize_screening(run_screening(df, params, build_schema(df)), params)
+
+def perform_screening_analysis(df, params):
+    """Exibe a triagem univariada: tabela com p e q (BH) e as variáveis mais associadas"""
+    with st.spinner("Testando todas as variáveis contra o desfecho..."):
+        screening = get_screening(df, params)
+    summary = summarize_screening(screening, params)
+    table = screening['table']
+
+    analysis_card("🔬 Triagem Univariada", f"""
+    - **Desfecho:** {summary['outcome']} ({summary['n_rows']:,} registros)
+    - **Variáveis testadas:** {summary['n_tested']}
+    - **Significativas após FDR (q < {summary['alpha']}):** {summary['n_significant']}
+    """)
+
+    top = table.dropna(subset=['q_valor']).head(config.SCREENING_TOP)
+    if not top.empty:
+        fig = px.bar(top.assign(score=-np.log10(top['q_valor'].clip(lower=1e-300))), x='score', y='variavel',
+                     orientation='h', color='teste',
+                     labels={'score': '-log10(q)', 'variavel': 'Variável', 'teste': 'Teste'},
+                     title='Variáveis mais associadas ao desfecho')
+        fig.add_vline(x=-np.log10(summary['alpha']), line_dash='dash')
+        fig.update_yaxes(autorange='reversed')
+        st.plotly_chart(fig, use_container_width=True)
+
+    st.dataframe(table.style.format({'estatistica': '{:.3f}', 'gl': '{:.0f}', 'p_valor': '{:.2e}', 'q_valor': '{:.2e}'},
+                                    na_rep='—'), use_container_width=True)
+    if summary['skipped']:
+        st.caption(f"Não testadas (texto livre ou mais de {config.SCREENING_MAX_LEVELS} níveis): "
+                   f"{', '.join(summary['skipped'])}")
+    return summary
@@ -1,14 +1,46 @@
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
 from lifelines import KaplanMeierFitter
 from lifelines.statistics import logrank_test
 from components.metrics import analysis_card
+from utils.plotting import km_curve, plot_survival_curves
+from config import COLOR_SECONDARY
+
+SURVIVAL_TIMES = [30, 90, 180, 365]
 
 def perform_survival_analysis(df, time_col, event_col):
     """Realiza análise de sobrevivência"""
-    results = {}
+    kmf, results = fit_survival(df, time_col, event_col)
+    
+    # Plotar curva de sobrevivência
+    plot_survival_curve(kmf)
+    
+    median_survival = results['median_survival']
+    survival_values = list(results['survival_probabilities'].values())
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        stats_content = f"""
+        <div style="line-height: 1.6;">
+            <p><strong style="color: {COLOR_SECONDARY};">Tempo mediano de sobrevivência:</strong> 
+               <span style="font-weight: bold;">{median_survival:.1f} dias</span></p>
+            
+            <p style="margin-top: 15px;"><strong style="color: {COLOR_SECONDARY};">Probabilidade de sobrevivência:</strong></p>
+            <ul style="margin-top: 5px; padding-left: 20px;">
+                <li style="margin-bottom: 5px;">30 dias: <strong>{survival_values[0]:.2%}</strong></li>
+                <li style="margin-bottom: 5px;">90 dias: <strong>{survival_values[1]:.2%}</strong></li>
+                <li style="margin-bottom: 5px;">180 dias: <strong>{survival_values[2]:.2%}</strong></li>
+                <li>365 dias: <strong>{survival_values[3]:.2%}</strong></li>
+            </ul>
+        </div>
+        """
+        analysis_card("📌 Estatísticas de Sobrevivência", stats_content)
     
+    return results
+
+def fit_survival(df, time_col, event_col):
+    """Ajusta o Kaplan-Meier e calcula o resumo sem renderizar a interface"""
     # Filtrar dados válidos
     df_surv = df[[time_col, event_col]].dropna()
     
@@ -16,112 +48,54 @@ def perform_survival_analysis(df, time_col, event_col):
     kmf = KaplanMeierFitter()
     kmf.fit(df_surv[time_col], df_surv[event_col])
     
-    # Plotar curva de sobrevivência
-    plot_survival_curve(kmf)
-    
     # Estatísticas resumidas
-    median_survival = kmf.median_survival_time_
-    survival_at_times = kmf.survival_function_at_times([30, 90, 180, 365])
+    survival_at_times = kmf.survival_function_at_times(SURVIVAL_TIMES)
     
     # Corrigir o acesso aos valores de sobrevivência
     survival_values = survival_at_times.values.flatten()  # Converte para array 1D
+    num_events = df_surv[event_col].sum()
     
-    col1, col2 = st.columns(2)
+    # Intervalos de confiança de 95% nos mesmos tempos
+    ci = kmf.confidence_interval_survival_function_.asof(SURVIVAL_TIMES).values
     
-    with col1:
-        stats_content = f"""
-        - **Tempo mediano de sobrevivência:** {median_survival:.1f} dias
-        - **Probabilidade de sobrevivência:**
-          - 30 dias: {survival_values[0]:.2%}
-          - 90 dias: {survival_values[1]:.2%}
-          - 180 dias: {survival_values[2]:.2%}
-          - 365 dias: {survival_values[3]:.2%}
-        """
-        analysis_card("📌 Estatísticas de Sobrevivência", stats_content)
-    
-    # ... (restante do código permanece igual)
-    
-    results.update({
-        'median_survival': median_survival,
+    results = {
+        'median_survival': kmf.median_survival_time_,
         'survival_probabilities': {
-            '30_dias': survival_values[0],
-            '90_dias': survival_values[1],
-            '180_dias': survival_values[2],
-            '365_dias': survival_values[3]
+            f'{t}_dias': value for t, value in zip(SURVIVAL_TIMES, survival_values)
+        },
+        'survival_probabilities_ci': {
+            f'{t}_dias': (lower, upper) for t, (lower, upper) in zip(SURVIVAL_TIMES, ci)
         },
-        'num_events': df_surv[event_col].sum(),
-        'num_censored': len(df_surv) - df_surv[event_col].sum()
-    })
+        'num_events': num_events,
+        'num_censored': len(df_surv) - num_events
+    }
     
-    return results
+    return kmf, results
+
+def compute_survival_results(df, time_col, event_col):
+    """Calcula os resultados de sobrevivência sem renderizar a interface"""
+    return fit_survival(df, time_col, event_col)[1]
 
 def plot_survival_curve(kmf):
     """Plota curva de sobrevivência"""
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=kmf.timeline,
-        y=kmf.survival_function_['KM_estimate'],
-        mode='lines',
-        name='Estimativa KM'
-    ))
-    
-    fig.add_trace(go.Scatter(
-        x=kmf.timeline,
-        y=kmf.confidence_interval_['KM_estimate_lower_0.95'],
-        fill=None,
-        mode='lines',
-        line=dict(width=0),
-        showlegend=False
-    ))
-    
-    fig.add_trace(go.Scatter(
-        x=kmf.timeline,
-        y=kmf.confidence_interval_['KM_estimate_upper_0.95'],
-        fill='tonexty',
-        mode='lines',
-        line=dict(width=0),
-        name='IC 95%'
-    ))
-    
-    fig.update_layout(
-        title='Curva de Sobrevivência (Kaplan-Meier)',
-        xaxis_title='Tempo',
-        yaxis_title='Probabilidade de Sobrevivência',
-        hovermode='x'
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
+    plot_survival_curves([km_curve(kmf, 'Estimativa KM')], 'Curva de Sobrevivência (Kaplan-Meier)')
 
-def compare_survival_groups(df, time_col, event_col, group_col):
-    """Compara sobrevivência entre grupos"""
-    groups = df[group_col].dropna().unique()
-    
-    if len(groups) > 1:
-        kmf = KaplanMeierFitter()
-        fig = go.Figure()
-        
-        for group in groups:
-            mask = (df[group_col] == group) & (~df[time_col].isna()) & (~df[event_col].isna())
-            kmf.fit(df.loc[mask, time_col], df.loc[mask, event_col], label=str(group))
-            fig.add_trace(go.Scatter(
-                x=kmf.timeline,
-                y=kmf.survival_function_['KM_estimate'],
-                mode='lines',
-                name=f'Grupo {group}'
-            ))
-        
-        fig.update_layout(
-            title=f'Curvas de Sobrevivência por {group_col}',
-            xaxis_title='Tempo',
-            yaxis_title='Probabilidade de Sobrevivência',
-            hovermode='x'
-        )
+def compare_survival_groups(df, time_col, event_col, group_col, show_ci=False):
+    """Compara sobrevivência entre grupos (curvas sobrepostas)"""
+    df_surv = df[[time_col, event_col, group_col]].dropna()
+    groups = df_surv.groupby(group_col, observed=True, sort=True)
+    
+    if groups.ngroups > 1:
+        curves = []
+        for group, data in groups:
+            kmf = KaplanMeierFitter().fit(data[time_col], data[event_col])
+            curves.append(km_curve(kmf, f'Grupo {group}'))
         
-        st.plotly_chart(fig, use_container_width=True)
+        plot_survival_curves(curves, f'Curvas de Sobrevivência por {group_col}', show_ci)
         
         # Teste de log-rank para 2 grupos
-        if len(groups) == 2:
-            perform_logrank_test(df, time_col, event_col, group_col, groups)
+        if groups.ngroups == 2:
+            perform_logrank_test(df, time_col, event_col, group_col, list(groups.groups))
 
 def perform_logrank_test(df, time_col, event_col, group_col, groups):
     """Executa teste de log-rank entre dois grupos"""
@@ -1,15 +1,31 @@
+import importlib
+
 import streamlit as st
 from components.header import render_header
 from components.footer import show_footer
-from components.sidebar import render_sidebar
-from pages.home import render_home
-from pages.descriptive import render_descriptive
-from pages.survival import render_survival
-from pages.predictive import render_predictive
-from pages.report import render_report
+from components.sidebar import render_sidebar, render_memory_usage
+from core.memory import begin_session_run
 import config
 from styles import load_css
 
+# Páginas: rótulo -> (módulo, função). Cada módulo só é importado quando a página é aberta,
+# para que bibliotecas pesadas (scikit-learn, lifelines, scipy) não atrasem a primeira tela
+PAGES = {
+    "🏠 Início": ("pages.home", "render_home"),
+    "📈 Descritiva": ("pages.descriptive", "render_descriptive"),
+    "⏳ Sobrevivência": ("pages.survival", "render_survival"),
+    "🤖 Preditiva": ("pages.predictive", "render_predictive"),
+    "🧪 Epidemiologia": ("pages.epidemiology", "render_epidemiology"),
+    "🔬 Triagem": ("pages.screening", "render_screening"),
+    "📅 Curva Epidêmica": ("pages.epicurve", "render_epicurve"),
+    "📄 Relatório": ("pages.report", "render_report")
+}
+
+def render_page(page):
+    """Importa o módulo da página sob demanda e a renderiza"""
+    module_name, function_name = PAGES[page]
+    getattr(importlib.import_module(module_name), function_name)()
+
 def main():
     # Configuração da página
     st.set_page_config(
@@ -25,6 +41,9 @@ def main():
     # Renderizar cabeçalho
     render_header()
     
+    # Recarregar os dados da sessão que o governador de memória gravou em disco
+    begin_session_run()
+    
     # Inicializar estado da sessão
     if 'df' not in st.session_state:
         st.session_state.df = None
@@ -37,24 +56,19 @@ def main():
     # Navegação entre páginas
     page = st.sidebar.radio(
         "Navegação",
-        options=["🏠 Início", "📈 Descritiva", "⏳ Sobrevivência", "🤖 Preditiva", "📄 Relatório"],
+        options=list(PAGES),
         key="page_navigation"
     )
     
-    # Renderizar página selecionada
-    if page == "🏠 Início":
-        render_home()
-    elif page == "📈 Descritiva" and st.session_state.df is not None:
-        render_descriptive()
-    elif page == "⏳ Sobrevivência" and st.session_state.df is not None:
-        render_survival()
-    elif page == "🤖 Preditiva" and st.session_state.df is not None:
-        render_predictive()
-    elif page == "📄 Relatório" and st.session_state.df is not None:
-        render_report()
-    elif st.session_state.df is None:
+    # Renderizar página selecionada (todas, exceto a inicial, exigem dados carregados)
+    if page == "🏠 Início" or st.session_state.df is not None:
+        render_page(page)
+    else:
         st.warning("Por favor, carregue dados primeiro na página inicial")
 
     show_footer()
+    
+    # Aplicar os orçamentos de memória e exibir o uso da sessão
+    render_memory_usage()
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,6 +3,14 @@ import pandas as pd
 import numpy as np
 import config
 from core.data_processor import clean_data
+from core.data_loader import list_excel_sheets, read_excel_header, load_excel
+from core.sampling import strata_candidates, default_strata_columns
+from utils.api_handlers import get_gemini_client
+from core.jobs import ACTIVE_STATUSES, collect_jobs, session_jobs, cancel_job
+from core.cohort import (OPERATORS, NULL_OPERATORS, saved_cohorts, active_cohort, get_cohort_df, describe_condition,
+                         save_cohort, delete_cohort)
+from core.schema import get_schema
+from core.memory import end_session_run
 
 def render_sidebar():
 
@@ -32,7 +40,8 @@ def render_sidebar():
             'tempo_sobrevivencia': np.random.weibull(1.5, n_samples) * 100,
             'status_obito': np.random.choice([1, 0], n_samples, p=[0.3, 0.7]),
             'custo_tratamento': np.random.normal(5000, 2000, n_samples).round(2),
-            'comorbidades': np.random.randint(0, 4, n_samples)
+            'comorbidades': np.random.randint(0, 4, n_samples),
+            'data_notificacao': pd.Timestamp('2024-01-01') + pd.to_timedelta(np.random.randint(0, 365, n_samples), unit='D')
         })
         
         # Ajustes para tornar os dados mais realistas
@@ -46,6 +55,7 @@ def render_sidebar():
             df.loc[df.sample(frac=0.1).index, col] = np.nan
         
         st.session_state.df = clean_data(df)
+        st.session_state.loaded_file_key = None
         st.success("Dados de exemplo carregados com sucesso!")
     
     # Upload de arquivo
@@ -57,19 +67,34 @@ def render_sidebar():
     
     if uploaded_file is not None:
         try:
-            if uploaded_file.name.endswith('.csv'):
-                df = pd.read_csv(uploaded_file)
-            else:
-                df = pd.read_excel(uploaded_file)
+            is_csv = uploaded_file.name.endswith('.csv')
+            excel_options = None if is_csv else render_excel_options(uploaded_file)
             
-            if df.empty:
-                st.error("O arquivo carregado está vazio.")
-            else:
-                st.session_state.df = clean_data(df)
-                st.success("Dados carregados com sucesso!")
+            # Só relê o arquivo quando ele (ou a seleção de planilha/colunas) muda
+            load_key = (uploaded_file.file_id, excel_options)
+            if st.session_state.get('loaded_file_key') != load_key:
+                if is_csv:
+                    df = pd.read_csv(uploaded_file)
+                else:
+                    sheet_name, columns = excel_options
+                    df = load_excel(uploaded_file.getvalue(), sheet_name, columns, uploaded_file.name)
+                
+                if df.empty:
+                    st.error("O arquivo carregado está vazio.")
+                else:
+                    st.session_state.df = clean_data(df)
+                    st.session_state.loaded_file_key = load_key
+                    st.success("Dados carregados com sucesso!")
         except Exception as e:
             st.error(f"Erro ao carregar arquivo: {str(e)}")
     
+    if st.session_state.df is not None and 'memory_report' in st.session_state.df.attrs:
+        render_memory_report(st.session_state.df.attrs['memory_report'])
+    
+    if st.session_state.df is not None:
+        render_cohort_options(st.session_state.df)
+        render_exploration_options(st.session_state.df)
+    
     # Configuração da API
     st.sidebar.header("🔑 Configuração")
     st.session_state.api_key = st.sidebar.text_input(
@@ -77,4 +102,226 @@ def render_sidebar():
         type="password",
         help="Obtenha sua chave em https://makersuite.google.com/app/apikey",
         key="api_key_input"
-    )
\ No newline at end of file
+    )
+    
+    if st.session_state.api_key:
+        render_api_status(st.session_state.api_key)
+    
+    render_jobs()
+
+def render_excel_options(uploaded_file):
+    """Seleção de planilha e colunas para arquivos Excel; retorna (planilha, colunas)"""
+    data = uploaded_file.getvalue()
+    
+    # Planilhas e cabeçalhos são lidos uma vez por arquivo e reaproveitados nos reruns
+    metadata = st.session_state.setdefault('excel_metadata', {})
+    sheets_key = (uploaded_file.file_id, None)
+    if sheets_key not in metadata:
+        metadata[sheets_key] = list_excel_sheets(data, uploaded_file.name)
+    sheets = metadata[sheets_key]
+    
+    sheet_name = sheets[0]
+    if len(sheets) > 1:
+        sheet_name = st.sidebar.selectbox("Planilha:", sheets, key="excel_sheet")
+    
+    header_key = (uploaded_file.file_id, sheet_name)
+    if header_key not in metadata:
+        metadata[header_key] = read_excel_header(data, sheet_name, uploaded_file.name)
+    header = metadata[header_key]
+    columns = st.sidebar.multiselect(
+        "Colunas a carregar:",
+        header,
+        default=header,
+        key=f"excel_columns_{sheet_name}"
+    )
+    
+    return sheet_name, tuple(columns) if columns and len(columns) < len(header) else None
+
+def render_cohort_options(df):
+    """Seleção, criação e exclusão de coortes (recortes usados por todas as análises)"""
+    st.sidebar.header("👥 Coorte")
+    names = [None] + list(saved_cohorts())
+    st.session_state.active_cohort = st.sidebar.selectbox(
+        "Coorte ativa:",
+        names,
+        format_func=lambda name: "Todos os registros" if name is None else name,
+        key="cohort_select"
+    )
+    
+    name, conditions = active_cohort()
+    if name is not None:
+        st.sidebar.caption(f"{len(get_cohort_df()):,} de {len(df):,} registros — "
+                           + "; ".join(describe_condition(c) for c in conditions))
+        st.sidebar.button("🗑️ Excluir coorte", key="cohort_delete", on_click=_delete_active_cohort)
+    elif st.session_state.active_cohort is not None:
+        st.sidebar.warning("A coorte usa colunas ausentes neste dataset; usando todos os registros.")
+    
+    with st.sidebar.expander("➕ Nova coorte", expanded=False):
+        render_cohort_builder(df)
+
+def render_cohort_builder(df):
+    """Monta as condições de uma nova coorte (todas devem ser satisfeitas)"""
+    schema = get_schema(df)
+    draft = st.session_state.setdefault('cohort_draft', [])
+    
+    column = st.selectbox("Coluna:", schema.index[~schema['id'].astype(bool)].tolist(), key="cohort_column")
+    kind = schema.at[column, 'kind']
+    operator = st.selectbox("Condição:", OPERATORS[kind], key=f"cohort_operator_{kind}")
+    
+    value = None
+    if operator in NULL_OPERATORS:
+        pass
+    elif kind == 'numeric':
+        # Coluna toda vazia: a mediana é NaN e quebraria o widget
+        median = df[column].median()
+        value = float(st.number_input("Valor:", value=0.0 if pd.isna(median) else float(median),
+                                      key=f"cohort_value_{column}"))
+    elif kind == 'binary':
+        value = float(st.selectbox("Valor:", [1, 0], key=f"cohort_value_{column}"))
+    elif kind == 'datetime':
+        value = st.date_input("Data:", value=df[column].min(), key=f"cohort_value_{column}").isoformat()
+    elif kind == 'categorical':
+        options = df[column].dropna().unique().tolist()
+        value = tuple(st.multiselect("Valores:", sorted(options, key=str), key=f"cohort_value_{column}"))
+    else:
+        text = st.text_input("Valores (separados por vírgula):", key=f"cohort_value_{column}")
+        value = tuple(v.strip() for v in text.split(',') if v.strip())
+    
+    if st.button("Adicionar condição", key="cohort_add") and (value or value == 0 or operator in NULL_OPERATORS):
+        draft.append((column, operator, value))
+    
+    for condition in draft:
+        st.caption(f"• {describe_condition(condition)}")
+    if draft:
+        st.button("Limpar condições", key="cohort_clear", on_click=draft.clear)
+        st.text_input("Nome da coorte:", key="cohort_name")
+        st.button("💾 Salvar coorte", key="cohort_save", on_click=_save_draft_cohort)
+    if st.session_state.get('cohort_error'):
+        st.error(st.session_state.pop('cohort_error'))
+
+def _save_draft_cohort():
+    """Salva o rascunho e ativa a nova coorte (callback, antes do rerun)"""
+    name = st.session_state.get('cohort_name', '').strip()
+    try:
+        save_cohort(name, st.session_state.cohort_draft)
+    except ValueError as e:
+        st.session_state.cohort_error = str(e)
+        return
+    st.session_state.cohort_draft = []
+    st.session_state.cohort_select = name
+
+def _delete_active_cohort():
+    """Exclui a coorte ativa (callback)"""
+    delete_cohort(st.session_state.cohort_select)
+    st.session_state.cohort_select = None
+
+def render_exploration_options(df):
+    """Configura o modo exploratório (análises em amostra estratificada)"""
+    st.sidebar.header("🔎 Modo Exploratório")
+    st.session_state.exploration_mode = st.sidebar.toggle(
+        "Analisar amostra estratificada",
+        value=len(df) > config.EXPLORATION_AUTO_THRESHOLD,
+        help="Executa as análises em uma amostra, com margens de erro; o cálculo exato pode ser pedido no Relatório",
+        key="exploration_toggle"
+    )
+    
+    if st.session_state.exploration_mode:
+        st.session_state.exploration_sample_size = st.sidebar.number_input(
+            "Tamanho da amostra:",
+            min_value=1_000,
+            value=config.EXPLORATION_SAMPLE_SIZE,
+            step=10_000,
+            key="exploration_size_input"
+        )
+        candidates = strata_candidates(df)
+        st.session_state.exploration_strata = st.sidebar.multiselect(
+            "Estratificar por:",
+            candidates,
+            default=default_strata_columns(df),
+            key="exploration_strata_input"
+        )
+        if len(df) <= st.session_state.exploration_sample_size:
+            st.sidebar.caption("O dataset já é menor que a amostra; usando dados completos.")
+
+def render_memory_report(report):
+    """Exibe a economia de memória obtida na otimização dos tipos"""
+    report = pd.DataFrame.from_dict(report, orient='index')
+    before = report['memory_before'].sum() / 1024 ** 2
+    after = report['memory_after'].sum() / 1024 ** 2
+    
+    with st.sidebar.expander("💾 Otimização de Memória", expanded=False):
+        st.write(f"**Antes:** {before:.2f} MB")
+        st.write(f"**Depois:** {after:.2f} MB")
+        st.dataframe(report[['dtype_before', 'dtype_after', 'reduction']].style.format({'reduction': '{:.0%}'}))
+
+def render_memory_usage():
+    """Aplica os orçamentos de memória e exibe o uso da sessão e do servidor"""
+    usage = end_session_run()
+    mb = 1024 ** 2
+    
+    with st.sidebar.expander("🧠 Uso de Memória", expanded=False):
+        st.progress(min(usage['session'] / usage['session_budget'], 1.0),
+                    text=f"Sessão: {usage['session'] / mb:,.1f} de {usage['session_budget'] / mb:,.0f} MB")
+        st.progress(min(usage['total'] / usage['global_budget'], 1.0),
+                    text=f"Servidor: {usage['total'] / mb:,.1f} de {usage['global_budget'] / mb:,.0f} MB "
+                         f"({usage['sessions']} sessão(ões))")
+        for key, size in usage['largest']:
+            st.caption(f"`{key}`: {size / mb:,.1f} MB")
+        if usage['spilled']:
+            st.caption("💽 Em disco (recarregado no próximo uso): "
+                       + ", ".join(f"`{key}` ({size / mb:,.1f} MB)" for key, size in usage['spilled'].items()))
+        if usage['evicted']:
+            st.caption(f"♻️ {usage['evicted']} cache(s) descartado(s) para liberar memória")
+
+def render_jobs():
+    """Entrega resultados das tarefas em segundo plano e exibe o andamento"""
+    for entry in collect_jobs():
+        icon = {'done': '✅', 'failed': '❌', 'cancelled': '🚫'}[entry['status']]
+        st.toast(f"{icon} {entry['name']}" + (f": {entry['error']}" if entry.get('error') else ""))
+    
+    if session_jobs():
+        with st.sidebar:
+            render_active_jobs()
+    elif st.session_state.get('job_history'):
+        with st.sidebar.expander("⚙️ Tarefas em Segundo Plano", expanded=False):
+            render_job_history()
+
+@st.fragment(run_every=config.JOB_REFRESH_SECONDS)
+def render_active_jobs():
+    """Painel atualizado periodicamente enquanto houver tarefas em andamento"""
+    jobs = session_jobs()
+    if any(job.status not in ACTIVE_STATUSES for job in jobs):
+        # Rerun completo para entregar os resultados às páginas
+        st.rerun()
+    
+    st.header("⚙️ Tarefas em Segundo Plano")
+    for job in jobs:
+        labels = {'queued': "Na fila", 'cancelling': "Cancelando..."}
+        st.progress(job.progress, text=f"{job.name} — {labels.get(job.status, job.message)}")
+        st.button("Cancelar", key=f"cancel_job_{job.id}", on_click=cancel_job, args=(job.id,),
+                  disabled=job.status == 'cancelling')
+    render_job_history()
+
+def render_job_history():
+    """Últimas tarefas concluídas da sessão"""
+    icons = {'done': '✅', 'failed': '❌', 'cancelled': '🚫'}
+    for entry in st.session_state.get('job_history', []):
+        st.caption(f"{icons[entry['status']]} {entry['name']}")
+
+def render_api_status(api_key):
+    """Exibe saúde e latência do cliente Gemini compartilhado"""
+    try:
+        metrics = get_gemini_client(api_key).metrics()
+    except Exception as e:
+        st.sidebar.error(f"Erro ao configurar API: {str(e)}")
+        return
+    
+    with st.sidebar.expander("📡 Status da API", expanded=False):
+        status = "🟢 Saudável" if metrics['healthy'] else "🔴 Instável"
+        st.write(f"**Status:** {status}")
+        st.write(f"**Chamadas:** {metrics['total_calls']} ({metrics['failed_calls']} com erro)")
+        st.write(f"**Em andamento:** {metrics['in_flight']}")
+        if metrics['latency_p50'] is not None:
+            st.write(f"**Latência p50/p95:** {metrics['latency_p50']:.2f}s / {metrics['latency_p95']:.2f}s")
+        if metrics['last_error']:
+            st.caption(f"Último erro: {metrics['last_error']}")
\ No newline at end of file
@@ -12,4 +12,123 @@ COLOR_BACKGROUND = "#f8f9fa"
 # Configurações de análise
 DEFAULT_SAMPLE_SIZE = 500
 DEFAULT_TEST_SIZE = 0.2
-DEFAULT_RANDOM_STATE = 42
\ No newline at end of file
+DEFAULT_RANDOM_STATE = 42
+
+# Configurações da API Gemini
+GEMINI_MODEL_NAME = "gemini-pro"
+GEMINI_REQUESTS_PER_MINUTE = 60
+GEMINI_MAX_CONCURRENCY = 4
+GEMINI_GLOBAL_MAX_CONCURRENCY = 16
+GEMINI_QUEUE_TIMEOUT = 30
+GEMINI_METRICS_WINDOW = 200
+GEMINI_UNHEALTHY_ERROR_RATE = 0.5
+
+# Configurações de cache e leitura de arquivos
+CACHE_DIR = ".sisade_cache"
+EXCEL_CHUNK_SIZE = 50_000
+
+# Configurações de exportação (gravação em blocos)
+EXPORT_CHUNK_ROWS = 50_000
+EXPORT_PARQUET_COMPRESSION = "zstd"
+EXPORT_GZIP_LEVEL = 6
+EXPORT_MAX_FILES = 20
+
+# Configurações de otimização de memória
+CATEGORY_MAX_UNIQUE = 1000
+CATEGORY_MAX_RATIO = 0.5
+DATE_SAMPLE_SIZE = 200
+DATE_PARSE_MIN_RATIO = 0.9
+
+# Configurações do governador de memória (orçamentos por sessão e do servidor)
+MEMORY_SESSION_BUDGET_MB = 2048
+MEMORY_GLOBAL_BUDGET_MB = 6144
+MEMORY_SPILL_MIN_MB = 1
+MEMORY_STALE_RUN_SECONDS = 600
+MEMORY_IDLE_SECONDS = 300
+MEMORY_RELEASE_MARGIN = 0.2
+
+# Configurações da validação de dados
+VALIDATION_MAX_AGE = 120
+VALIDATION_SAMPLE_ROWS = 5
+VALIDATION_WORKERS = 4
+VALIDATION_PARALLEL_MIN_CELLS = 20_000_000
+
+# Configurações do modo exploratório (amostragem)
+EXPLORATION_SAMPLE_SIZE = 100_000
+EXPLORATION_AUTO_THRESHOLD = 1_000_000
+EXPLORATION_MAX_STRATA = 20
+
+# Configurações de coortes (recortes mantidos em cache)
+COHORT_CACHE_SIZE = 4
+
+# Configurações da análise de ausentes (padrões e teste MCAR de Little)
+MISSING_TOP_PATTERNS = 15
+MCAR_MAX_COLUMNS = 50
+MCAR_MAX_ROWS = 200_000
+MCAR_MAX_ITER = 200
+MCAR_TOL = 1e-6
+
+# Configurações de análise epidemiológica
+AGE_BANDS = [0, 20, 40, 60, 80, float('inf')]
+EPI_MAX_DENSE_STRATA = 10_000_000
+
+# Configurações da curva epidêmica (janela da média móvel por granularidade)
+EPICURVE_ROLLING_WINDOWS = {'D': 7, 'W-SAT': 4, 'W-SUN': 4, 'MS': 3}
+
+# Configurações de importância por permutação
+PERMUTATION_N_REPEATS = 5
+PERMUTATION_MAX_SAMPLES = 10_000
+
+# Configurações dos algoritmos preditivos
+PREDICTIVE_ENGINES = {
+    'Random Forest': 'random_forest',
+    'HistGradientBoosting (grandes volumes)': 'hist_gradient_boosting'
+}
+HGB_MAX_ITER = 200
+HGB_LEARNING_RATE = 0.1
+HGB_VALIDATION_FRACTION = 0.1
+HGB_N_ITER_NO_CHANGE = 10
+HGB_MAX_CATEGORIES = 255
+
+# Configurações da avaliação de classificadores (curvas, calibração e IC por bootstrap)
+EVAL_BOOTSTRAP_SAMPLES = 1000
+EVAL_CI_LEVEL = 0.95
+EVAL_CALIBRATION_BINS = 10
+EVAL_CURVE_POINTS = 300
+EVAL_BOOTSTRAP_WORKERS = 4
+EVAL_BOOTSTRAP_BLOCK_CELLS = 2_000_000
+EVAL_BOOTSTRAP_PARALLEL_MIN_CELLS = 20_000_000
+
+# Configurações do registro de modelos
+MODEL_REGISTRY_MAX_LOADED = 8
+
+# Configurações de sobrevivência (modelos paramétricos e gráficos)
+PARAMETRIC_WORKERS = 4
+SURVIVAL_EXTRAPOLATION_HORIZON = 730
+SURVIVAL_PLOT_POINTS = 500
+SURVIVAL_PLOT_TOTAL_POINTS = 4000
+SURVIVAL_PLOT_MIN_POINTS = 200
+
+# Configurações da triagem univariada
+SCREENING_ALPHA = 0.05
+SCREENING_MAX_LEVELS = 20
+SCREENING_FISHER_MIN_EXPECTED = 5
+SCREENING_WORKERS = 4
+SCREENING_PARALLEL_MIN_CELLS = 20_000_000
+SCREENING_BLOCK_CELLS = 4_000_000
+SCREENING_TOP = 10
+
+# Configurações das tarefas em segundo plano
+JOB_THREAD_WORKERS = 4
+JOB_PROCESS_WORKERS = 2
+JOB_MAX_PER_SESSION = 3
+JOB_MAX_TOTAL = 12
+JOB_HISTORY_SIZE = 10
+JOB_REFRESH_SECONDS = 2
+
+# Configurações do cache de interpretações da IA
+LLM_CACHE_MAX_ENTRIES = 256
+LLM_CACHE_TTL = 6 * 3600
+LLM_CACHE_DISK_TTL = 30 * 24 * 3600
+LLM_CACHE_DISK_MAX_FILES = 5000
+LLM_CACHE_PRUNE_SECONDS = 3600
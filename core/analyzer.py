@@ -1,14 +1,12 @@
 import json
-import google.generativeai as genai
-import pandas as pd
-import numpy as np
-from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
-from sklearn.metrics import (classification_report, mean_squared_error, 
-                            r2_score, accuracy_score)
-from lifelines import KaplanMeierFitter, CoxPHFitter
-from lifelines.statistics import logrank_test
-from utils.api_handlers import configure_gemini_api
+import logging
+from utils.api_handlers import get_gemini_client
+from utils.llm_cache import get_interpretation_cache, interpretation_key
 from utils.data_validation import validate_data_for_analysis
+from core.schema import get_schema, columns_with, columns_of_kind
+
+# Alterar ao mudar o prompt de interpretação, para não reaproveitar respostas antigas
+INTERPRETATION_PROMPT_VERSION = 1
 
 class SISADEAnalyzer:
     def __init__(self, api_key):
@@ -22,8 +20,8 @@ class SISADEAnalyzer:
         """Configura o modelo de IA"""
         if self.api_key:
             try:
-                configure_gemini_api(self.api_key)
-                self.model = genai.GenerativeModel('gemini-pro')
+                # Cliente compartilhado do processo: sem reconfiguração a cada rerun
+                self.model = get_gemini_client(self.api_key)
                 self.available = True
             except Exception as e:
                 raise Exception(f"Erro ao configurar API: {str(e)}")
@@ -39,18 +37,29 @@ class SISADEAnalyzer:
             info = self._prepare_data_info(df)
             prompt = self._create_analysis_prompt(info)
             response = self._get_ai_response(prompt)
-            return self._process_ai_response(response)
+            analysis = self._process_ai_response(response)
+            analysis['target_variables'] = self._normalize_targets(analysis.get('target_variables'), df)
+            return analysis
             
         except Exception as e:
             raise Exception(f"Erro na análise IA: {str(e)}")
     
+    def _normalize_targets(self, targets, df):
+        """Converte as variáveis-alvo sugeridas (lista ou dicionário) em colunas válidas"""
+        targets = list(targets.keys()) if isinstance(targets, dict) else list(targets or [])
+        valid = [col for col in targets if col in df.columns]
+        return valid or columns_with('target', df)[:3]
+    
     def _prepare_data_info(self, df):
         """Prepara informações sobre o dataset para análise"""
+        schema = get_schema(df)
         return {
             'shape': df.shape,
             'columns': list(df.columns),
-            'dtypes': {col: str(dtype) for col, dtype in df.dtypes.items()},
-            'missing_values': df.isnull().sum().to_dict(),
+            'dtypes': schema['dtype'].to_dict(),
+            'missing_values': (schema['null_rate'] * len(df)).round().astype(int).to_dict(),
+            'column_roles': {col: [role for role in ('time', 'event', 'id', 'date', 'age') if schema.at[col, role]]
+                             for col in schema.index},
             'sample_data': {col: list(df[col].head(3).values) for col in df.columns}
         }
     
@@ -90,29 +99,25 @@ class SISADEAnalyzer:
     
     def _fallback_analysis(self, df):
         """Análise de fallback sem IA"""
-        numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-        categorical_cols = df.select_dtypes(include=['object']).columns.tolist()
+        schema = get_schema(df)
+        target_cols = columns_with('target', df)
+        categorical_cols = columns_of_kind(['categorical', 'text'], df)
         
         # Verifica se há colunas típicas de análise de sobrevivência
         survival_cols = []
-        cols_lower = [col.lower() for col in df.columns]
+        time_cols, event_cols = columns_with('time', df), columns_with('event', df)
         
-        has_time_col = any('tempo' in col or 'time' in col for col in cols_lower)
-        has_event_col = any('evento' in col or 'status' in col or 'obito' in col for col in cols_lower)
-        
-        if has_time_col and has_event_col:
-            time_col = next(col for col in df.columns if 'tempo' in col.lower() or 'time' in col.lower())
-            event_col = next(col for col in df.columns if 'evento' in col.lower() or 'status' in col.lower() or 'obito' in col.lower())
-            survival_cols = [time_col, event_col]
+        if time_cols and event_cols:
+            survival_cols = [time_cols[0], event_cols[0]]
         
         return {
             'data_type': 'Dataset genérico',
-            'target_variables': numeric_cols[:3] if numeric_cols else categorical_cols[:1],
+            'target_variables': target_cols[:3] if target_cols else categorical_cols[:1],
             'recommended_analyses': ['Estatística Descritiva', 'Correlação', 'Análise Preditiva'] + 
                                 (['Análise de Sobrevivência'] if survival_cols else []),
-            'problem_type': 'Regressão' if numeric_cols else 'Classificação',
+            'problem_type': 'Regressão' if target_cols else 'Classificação',
             'data_issues': {
-                'missing_values': df.isnull().sum().sum(),
+                'missing_values': int((schema['null_rate'] * len(df)).round().sum()),
                 'duplicates': df.duplicated().sum()
             },
             'interpretation': 'Dataset com variáveis numéricas e categóricas para análise exploratória.'
@@ -123,6 +128,13 @@ class SISADEAnalyzer:
         if not self.available:
             return "Análise concluída. Verifique os gráficos e métricas acima."
         
+        # Resultados idênticos já interpretados são reaproveitados (memória ou disco)
+        cache = get_interpretation_cache()
+        key = interpretation_key(results, analysis_type, self.model.model_name, INTERPRETATION_PROMPT_VERSION)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        
         prompt = f"""
         Interprete os seguintes resultados de análise estatística de forma clara e acessível:
         
@@ -140,7 +152,14 @@ class SISADEAnalyzer:
         """
         
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
+            # .text levanta ValueError quando a resposta é bloqueada ou vem sem candidatos
+            text = self.model.generate_content(prompt).text
+        except Exception as e:
+            return f"**Erro na interpretação:** {str(e)}"
+        
+        # Falha ao gravar no cache não descarta a resposta já obtida
+        try:
+            cache.set(key, text, analysis_type=analysis_type, model=self.model.model_name)
         except Exception as e:
-            return f"**Erro na interpretação:** {str(e)}"
\ No newline at end of file
+            logging.getLogger(__name__).warning("Falha ao gravar interpretação no cache: %s", e)
+        return text
\ No newline at end of file
@@ -0,0 +1,145 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from core.model_registry import get_dataset_fingerprint
+import config
+
+# Operadores disponíveis por tipo lógico de coluna (ver core.schema)
+OPERATORS = {
+    'numeric': ['≥', '>', '≤', '<', '=', '≠', 'ausente', 'presente'],
+    'binary': ['=', '≠', 'ausente', 'presente'],
+    'datetime': ['≥', '≤', 'ausente', 'presente'],
+    'categorical': ['em', 'fora de', 'ausente', 'presente'],
+    'text': ['em', 'fora de', 'ausente', 'presente']
+}
+NULL_OPERATORS = ('ausente', 'presente')
+
+def condition_mask(series, operator, value):
+    """Avalia uma condição de forma vetorizada; retorna um array booleano (ausentes nunca casam)"""
+    if operator == 'ausente':
+        return series.isna().to_numpy()
+    if operator == 'presente':
+        return series.notna().to_numpy()
+    if operator in ('em', 'fora de'):
+        # isin usa os códigos das colunas categóricas, sem comparar textos linha a linha
+        mask = series.isin(list(value)).to_numpy()
+        return mask if operator == 'em' else ~mask & series.notna().to_numpy()
+
+    if pd.api.types.is_datetime64_any_dtype(series):
+        values, value = series.to_numpy(), np.datetime64(pd.Timestamp(value))
+    else:
+        values = series.to_numpy(dtype=float, na_value=np.nan)
+    with np.errstate(invalid='ignore'):
+        if operator == '≥':
+            return values >= value
+        if operator == '>':
+            return values > value
+        if operator == '≤':
+            return values <= value
+        if operator == '<':
+            return values < value
+        if operator == '=':
+            return values == value
+        if operator == '≠':
+            return (values != value) & ~pd.isna(values)
+    raise ValueError(f"Operador não suportado: {operator}")
+
+def describe_condition(condition):
+    """Texto legível de uma condição (coluna, operador, valor)"""
+    column, operator, value = condition
+    if operator in NULL_OPERATORS:
+        return f"{column} {operator}"
+    if isinstance(value, tuple):
+        value = '{' + ', '.join(map(str, value)) + '}'
+    return f"{column} {operator} {value}"
+
+def _cohort_cache(df):
+    """Caches de máscaras e recortes do dataset atual (descartados quando o dataset muda)"""
+    fingerprint = get_dataset_fingerprint(df)
+    cache = st.session_state.get('cohort_cache')
+    if cache is None or cache['fingerprint'] != fingerprint:
+        cache = {'fingerprint': fingerprint, 'masks': {}, 'views': OrderedDict()}
+        st.session_state.cohort_cache = cache
+    return cache
+
+def cohort_mask(df, conditions):
+    """Máscara da coorte (E lógico das condições), com cache por condição em bits compactados"""
+    masks = _cohort_cache(df)['masks']
+    packed = None
+    for condition in conditions:
+        if condition not in masks:
+            column, operator, value = condition
+            # packbits: 1 bit por linha, 8x menos memória que um array booleano
+            masks[condition] = np.packbits(condition_mask(df[column], operator, value))
+        packed = masks[condition] if packed is None else packed & masks[condition]
+    if packed is None:
+        return np.ones(len(df), dtype=bool)
+    return np.unpackbits(packed, count=len(df)).astype(bool)
+
+def cohort_view(df, conditions):
+    """Recorte da coorte, materializado uma vez e reaproveitado (LRU) por todas as análises"""
+    conditions = tuple(conditions)
+    if not conditions:
+        return df
+
+    views = _cohort_cache(df)['views']
+    if conditions in views:
+        views.move_to_end(conditions)
+        return views[conditions]
+
+    rows = np.flatnonzero(cohort_mask(df, conditions))
+    view = df.iloc[rows]
+    views[conditions] = view
+    while len(views) > config.COHORT_CACHE_SIZE:
+        views.popitem(last=False)
+    return view
+
+def missing_columns(df, conditions):
+    """Colunas usadas pela coorte que não existem no dataset"""
+    return sorted({column for column, _, _ in conditions if column not in df.columns})
+
+def saved_cohorts():
+    """Coortes salvas na sessão: nome -> tupla de condições"""
+    return st.session_state.setdefault('cohorts', {})
+
+def active_cohort():
+    """Nome e condições da coorte ativa (None quando a análise usa todos os registros)"""
+    name = st.session_state.get('active_cohort')
+    conditions = saved_cohorts().get(name)
+    df = st.session_state.get('df')
+    if not conditions or df is None or missing_columns(df, conditions):
+        return None, ()
+    return name, conditions
+
+def get_cohort_df():
+    """Dataset da coorte ativa (ou completo); é a população de todas as análises"""
+    df = st.session_state.df
+    _, conditions = active_cohort()
+    return cohort_view(df, conditions)
+
+def cohort_info(cohort_df):
+    """Metadados da coorte para anexar aos resultados (None sem coorte ativa)"""
+    name, conditions = active_cohort()
+    if name is None:
+        return None
+    return {
+        'name': name,
+        'conditions': [describe_condition(c) for c in conditions],
+        'size': len(cohort_df),
+        'population': len(st.session_state.df)
+    }
+
+def save_cohort(name, conditions):
+    """Salva (ou substitui) uma coorte nomeada"""
+    if not name or not conditions:
+        raise ValueError("Informe um nome e ao menos uma condição para a coorte")
+    saved_cohorts()[name] = tuple(conditions)
+
+def delete_cohort(name):
+    """Remove uma coorte salva (a análise volta a usar todos os registros se ela estava ativa)"""
+    saved_cohorts().pop(name, None)
+    if st.session_state.get('active_cohort') == name:
+        st.session_state.active_cohort = None
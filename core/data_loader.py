@@ -0,0 +1,122 @@
+import hashlib
+import os
+import re
+from io import BytesIO
+
+import pandas as pd
+
+import config
+
+def file_hash(data):
+    """Calcula o hash SHA-256 do conteúdo de um arquivo"""
+    return hashlib.sha256(data).hexdigest()
+
+def is_legacy_excel(file_name):
+    """Indica se o arquivo é do formato antigo .xls (sem leitura em streaming)"""
+    return file_name.lower().endswith('.xls')
+
+def list_excel_sheets(data, file_name=''):
+    """Lista as planilhas sem carregar o conteúdo delas"""
+    if is_legacy_excel(file_name):
+        return pd.ExcelFile(BytesIO(data)).sheet_names
+
+    from openpyxl import load_workbook
+    workbook = load_workbook(BytesIO(data), read_only=True, data_only=True)
+    try:
+        return workbook.sheetnames
+    finally:
+        workbook.close()
+
+def read_excel_header(data, sheet_name, file_name=''):
+    """Lê apenas a linha de cabeçalho de uma planilha"""
+    if is_legacy_excel(file_name):
+        return list(pd.read_excel(BytesIO(data), sheet_name=sheet_name, nrows=0).columns)
+
+    from openpyxl import load_workbook
+    workbook = load_workbook(BytesIO(data), read_only=True, data_only=True)
+    try:
+        first_row = next(workbook[sheet_name].iter_rows(max_row=1, values_only=True), ())
+        return _make_header(first_row)
+    finally:
+        workbook.close()
+
+def _make_header(row):
+    """Gera nomes de colunas únicos a partir da primeira linha"""
+    header, seen = [], {}
+    for i, value in enumerate(row):
+        name = str(value) if value is not None else f"Unnamed: {i}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        header.append(name)
+    return header
+
+def iter_excel_chunks(data, sheet_name, columns=None, chunk_size=config.EXCEL_CHUNK_SIZE):
+    """Itera sobre a planilha em modo somente leitura, gerando DataFrames por bloco"""
+    from openpyxl import load_workbook
+    workbook = load_workbook(BytesIO(data), read_only=True, data_only=True)
+    try:
+        rows = workbook[sheet_name].iter_rows(values_only=True)
+        header = _make_header(next(rows, ()))
+
+        # Projeção de colunas: mantém apenas os índices solicitados
+        if columns is None:
+            positions = list(range(len(header)))
+        else:
+            positions = [header.index(col) for col in columns if col in header]
+        names = [header[i] for i in positions]
+
+        chunk, emitted = [], False
+        for row in rows:
+            chunk.append(tuple(row[i] if i < len(row) else None for i in positions))
+            if len(chunk) >= chunk_size:
+                yield pd.DataFrame.from_records(chunk, columns=names)
+                chunk, emitted = [], True
+        if chunk or not emitted:
+            yield pd.DataFrame.from_records(chunk, columns=names)
+    finally:
+        workbook.close()
+
+def read_excel_streaming(data, sheet_name, columns=None, file_name=''):
+    """Lê uma planilha por streaming, com projeção opcional de colunas"""
+    if is_legacy_excel(file_name):
+        return pd.read_excel(BytesIO(data), sheet_name=sheet_name, usecols=columns)
+
+    return pd.concat(iter_excel_chunks(data, sheet_name, columns), ignore_index=True)
+
+def _parquet_cache_path(digest, sheet_name):
+    """Caminho do Parquet convertido para (arquivo, planilha)"""
+    safe_sheet = re.sub(r'[^\w-]', '_', str(sheet_name))
+    # O nome limpo pode coincidir entre planilhas ("Casos 2023" e "Casos_2023"): o hash do nome exato as separa
+    sheet_digest = hashlib.sha256(repr(sheet_name).encode()).hexdigest()[:16]
+    return os.path.join(config.CACHE_DIR, 'excel', f"{digest}_{safe_sheet}_{sheet_digest}.parquet")
+
+def load_excel(data, sheet_name=None, columns=None, file_name=''):
+    """Carrega uma planilha usando o cache Parquet indexado pelo hash do arquivo"""
+    if sheet_name is None:
+        sheet_name = list_excel_sheets(data, file_name)[0]
+
+    path = _parquet_cache_path(file_hash(data), sheet_name)
+    if os.path.exists(path):
+        try:
+            return pd.read_parquet(path, columns=columns)
+        except Exception:
+            os.remove(path)
+
+    # Converte a planilha inteira uma única vez; as projeções seguintes leem do Parquet
+    df = read_excel_streaming(data, sheet_name, file_name=file_name)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    except Exception:
+        # Colunas com tipos mistos não são serializáveis; segue sem cache
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    if columns is not None:
+        df = df[[col for col in columns if col in df.columns]]
+    return df
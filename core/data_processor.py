@@ -1,11 +1,104 @@
+import re
+
+import numpy as np
 import pandas as pd
 
-def clean_data(df):
+import config
+
+# Padrões comuns de datas (dd/mm/aaaa, aaaa-mm-dd, com ou sem horário)
+DATE_PATTERN = re.compile(r'^\s*(\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4}|\d{4}[/.-]\d{1,2}[/.-]\d{1,2})([ T]\d{1,2}:\d{2}(:\d{2})?)?\s*$')
+
+def clean_data(df, optimize=True):
     """Realiza limpeza básica dos dados"""
     # Remover duplicatas
     df_clean = df.drop_duplicates()
-    
+
     # Converter strings para minúsculas nos nomes das colunas
     df_clean.columns = df_clean.columns.str.lower()
-    
-    return df_clean
\ No newline at end of file
+
+    # Reduzir o uso de memória ajustando os tipos das colunas
+    if optimize:
+        df_clean, report = optimize_memory(df_clean)
+        # Guardado como dicionário: attrs é copiado junto com o DataFrame
+        df_clean.attrs['memory_report'] = report.to_dict(orient='index')
+
+    return df_clean
+
+def optimize_memory(df):
+    """Ajusta os tipos das colunas e retorna o DataFrame com o relatório de memória"""
+    memory_before = df.memory_usage(deep=True, index=False)
+    dtypes_before = df.dtypes.astype(str)
+
+    optimized = {}
+    for col in df.columns:
+        optimized[col] = optimize_column(df[col])
+    df_opt = pd.DataFrame(optimized, index=df.index)
+
+    memory_after = df_opt.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        'dtype_before': dtypes_before,
+        'dtype_after': df_opt.dtypes.astype(str),
+        'memory_before': memory_before,
+        'memory_after': memory_after
+    })
+    report['reduction'] = 1 - report['memory_after'] / report['memory_before'].replace(0, np.nan)
+    report.index.name = 'column'
+
+    return df_opt, report
+
+def optimize_column(series):
+    """Escolhe o tipo mais compacto para uma coluna sem perda de informação"""
+    if pd.api.types.is_bool_dtype(series):
+        return series
+
+    if pd.api.types.is_numeric_dtype(series):
+        if is_binary_flag(series):
+            return series.astype(bool)
+        if pd.api.types.is_integer_dtype(series):
+            return pd.to_numeric(series, downcast='integer')
+        if pd.api.types.is_float_dtype(series):
+            return downcast_float(series)
+        return series
+
+    if series.dtype == object:
+        if looks_like_date(series):
+            parsed = parse_dates(series)
+            # Só converte se praticamente todos os valores forem datas válidas
+            if parsed.notna().sum() >= config.DATE_PARSE_MIN_RATIO * series.notna().sum():
+                return parsed
+
+        n_unique = series.nunique(dropna=True)
+        if n_unique <= config.CATEGORY_MAX_UNIQUE and n_unique <= config.CATEGORY_MAX_RATIO * len(series):
+            return series.astype('category')
+
+    return series
+
+def is_binary_flag(series):
+    """Verifica se a coluna é um indicador 0/1 sem valores ausentes"""
+    if series.isna().any():
+        return False
+    values = series.unique()
+    return len(values) <= 2 and set(values.tolist()) <= {0, 1}
+
+def downcast_float(series):
+    """Converte float64 para float32 só quando todos os valores voltam idênticos (códigos e IDs com NaN)"""
+    if series.dtype == np.float32:
+        return series
+    downcast = series.astype(np.float32)
+    if ((downcast.astype(np.float64) == series) | series.isna()).all():
+        return downcast
+    return series
+
+def parse_dates(series):
+    """Converte textos em datas (dia primeiro, exceto no formato ISO)"""
+    first = series.dropna().astype(str).iloc[0].strip() if series.notna().any() else ''
+    dayfirst = not re.match(r'^\d{4}', first)
+    return pd.to_datetime(series, errors='coerce', dayfirst=dayfirst)
+
+def looks_like_date(series):
+    """Verifica por amostragem se os textos da coluna têm formato de data"""
+    sample = series.dropna().head(config.DATE_SAMPLE_SIZE)
+    if sample.empty:
+        return False
+    matches = sample.astype(str).str.match(DATE_PATTERN)
+    return matches.mean() >= config.DATE_PARSE_MIN_RATIO
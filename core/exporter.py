@@ -0,0 +1,163 @@
+import gzip
+import io
+import json
+import os
+import re
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from utils.llm_cache import canonicalize
+import config
+
+# Formatos de tabela: extensão do arquivo e tipo MIME do download
+FORMATS = {
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'Arrow IPC': ('arrow', 'application/vnd.apache.arrow.file'),
+    'CSV (gzip)': ('csv.gz', 'application/gzip'),
+    'JSON Lines (gzip)': ('jsonl.gz', 'application/gzip')
+}
+
+def iter_frames(df, chunk_rows=config.EXPORT_CHUNK_ROWS):
+    """Fatias sequenciais do dataset (visões, sem cópia)"""
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+def iter_predictions(df, fitted, chunk_rows=config.EXPORT_CHUNK_ROWS):
+    """Previsões do modelo ajustado para todos os registros, calculadas bloco a bloco"""
+    from analysis.predictive import transform_features
+
+    model, target_col = fitted['model'], fitted['target_col']
+    missing = [col for col in fitted['feature_names'] if col not in df.columns]
+    if missing:
+        raise ValueError(f"Colunas ausentes no dataset atual: {', '.join(missing)}")
+
+    for chunk in iter_frames(df, chunk_rows):
+        X = transform_features(chunk, fitted['preprocessing'])
+        frame = pd.DataFrame({'linha': chunk.index.to_numpy()})
+        if target_col in chunk.columns:
+            frame[target_col] = chunk[target_col].to_numpy()
+        frame['previsao'] = model.predict(X)
+        if fitted['model_type'] == "Classificação" and hasattr(model, 'predict_proba'):
+            proba = model.predict_proba(X)
+            # Binário: probabilidade da classe positiva; multiclasse: da classe prevista
+            frame['probabilidade'] = proba[:, 1] if proba.shape[1] == 2 else proba.max(axis=1)
+        yield frame
+
+def survival_table(df, time_col, event_col):
+    """Tabela de vida do Kaplan-Meier: em risco, eventos, censuras, sobrevivência e IC 95%"""
+    from analysis.survival import fit_survival
+
+    kmf, _ = fit_survival(df, time_col, event_col)
+    table = kmf.event_table.join(kmf.survival_function_).join(kmf.confidence_interval_survival_function_)
+    table.columns = ['removidos', 'eventos', 'censurados', 'entradas', 'em_risco',
+                     'sobrevivencia', 'ic_inferior', 'ic_superior']
+    return table.rename_axis('tempo').reset_index()
+
+def arrow_schema(df):
+    """Esquema Arrow do dataset inteiro (evita tipos nulos em blocos só com ausentes)"""
+    import pyarrow as pa
+    return pa.Schema.from_pandas(df, preserve_index=False)
+
+def _record_batches(frames, schema):
+    """Converte cada bloco em um RecordBatch com o mesmo esquema"""
+    import pyarrow as pa
+    for frame in frames:
+        yield pa.RecordBatch.from_pandas(frame, schema=schema, preserve_index=False)
+
+def write_frames(frames, fmt, sink, schema=None):
+    """Grava blocos de DataFrame em um arquivo aberto, um bloco por vez; retorna o nº de linhas"""
+    import pyarrow as pa
+
+    frames = iter(frames)
+    first = next(frames, None)
+    if first is None:
+        raise ValueError("Nada a exportar: a tabela está vazia")
+    if schema is None:
+        schema = arrow_schema(first)
+
+    def blocks():
+        yield first
+        yield from frames
+
+    rows = 0
+    if fmt == 'Parquet':
+        import pyarrow.parquet as pq
+        # Cada bloco vira um grupo de linhas no arquivo
+        with pq.ParquetWriter(sink, schema, compression=config.EXPORT_PARQUET_COMPRESSION) as writer:
+            for batch in _record_batches(blocks(), schema):
+                writer.write_batch(batch)
+                rows += batch.num_rows
+    elif fmt == 'Arrow IPC':
+        with pa.ipc.new_file(sink, schema) as writer:
+            for batch in _record_batches(blocks(), schema):
+                writer.write_batch(batch)
+                rows += batch.num_rows
+    elif fmt == 'CSV (gzip)':
+        import pyarrow.csv as pacsv
+        with gzip.GzipFile(fileobj=sink, mode='wb', compresslevel=config.EXPORT_GZIP_LEVEL) as gz:
+            with pacsv.CSVWriter(gz, schema) as writer:
+                for batch in _record_batches(blocks(), schema):
+                    writer.write_batch(batch)
+                    rows += batch.num_rows
+    elif fmt == 'JSON Lines (gzip)':
+        with gzip.GzipFile(fileobj=sink, mode='wb', compresslevel=config.EXPORT_GZIP_LEVEL) as gz:
+            text = io.TextIOWrapper(gz, encoding='utf-8')
+            for frame in blocks():
+                frame.to_json(text, orient='records', lines=True, date_format='iso', force_ascii=False)
+                rows += len(frame)
+            text.flush()
+            text.detach()
+    else:
+        raise ValueError(f"Formato de exportação não suportado: {fmt}")
+    return rows
+
+def write_results_json(results, sink):
+    """Grava os resultados estruturados em JSON, em pedaços (sem montar o texto inteiro)"""
+    text = io.TextIOWrapper(sink, encoding='utf-8')
+    encoder = json.JSONEncoder(ensure_ascii=False, indent=2)
+    for piece in encoder.iterencode(canonicalize(results)):
+        text.write(piece)
+    text.flush()
+    text.detach()
+
+def export_dir():
+    """Pasta dos arquivos exportados"""
+    return os.path.join(config.CACHE_DIR, 'exports')
+
+def prune_exports(keep=config.EXPORT_MAX_FILES):
+    """Remove os arquivos exportados mais antigos além do limite"""
+    try:
+        paths = [entry.path for entry in os.scandir(export_dir()) if entry.is_file() and not entry.name.endswith('.tmp')]
+    except FileNotFoundError:
+        return
+    for path in sorted(paths, key=os.path.getmtime)[:-keep]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def export_to_disk(name, extension, write):
+    """Executa `write(arquivo)` gravando em disco (escrita atômica); retorna (caminho, retorno de write)"""
+    os.makedirs(export_dir(), exist_ok=True)
+    safe_name = re.sub(r'[^\w.-]+', '_', name)
+    path = os.path.join(export_dir(), f"{safe_name}_{datetime.now():%Y%m%d_%H%M%S_%f}.{extension}")
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            value = write(f)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    prune_exports()
+    return path, value
+
+def export_table(name, frames, fmt, schema=None):
+    """Exporta blocos de uma tabela no formato escolhido; retorna (caminho, linhas)"""
+    return export_to_disk(name, FORMATS[fmt][0], lambda f: write_frames(frames, fmt, f, schema))
+
+def export_results(results):
+    """Exporta os resultados estruturados das análises em JSON; retorna o caminho"""
+    return export_to_disk('resultados_sisade', 'json', lambda f: write_results_json(results, f))[0]
@@ -0,0 +1,203 @@
+import inspect
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import streamlit as st
+
+import config
+
+# Estados que ainda ocupam vaga nos limites: uma tarefa cancelada continua contando
+# até a thread ou o processo realmente terminar
+ACTIVE_STATUSES = ('queued', 'running', 'cancelling')
+
+class JobCancelled(Exception):
+    """Interrompe uma tarefa cancelada pelo usuário"""
+
+class JobHandle:
+    """Progresso e cancelamento de uma tarefa, visíveis da thread que a executa"""
+
+    def __init__(self, job_id, name, owner, result_key, params, use_process, session_id=None):
+        self.id = job_id
+        self.name = name
+        self.owner = owner
+        self.session_id = session_id
+        self.result_key = result_key
+        self.params = params
+        self.use_process = use_process
+        self.progress = 0.0
+        self.message = "Na fila"
+        self.created_at = time.time()
+        self.future = None
+        self._cancel_event = threading.Event()
+
+    def update(self, progress, message=None):
+        """Atualiza o progresso (0 a 1) e interrompe a tarefa se ela foi cancelada"""
+        self.check_cancelled()
+        self.progress = min(max(progress, 0.0), 1.0)
+        if message:
+            self.message = message
+
+    def check_cancelled(self):
+        """Lança JobCancelled se o cancelamento foi pedido"""
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+
+    def cancel(self):
+        """Pede o cancelamento (imediato na fila; cooperativo durante a execução)"""
+        self._cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    @property
+    def status(self):
+        if self.cancelled:
+            return 'cancelled' if self.future is None or self.future.done() else 'cancelling'
+        if self.future is None or not self.future.done():
+            return 'running' if self.future is not None and self.future.running() else 'queued'
+        return 'failed' if self.future.exception() is not None else 'done'
+
+class JobManager:
+    """Pools de threads e processos compartilhados por todas as sessões, com limites de tarefas"""
+
+    def __init__(self):
+        self.threads = ThreadPoolExecutor(max_workers=config.JOB_THREAD_WORKERS, thread_name_prefix="sisade-job")
+        self._processes = None
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    @property
+    def processes(self):
+        # Criado só no primeiro uso; spawn evita herdar as threads do servidor
+        if self._processes is None:
+            self._processes = ProcessPoolExecutor(
+                max_workers=min(config.JOB_PROCESS_WORKERS, os.cpu_count() or 1),
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._processes
+
+    def active_jobs(self, owner=None):
+        """Tarefas na fila ou em execução (de uma sessão ou de todas)"""
+        return [job for job in self.jobs.values()
+                if job.status in ACTIVE_STATUSES and (owner is None or job.owner == owner)]
+
+    def prune_closed_sessions(self):
+        """Cancela as tarefas de sessões encerradas e descarta as que já terminaram (e seus resultados)"""
+        from streamlit.runtime import Runtime
+        if not Runtime.exists():
+            return
+        runtime = Runtime.instance()
+        with self.lock:
+            for job in list(self.jobs.values()):
+                if job.session_id is None or runtime.is_active_session(job.session_id):
+                    continue
+                if job.future.done():
+                    del self.jobs[job.id]
+                else:
+                    job.cancel()
+
+    def submit(self, owner, name, fn, *args, result_key=None, params=None, use_process=False, session_id=None,
+               **kwargs):
+        """Agenda uma função; ela recebe o JobHandle em `job` se aceitar esse parâmetro"""
+        self.prune_closed_sessions()
+        with self.lock:
+            if len(self.active_jobs(owner)) >= config.JOB_MAX_PER_SESSION:
+                raise Exception(f"Erro ao agendar tarefa: limite de {config.JOB_MAX_PER_SESSION} tarefas por sessão atingido")
+            if len(self.active_jobs()) >= config.JOB_MAX_TOTAL:
+                raise Exception("Erro ao agendar tarefa: servidor ocupado, tente novamente em instantes")
+
+            job = JobHandle(uuid.uuid4().hex[:8], name, owner, result_key, params, use_process, session_id)
+            if use_process:
+                # Processos não compartilham o JobHandle: o progresso só muda ao terminar
+                job.future = self.processes.submit(fn, *args, **kwargs)
+            else:
+                job.future = self.threads.submit(self._run, job, fn, args, kwargs)
+            job.message = "Em execução"
+            self.jobs[job.id] = job
+        return job
+
+    @staticmethod
+    def _run(job, fn, args, kwargs):
+        """Executa a função na thread, repassando o JobHandle quando suportado"""
+        job.check_cancelled()
+        if 'job' in inspect.signature(fn).parameters:
+            kwargs = {**kwargs, 'job': job}
+        result = fn(*args, **kwargs)
+        job.progress = 1.0
+        return result
+
+    def pop(self, job_id):
+        """Remove uma tarefa terminada do registro"""
+        with self.lock:
+            return self.jobs.pop(job_id, None)
+
+@st.cache_resource(show_spinner=False)
+def get_job_manager():
+    """Gerenciador de tarefas único por processo (sobrevive a reruns e trocas de página)"""
+    return JobManager()
+
+def session_owner():
+    """Identificador da sessão atual, usado para os limites por usuário"""
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    return st.session_state.session_id
+
+def submit_job(name, fn, *args, result_key=None, params=None, use_process=False, **kwargs):
+    """Agenda uma análise em segundo plano para a sessão atual; retorna o id da tarefa"""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    job = get_job_manager().submit(session_owner(), name, fn, *args, result_key=result_key, params=params,
+                                   use_process=use_process, session_id=ctx.session_id if ctx else None, **kwargs)
+    st.session_state.setdefault('jobs', []).append(job.id)
+    return job.id
+
+def session_jobs():
+    """Tarefas da sessão atual ainda registradas no gerenciador"""
+    manager = get_job_manager()
+    return [manager.jobs[job_id] for job_id in st.session_state.get('jobs', []) if job_id in manager.jobs]
+
+def cancel_job(job_id):
+    """Cancela uma tarefa da sessão atual"""
+    job = get_job_manager().jobs.get(job_id)
+    if job is not None and job.owner == session_owner():
+        job.cancel()
+
+def collect_jobs():
+    """Entrega em analysis_results os resultados das tarefas terminadas; retorna as finalizadas"""
+    manager = get_job_manager()
+    manager.prune_closed_sessions()
+    finished = []
+    for job in session_jobs():
+        status = job.status
+        if status in ACTIVE_STATUSES:
+            continue
+
+        manager.pop(job.id)
+        st.session_state.jobs.remove(job.id)
+        entry = {'id': job.id, 'name': job.name, 'status': status, 'result_key': job.result_key}
+
+        if status == 'done':
+            result = job.future.result()
+            if job.result_key is None:
+                st.session_state.analysis_results.update(result)
+            else:
+                st.session_state.analysis_results[job.result_key] = result
+                if job.params is not None:
+                    st.session_state.setdefault('analysis_params', {})[job.result_key] = job.params
+        elif status == 'failed' and not isinstance(job.future.exception(), JobCancelled):
+            entry['error'] = str(job.future.exception())
+        elif status == 'failed':
+            entry['status'] = 'cancelled'
+
+        finished.append(entry)
+        history = st.session_state.setdefault('job_history', [])
+        history.insert(0, entry)
+        del history[config.JOB_HISTORY_SIZE:]
+    return finished
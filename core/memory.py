@@ -0,0 +1,280 @@
+import os
+import shutil
+import sys
+import threading
+import time
+import weakref
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import config
+
+# Caches derivados: descartados quando falta memória (as páginas os recalculam sob demanda)
+DERIVED_KEYS = (
+    'cohort_cache', 'exploration_sample', 'schema_cache', 'missingness_cache', 'validation_cache',
+    'screening_cache', 'parametric_cache', 'epicurve_cache', 'permutation_cache', 'evaluation_cache'
+)
+# Artefatos primários: gravados em disco e recarregados no próximo rerun da sessão
+SPILLABLE_KEYS = ('df', 'predictive_model', 'analysis_results')
+
+MB = 1024 ** 2
+
+# Tamanho dos DataFrames já medidos (id -> (referência fraca, bytes)); memory_usage(deep=True) é caro
+_frame_sizes = {}
+_frame_lock = threading.Lock()
+
+def frame_size(df):
+    """Memória do DataFrame (com o conteúdo das colunas de texto), medida uma vez por objeto"""
+    key = (id(df), df.shape)
+    with _frame_lock:
+        cached = _frame_sizes.get(key)
+        if cached is not None and cached[0]() is df:
+            return cached[1]
+    size = int(df.memory_usage(deep=True, index=True).sum())
+    with _frame_lock:
+        for stale in [k for k, (ref, _) in _frame_sizes.items() if ref() is None]:
+            del _frame_sizes[stale]
+        _frame_sizes[key] = (weakref.ref(df), size)
+    return size
+
+def estimate_size(obj, seen=None):
+    """Estimativa (bytes) da memória de um objeto e do que ele referencia"""
+    # id -> objeto: manter a referência impede que temporários (ex.: __getstate__) reaproveitem ids
+    seen = {} if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen[id(obj)] = obj
+
+    if isinstance(obj, pd.DataFrame):
+        return frame_size(obj)
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        # Visões de um array já contado não somam de novo
+        return 0 if isinstance(obj.base, np.ndarray) and id(obj.base) in seen else obj.nbytes
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(estimate_size(k, seen) + estimate_size(v, seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(estimate_size(item, seen) for item in obj)
+    if isinstance(obj, (str, bytes, int, float, bool, type(None), np.generic)):
+        return sys.getsizeof(obj)
+    if isinstance(obj, weakref.ref):
+        return sys.getsizeof(obj)
+    # Modelos e demais objetos: atributos de instância ou estado serializável
+    # (ex.: coeficientes do scikit-learn e os nós das árvores, que são objetos Cython)
+    state = getattr(obj, '__dict__', None)
+    if state is None:
+        try:
+            state = obj.__getstate__()
+        except Exception:
+            state = None
+    return sys.getsizeof(obj) + (estimate_size(state, seen) if state is not None else 0)
+
+def spill_dir(session_id):
+    """Pasta dos artefatos de uma sessão gravados em disco"""
+    return os.path.join(config.CACHE_DIR, 'spill', session_id)
+
+def spill_value(session_id, key, value):
+    """Grava um artefato em disco (DataFrame em Parquet, demais com joblib); retorna o caminho"""
+    import joblib
+
+    folder = spill_dir(session_id)
+    os.makedirs(folder, exist_ok=True)
+    if isinstance(value, pd.DataFrame):
+        path = os.path.join(folder, f"{key}.parquet")
+        try:
+            # O índice é mantido: as linhas citadas na validação e nas exportações continuam as mesmas
+            value.to_parquet(path + '.tmp', index=True)
+            os.replace(path + '.tmp', path)
+            return path
+        except (TypeError, ValueError, ImportError):
+            # Colunas de objetos mistos não cabem no Parquet
+            pass
+    path = os.path.join(folder, f"{key}.joblib")
+    joblib.dump(value, path + '.tmp')
+    os.replace(path + '.tmp', path)
+    return path
+
+def load_spilled(path):
+    """Recarrega um artefato gravado em disco"""
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    import joblib
+    return joblib.load(path)
+
+class MemoryGovernor:
+    """Contabiliza a memória das sessões e aplica os orçamentos por sessão e do servidor"""
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.RLock()
+
+    def _entry(self, session_id):
+        return self._sessions.setdefault(session_id, {
+            'state': None,
+            'last_active': 0.0,
+            'running': False,
+            'sizes': {},        # chave -> (assinatura, bytes, último uso)
+            'spilled': {},      # chave -> (caminho, bytes)
+            'evicted': 0        # caches derivados descartados
+        })
+
+    def begin_run(self, session_id, state):
+        """Início de um rerun: marca a sessão como ativa e recarrega o que foi para o disco"""
+        with self._lock:
+            entry = self._entry(session_id)
+            entry['state'], entry['running'], entry['last_active'] = state, True, time.time()
+            spilled, entry['spilled'] = entry['spilled'], {}
+        for key, (path, _) in spilled.items():
+            try:
+                state[key] = load_spilled(path)
+                os.remove(path)
+            except (OSError, ValueError) as e:
+                # Arquivo perdido: o artefato é descartado (a sessão volta ao estado sem ele)
+                state[key] = {} if key == 'analysis_results' else None
+                st.warning(f"Não foi possível recarregar '{key}' do disco: {str(e)}")
+
+    def end_run(self, session_id):
+        """Fim de um rerun: mede a sessão e aplica os orçamentos"""
+        with self._lock:
+            entry = self._entry(session_id)
+            self._measure(entry)
+            entry['running'], entry['last_active'] = False, time.time()
+            # A sessão em uso só perde caches derivados: gravar o df em disco aqui obrigaria
+            # a relê-lo (e recalcular sua impressão digital) a cada interação
+            budget = config.MEMORY_SESSION_BUDGET_MB * MB
+            if self.resident(entry) > budget:
+                self._release(session_id, entry, self._target(budget), spill=False)
+            self._enforce_idle(session_id)
+            self._enforce_global(session_id)
+            self._prune_sessions()
+
+    @staticmethod
+    def _target(budget):
+        """Alvo ao liberar: abaixo do orçamento, para não alternar gravação e recarga a cada rerun"""
+        return budget * (1 - config.MEMORY_RELEASE_MARGIN)
+
+    def _is_idle(self, entry, now):
+        """Sessão sem rerun há algum tempo (ou com rerun interrompido há muito)"""
+        if entry['state'] is None:
+            return False
+        if entry['running']:
+            return entry['last_active'] < now - config.MEMORY_STALE_RUN_SECONDS
+        return entry['last_active'] < now - config.MEMORY_IDLE_SECONDS
+
+    def _measure(self, entry):
+        """Atualiza o tamanho dos artefatos que mudaram desde o último rerun"""
+        state, sizes, now = entry['state'], entry['sizes'], time.time()
+        for key in DERIVED_KEYS + SPILLABLE_KEYS:
+            value = state[key] if key in state else None
+            if value is None or key in entry['spilled']:
+                sizes.pop(key, None)
+                continue
+            # DataFrames já medidos não são percorridos de novo; só o que mudou renova o último uso
+            size = estimate_size(value)
+            if key not in sizes or sizes[key][0] != (id(value), size):
+                sizes[key] = ((id(value), size), size, now)
+
+    def _release(self, session_id, entry, budget, spill=True):
+        """Descarta caches derivados e depois, se permitido, grava primários em disco (menos recentes primeiro)"""
+        resident = sum(size for _, size, _ in entry['sizes'].values())
+        if resident <= budget:
+            return 0
+        state, freed = entry['state'], 0
+        candidates = sorted(entry['sizes'].items(), key=lambda item: (item[0] in SPILLABLE_KEYS, item[1][2]))
+        for key, (_, size, _) in candidates:
+            if resident - freed <= budget:
+                break
+            if key in SPILLABLE_KEYS:
+                if not spill or size < config.MEMORY_SPILL_MIN_MB * MB:
+                    continue
+                entry['spilled'][key] = (spill_value(session_id, key, state[key]), size)
+                # O marcador impede que o artefato seja usado antes de ser recarregado
+                state[key] = None
+            else:
+                del state[key]
+                entry['evicted'] += 1
+            del entry['sizes'][key]
+            freed += size
+        return freed
+
+    def _enforce_idle(self, current):
+        """Grava em disco os primários das sessões ociosas acima do orçamento por sessão"""
+        budget, now = config.MEMORY_SESSION_BUDGET_MB * MB, time.time()
+        for session_id, entry in self._sessions.items():
+            if session_id != current and self._is_idle(entry, now) and self.resident(entry) > budget:
+                self._release(session_id, entry, self._target(budget))
+
+    def _enforce_global(self, current):
+        """Libera as sessões menos recentes até caber no orçamento do servidor (a atual só perde caches)"""
+        budget, now = config.MEMORY_GLOBAL_BUDGET_MB * MB, time.time()
+        total = sum(self.resident(entry) for entry in self._sessions.values())
+        if total <= budget:
+            return
+        target = self._target(budget)
+        candidates = sorted(((sid, entry) for sid, entry in self._sessions.items()
+                             if sid == current or (entry['state'] is not None and
+                                                   (not entry['running'] or self._is_idle(entry, now)))),
+                            key=lambda item: item[1]['last_active'])
+        for session_id, entry in candidates:
+            if total <= target:
+                break
+            total -= self._release(session_id, entry, max(self.resident(entry) - (total - target), 0),
+                                   spill=session_id != current)
+
+    def _prune_sessions(self):
+        """Esquece as sessões encerradas e apaga os arquivos delas"""
+        from streamlit.runtime import Runtime
+        if not Runtime.exists():
+            return
+        runtime = Runtime.instance()
+        for session_id in [sid for sid in self._sessions if not runtime.is_active_session(sid)]:
+            entry = self._sessions.pop(session_id)
+            if entry['spilled']:
+                shutil.rmtree(spill_dir(session_id), ignore_errors=True)
+
+    @staticmethod
+    def resident(entry):
+        """Bytes em memória de uma sessão"""
+        return sum(size for _, size, _ in entry['sizes'].values())
+
+    def usage(self, session_id):
+        """Uso da sessão e do servidor para exibição"""
+        with self._lock:
+            entry = self._entry(session_id)
+            return {
+                'session': self.resident(entry),
+                'session_budget': config.MEMORY_SESSION_BUDGET_MB * MB,
+                'total': sum(self.resident(e) for e in self._sessions.values()),
+                'global_budget': config.MEMORY_GLOBAL_BUDGET_MB * MB,
+                'sessions': len(self._sessions),
+                'largest': sorted(((key, size) for key, (_, size, _) in entry['sizes'].items()),
+                                  key=lambda item: -item[1])[:3],
+                'spilled': {key: size for key, (_, size) in entry['spilled'].items()},
+                'evicted': entry['evicted']
+            }
+
+@st.cache_resource
+def get_memory_governor():
+    """Governador de memória compartilhado por todas as sessões do servidor"""
+    return MemoryGovernor()
+
+def _current_session():
+    """Id e estado (seguro entre threads) da sessão em execução"""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    return ctx.session_id, ctx.session_state
+
+def begin_session_run():
+    """Recarrega os artefatos da sessão gravados em disco (chamar no início do rerun)"""
+    session_id, state = _current_session()
+    get_memory_governor().begin_run(session_id, state)
+
+def end_session_run():
+    """Mede a sessão e aplica os orçamentos de memória; retorna o uso atual"""
+    session_id, _ = _current_session()
+    governor = get_memory_governor()
+    governor.end_run(session_id)
+    return governor.usage(session_id)
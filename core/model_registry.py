@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+import weakref
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import config
+
+REGISTRY_DIR = os.path.join(config.CACHE_DIR, 'models')
+MODEL_FILE = 'model.joblib'
+METADATA_FILE = 'metadata.json'
+
+def dataset_fingerprint(df):
+    """Impressão digital do conteúdo do DataFrame (colunas, tipos e valores)"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([[str(col), str(dtype)] for col, dtype in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+def get_dataset_fingerprint(df):
+    """Impressão digital com cache na sessão (calculada uma vez por DataFrame)"""
+    cache = st.session_state.setdefault('fingerprint_cache', {})
+    key = (id(df), len(df))
+    # A referência fraca confirma que o id não foi reaproveitado por outro DataFrame (ex.: coortes descartadas)
+    if key not in cache or cache[key][0]() is not df:
+        for stale in [k for k, (ref, _) in cache.items() if ref() is None]:
+            del cache[stale]
+        cache[key] = (weakref.ref(df), dataset_fingerprint(df))
+    return cache[key][1]
+
+def _model_dir(model_id):
+    """Pasta de um modelo registrado"""
+    return os.path.join(REGISTRY_DIR, model_id)
+
+def _to_json(value):
+    """Converte tipos do numpy/pandas para JSON"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Index, np.ndarray)):
+        return value.tolist()
+    return str(value)
+
+def save_model(bundle, metadata):
+    """Salva modelo e pré-processamento (joblib, sem compressão) e metadados"""
+    model_id = f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+    folder = _model_dir(model_id)
+    tmp_folder = folder + '.tmp'
+    os.makedirs(tmp_folder, exist_ok=True)
+
+    metadata = {'id': model_id, 'created_at': datetime.now().isoformat(timespec='seconds'), **metadata}
+    joblib.dump(bundle, os.path.join(tmp_folder, MODEL_FILE))
+    metadata['size_mb'] = os.path.getsize(os.path.join(tmp_folder, MODEL_FILE)) / 1024 ** 2
+    with open(os.path.join(tmp_folder, METADATA_FILE), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2, default=_to_json)
+
+    # A pasta só aparece no registro quando está completa
+    os.replace(tmp_folder, folder)
+    return model_id
+
+def list_models():
+    """Lista os metadados dos modelos registrados, do mais recente ao mais antigo"""
+    if not os.path.isdir(REGISTRY_DIR):
+        return []
+
+    models = []
+    for model_id in os.listdir(REGISTRY_DIR):
+        path = os.path.join(_model_dir(model_id), METADATA_FILE)
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                models.append(json.load(f))
+    return sorted(models, key=lambda m: m['created_at'], reverse=True)
+
+def compare_models(models):
+    """Tabela comparativa de métricas e hiperparâmetros"""
+    rows = []
+    for meta in models:
+        row = {
+            'id': meta['id'],
+            'alvo': meta['target_col'],
+            'tipo': meta['model_type'],
+            'algoritmo': meta['params'].get('engine', 'random_forest'),
+            'dataset': meta['dataset_fingerprint'],
+            'linhas': meta['n_rows'],
+            'tamanho_mb': round(meta['size_mb'], 2)
+        }
+        row.update({f"param_{k}": v for k, v in meta['params'].items() if k != 'engine'})
+        row.update(meta['metrics'])
+        rows.append(row)
+    return pd.DataFrame(rows).set_index('id') if rows else pd.DataFrame()
+
+@st.cache_resource(show_spinner=False, max_entries=config.MODEL_REGISTRY_MAX_LOADED)
+def load_model(model_id):
+    """Carrega um modelo registrado (cache LRU do processo, compartilhado pelas sessões deste servidor)"""
+    path = os.path.join(_model_dir(model_id), MODEL_FILE)
+    if not os.path.exists(path):
+        raise Exception(f"Erro ao carregar modelo: {model_id} não encontrado no registro")
+    # Sem mmap_mode: o scikit-learn copia os nós das árvores para memória própria ao desserializar,
+    # então cada processo mantém sua cópia (ver tools/benchmarks/model_mmap_check.py)
+    return joblib.load(path)
+
+def tree_arrays_mapped(model):
+    """Indica se os arrays das árvores (nós e valores) do modelo estão mapeados do disco"""
+    estimators = getattr(model, 'estimators_', None)
+    if estimators is None:
+        return False
+    trees = [estimator.tree_ for estimator in np.ravel(estimators) if hasattr(estimator, 'tree_')]
+    return bool(trees) and all(isinstance(tree.value, np.memmap) and
+                               isinstance(tree.__getstate__()['nodes'], np.memmap) for tree in trees)
+
+def delete_model(model_id):
+    """Remove um modelo do registro"""
+    shutil.rmtree(_model_dir(model_id), ignore_errors=True)
@@ -1,91 +1,178 @@
 from datetime import datetime
-import base64
-import streamlit as st
+from textwrap import dedent
+
+from core.schema import get_schema
 
 def generate_report(analysis_results, df):
-    """Gera um relatório completo"""
-    st.subheader("📄 Relatório Executivo")
+    """Gera um relatório completo em Markdown"""
+    lines = []
     
     # Cabeçalho do relatório
-    st.markdown(f"""
+    lines.append(dedent(f"""
     # Relatório de Análise de Dados
     **Data:** {datetime.now().strftime("%d/%m/%Y %H:%M")}  
     **Dataset:** {df.shape[0]} linhas, {df.shape[1]} colunas  
     **Tipo de dados:** {analysis_results['data_info']['data_type']}  
     **Problema identificado:** {analysis_results['data_info']['problem_type']}  
-    """)
+    """))
+    
+    sampled = [name for name, res in analysis_results.items() if isinstance(res, dict) and 'sample' in res]
+    if sampled:
+        lines.append(f"*⚠️ Seções estimadas em amostra estratificada (não recalculadas): {', '.join(sampled)}*")
+    
+    cohorts = {res['cohort']['name']: res['cohort'] for res in analysis_results.values()
+               if isinstance(res, dict) and 'cohort' in res}
+    for name, cohort in cohorts.items():
+        lines.append(f"*👥 Coorte {name} ({cohort['size']:,} de {cohort['population']:,} registros): "
+                     f"{'; '.join(cohort['conditions'])}*")
     
     # Sumário executivo
-    st.markdown("## 📌 Sumário Executivo")
+    lines.append("## 📌 Sumário Executivo")
     
     if 'interpretation' in analysis_results['data_info']:
-        st.write(analysis_results['data_info']['interpretation'])
+        lines.append(analysis_results['data_info']['interpretation'])
     
     # Análise descritiva
-    st.markdown("## 📊 Análise Descritiva")
+    lines.append("## 📊 Análise Descritiva")
     
     if 'descriptive' in analysis_results:
         desc = analysis_results['descriptive']
-        st.write(f"- **Total de registros:** {desc['shape'][0]}")
-        st.write(f"- **Variáveis numéricas:** {desc['numeric_columns']}")
-        st.write(f"- **Variáveis categóricas:** {desc['categorical_columns']}")
-        st.write(f"- **Valores ausentes:** {desc['missing_values']}")
-        st.write(f"- **Duplicatas:** {desc['duplicates']}")
+        lines.append(f"- **Total de registros:** {desc['shape'][0]}")
+        lines.append(f"- **Variáveis numéricas:** {desc['numeric_columns']}")
+        lines.append(f"- **Variáveis categóricas:** {desc['categorical_columns']}")
+        lines.append(f"- **Valores ausentes:** {desc['missing_values']}")
+        lines.append(f"- **Duplicatas:** {desc['duplicates']}")
+        
+        missingness = desc.get('missingness')
+        if missingness and missingness['n_patterns'] > 1:
+            lines.append(f"- **Padrões de ausência:** {missingness['n_patterns']} "
+                     f"({missingness['complete_rows']:.1%} dos registros completos)")
+            mcar = missingness.get('mcar')
+            if mcar and mcar['p_value'] is not None:
+                lines.append(f"- **Teste MCAR de Little:** χ² = {mcar['statistic']:.2f} ({mcar['df']} g.l.), "
+                         f"p = {mcar['p_value']:.4f}")
+    
+    # Papéis das colunas (índice de esquema)
+    schema = get_schema(df)
+    roles = {'Tempo': 'time', 'Evento': 'event', 'Data': 'date', 'Idade': 'age', 'Identificadores': 'id'}
+    role_lines = [f"- **{label}:** {', '.join(columns)}"
+                  for label, role in roles.items() if (columns := schema.index[schema[role].astype(bool)].tolist())]
+    if role_lines:
+        lines.append("**Papéis das colunas:**")
+        lines.append("\n".join(role_lines))
     
     # Análise preditiva
     if 'predictive' in analysis_results:
-        st.markdown("## 🤖 Análise Preditiva")
+        lines.append("## 🤖 Análise Preditiva")
         
         pred = analysis_results['predictive']
-        st.write(f"- **Tipo de modelo:** {pred['model_type']}")
+        lines.append(f"- **Tipo de modelo:** {pred['model_type']}")
         
         if pred['model_type'] == "Classificação":
-            st.write(f"- **Acurácia:** {pred['metrics']['accuracy']:.3f}")
-            st.write(f"- **Precisão:** {pred['metrics']['precision']:.3f}")
-            st.write(f"- **Recall:** {pred['metrics']['recall']:.3f}")
-            st.write(f"- **F1-Score:** {pred['metrics']['f1']:.3f}")
+            lines.append(f"- **Acurácia:** {pred['metrics']['accuracy']:.3f}")
+            lines.append(f"- **Precisão:** {pred['metrics']['precision']:.3f}")
+            lines.append(f"- **Recall:** {pred['metrics']['recall']:.3f}")
+            lines.append(f"- **F1-Score:** {pred['metrics']['f1']:.3f}")
+            if 'evaluation' in pred:
+                evaluation = pred['evaluation']
+                lines.append(f"\n**Discriminação e calibração** (IC {evaluation['ci_level']:.0%} por bootstrap, "
+                             f"{evaluation['n_bootstrap']} reamostras):")
+                from analysis.evaluation import METRIC_LABELS
+                for name in ('roc_auc', 'average_precision', 'brier', 'ece'):
+                    metric = evaluation['metrics'].get(name)
+                    if metric is None:
+                        continue
+                    interval = f" ({metric['lower']:.3f}–{metric['upper']:.3f})" if metric['lower'] is not None else ""
+                    lines.append(f"- **{METRIC_LABELS[name]}:** {metric['value']:.3f}{interval}")
         else:
-            st.write(f"- **R² Score:** {pred['metrics']['r2']:.3f}")
-            st.write(f"- **RMSE:** {pred['metrics']['rmse']:.3f}")
-            st.write(f"- **MAE:** {pred['metrics']['mae']:.3f}")
+            lines.append(f"- **R² Score:** {pred['metrics']['r2']:.3f}")
+            lines.append(f"- **RMSE:** {pred['metrics']['rmse']:.3f}")
+            lines.append(f"- **MAE:** {pred['metrics']['mae']:.3f}")
         
-        st.write("\n**Variáveis mais importantes:**")
-        for i, (feature, imp) in enumerate(pred['feature_importance']['feature_importance'].items()):
+        lines.append("\n**Variáveis mais importantes:**")
+        ranking = zip(pred['feature_importance']['feature'].values(), pred['feature_importance']['importance'].values())
+        for i, (feature, imp) in enumerate(ranking):
             if i >= 5: break
-            st.write(f"- {feature}: {imp:.3f}")
+            lines.append(f"- {feature}: {imp:.3f}")
+        
+        if 'permutation_importance' in pred:
+            lines.append("\n**Variáveis mais importantes (permutação):**")
+            for feature, imp in list(pred['permutation_importance'].items())[:5]:
+                lines.append(f"- {feature}: {imp:.3f}")
     
     # Análise de sobrevivência
     if 'survival' in analysis_results:
-        st.markdown("## ⏳ Análise de Sobrevivência")
+        lines.append("## ⏳ Análise de Sobrevivência")
         
         surv = analysis_results['survival']
-        st.write(f"- **Tempo mediano de sobrevivência:** {surv['median_survival']:.1f} dias")
-        st.write("- **Probabilidades de sobrevivência:**")
+        lines.append(f"- **Tempo mediano de sobrevivência:** {surv['median_survival']:.1f} dias")
+        lines.append("- **Probabilidades de sobrevivência:**")
         for time, prob in surv['survival_probabilities'].items():
-            st.write(f"  - {time} dias: {prob:.2%}")
-        st.write(f"- **Eventos observados:** {surv['num_events']}")
-        st.write(f"- **Dados censurados:** {surv['num_censored']}")
+            lines.append(f"  - {time} dias: {prob:.2%}")
+        lines.append(f"- **Eventos observados:** {surv['num_events']}")
+        lines.append(f"- **Dados censurados:** {surv['num_censored']}")
+    
+    if analysis_results.get('parametric_survival'):
+        lines.append("### 📐 Modelos Paramétricos de Sobrevivência")
+        
+        param = analysis_results['parametric_survival']
+        lines.append(f"- **Melhor ajuste (AIC):** {param['best_model_aic']}")
+        for name, criteria in param['ranking'].items():
+            lines.append(f"  - {name}: AIC {criteria['AIC']:.1f}, BIC {criteria['BIC']:.1f}")
+    
+    # Indicadores epidemiológicos
+    if 'epidemiology' in analysis_results:
+        lines.append("## 🧪 Indicadores Epidemiológicos")
+        
+        epi = analysis_results['epidemiology']
+        crude = epi['crude_rate']
+        lines.append(f"- **Taxa bruta:** {crude['rate']:.2f} por {epi['multiplier']:,} "
+                 f"(IC 95%: {crude['ci_lower']:.2f} – {crude['ci_upper']:.2f})")
+        for row in epi.get('mantel_haenszel', []):
+            lines.append(f"- **RR combinado (Mantel-Haenszel):** {row['risk_ratio_mh']:.2f} "
+                     f"(IC 95%: {row['rr_ci_lower']:.2f} – {row['rr_ci_upper']:.2f})")
+        for row in epi.get('age_standardized', []):
+            label = next(str(v) for k, v in row.items() if k not in ('n', 'events', 'standardized_rate', 'crude_rate', 'ci_lower', 'ci_upper', 'missing_bands'))
+            missing = f"; {int(row['missing_bands'])} faixa(s) etária(s) sem registros" if row.get('missing_bands') else ""
+            lines.append(f"- **Taxa padronizada por idade ({label}):** {row['standardized_rate']:.2f} "
+                     f"(bruta: {row['crude_rate']:.2f}{missing})")
+    
+    # Triagem univariada
+    if 'screening' in analysis_results:
+        lines.append("## 🔬 Triagem Univariada")
+        
+        screening = analysis_results['screening']
+        lines.append(f"- **Desfecho:** {screening['outcome']}")
+        lines.append(f"- **Variáveis testadas:** {screening['n_tested']}; significativas após FDR "
+                     f"(q < {screening['alpha']}): {screening['n_significant']}")
+        for row in screening['significant'][:5]:
+            lines.append(f"  - {row['variavel']} ({row['teste']}): p = {row['p_valor']:.2e}, q = {row['q_valor']:.2e}")
+    
+    # Curva epidêmica
+    if 'epicurve' in analysis_results:
+        lines.append("## 📅 Curva Epidêmica")
+        
+        curve = analysis_results['epicurve']
+        lines.append(f"- **Período:** {curve['start']} a {curve['end']} ({curve['granularity'].lower()})")
+        lines.append(f"- **Total de casos:** {curve['total_cases']:,}")
+        lines.append(f"- **Pico:** {curve['peak_cases']:,} casos em {curve['peak_period']}")
+        if curve['last_growth_rate'] is not None:
+            lines.append(f"- **Crescimento recente (média móvel):** {curve['last_growth_rate']:.1f}%")
     
     # Conclusões e recomendações
-    st.markdown("## 🎯 Conclusões e Recomendações")
+    lines.append("## 🎯 Conclusões e Recomendações")
     
     if 'interpretation' in analysis_results:
-        st.write(analysis_results['interpretation'])
+        lines.append(analysis_results['interpretation'])
     else:
-        st.write("""
+        lines.append(dedent("""
         - Realizar análises complementares para confirmar os achados
         - Considerar a coleta de dados adicionais para melhorar a qualidade da análise
         - Validar os modelos preditivos com novos conjuntos de dados
-        """)
+        """))
     
     # Rodapé
-    st.markdown("""
-    ---
-    *Relatório gerado automaticamente pelo SISADE - Sistema de Inteligência Estatística para Análise de Dados Epidemiológicos*
-    """)
-    
-    # Opção para baixar o relatório
-    report_text = str(analysis_results)
-    b64 = base64.b64encode(report_text.encode()).decode()
-    href = f'<a href="data:file/txt;base64,{b64}" download="relatorio_sisade_{datetime.now().strftime("%Y%m%d")}.txt">⬇️ Baixar Relatório (TXT)</a>'
-    st.markdown(href, unsafe_allow_html=True)
\ No newline at end of file
+    lines.append("---")
+    lines.append("*Relatório gerado automaticamente pelo SISADE - Sistema de Inteligência Estatística para Análise de Dados Epidemiológicos*")
+    
+    return "\n\n".join(line.strip("\n") for line in lines)
@@ -0,0 +1,225 @@
+import numpy as np
+import streamlit as st
+
+from core.cohort import get_cohort_df, cohort_info
+from core.jobs import submit_job
+from core.model_registry import get_dataset_fingerprint
+from core.schema import columns_with
+import config
+
+def stratified_sample(df, strata_cols, n, random_state=config.DEFAULT_RANDOM_STATE):
+    """Amostra estratificada com alocação proporcional ao tamanho de cada estrato"""
+    if n >= len(df):
+        return df
+
+    rng = np.random.default_rng(random_state)
+    if not strata_cols:
+        positions = np.sort(rng.choice(len(df), size=n, replace=False))
+        return df.iloc[positions]
+
+    codes = df.groupby(list(strata_cols), dropna=False, observed=True, sort=False).ngroup().to_numpy()
+    sizes = np.bincount(codes)
+    quotas = np.minimum(sizes, np.maximum(1, np.round(sizes * n / len(df)))).astype(int)
+
+    # Ordena por estrato e, dentro dele, aleatoriamente; mantém as primeiras posições de cada um
+    order = np.lexsort((rng.random(len(df)), codes))
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    rank = np.empty(len(df), dtype=np.int64)
+    rank[order] = np.arange(len(df)) - starts[codes[order]]
+
+    return df.iloc[np.flatnonzero(rank < quotas[codes])]
+
+def finite_population_correction(sample_size, population_size):
+    """Fator de correção para população finita (None = população infinita)"""
+    if population_size is None:
+        return 1.0
+    if population_size <= 1 or sample_size >= population_size:
+        return 0.0
+    return np.sqrt((population_size - sample_size) / (population_size - 1))
+
+def mean_confidence_interval(series, population_size, confidence=0.95):
+    """Média amostral com intervalo de confiança (com correção para população finita)"""
+    values = series.dropna().astype(float)
+    n = len(values)
+    if n < 2:
+        return np.nan, np.nan, np.nan
+
+    from scipy import stats
+
+    mean = values.mean()
+    se = values.std(ddof=1) / np.sqrt(n) * finite_population_correction(n, population_size)
+    margin = stats.t.ppf((1 + confidence) / 2, n - 1) * se
+    return mean, mean - margin, mean + margin
+
+def proportion_confidence_interval(p, n, population_size, confidence=0.95):
+    """Proporção com intervalo de confiança normal (com correção para população finita)"""
+    if n == 0:
+        return np.nan, np.nan
+    from scipy import stats
+
+    se = np.sqrt(p * (1 - p) / n) * finite_population_correction(n, population_size)
+    margin = stats.norm.ppf((1 + confidence) / 2) * se
+    return max(0.0, p - margin), min(1.0, p + margin)
+
+def default_strata_columns(df):
+    """Sugere colunas de estratificação (sexo e desfecho)"""
+    keywords = ('sexo', 'obito', 'evento', 'status')
+    return [col for col in strata_candidates(df) if any(k in col.lower() for k in keywords)]
+
+def strata_candidates(df):
+    """Colunas categóricas de baixa cardinalidade aptas a estratificar a amostra"""
+    return columns_with('stratum', df)
+
+def is_exploration_active():
+    """Indica se o modo exploratório está ligado e a população é maior que a amostra"""
+    if not st.session_state.get('exploration_mode', False) or st.session_state.get('df') is None:
+        return False
+    return len(get_population_df()) > st.session_state.get('exploration_sample_size', config.EXPLORATION_SAMPLE_SIZE)
+
+def get_population_df():
+    """População analisada: a coorte ativa ou o dataset completo"""
+    return get_cohort_df()
+
+def is_sample(analysis_df):
+    """Indica se o DataFrame é uma amostra da população (e não ela inteira)"""
+    return analysis_df is not get_population_df()
+
+def get_analysis_df():
+    """Retorna o DataFrame que as páginas devem analisar (amostra ou população)"""
+    df = get_population_df()
+    if not is_exploration_active():
+        return df
+
+    strata = tuple(st.session_state.get('exploration_strata', ()))
+    n = st.session_state.get('exploration_sample_size', config.EXPLORATION_SAMPLE_SIZE)
+    key = (get_dataset_fingerprint(df), strata, n)
+
+    # A amostra é sorteada uma vez por dataset/configuração e reaproveitada nos reruns
+    cached = st.session_state.get('exploration_sample')
+    if cached is None or cached[0] != key:
+        cached = (key, stratified_sample(df, list(strata), n))
+        st.session_state.exploration_sample = cached
+    return cached[1]
+
+def sample_info(sample_df):
+    """Metadados da amostra para anexar aos resultados"""
+    return {
+        'size': len(sample_df),
+        'population': len(get_population_df()),
+        'strata': list(st.session_state.get('exploration_strata', []))
+    }
+
+def analysis_metadata(analysis_df):
+    """Marcações de amostra e de coorte para anexar aos resultados"""
+    metadata = {}
+    if is_sample(analysis_df):
+        metadata['sample'] = sample_info(analysis_df)
+    cohort = cohort_info(get_population_df())
+    if cohort is not None:
+        metadata['cohort'] = cohort
+    return metadata
+
+def register_analysis(name, results, params, analysis_df):
+    """Salva resultados e parâmetros, marcando se vieram de uma amostra ou de uma coorte"""
+    results.update(analysis_metadata(analysis_df))
+    st.session_state.analysis_results[name] = results
+    st.session_state.setdefault('analysis_params', {})[name] = params
+
+def render_sample_notice(analysis_df):
+    """Avisa que os resultados exibidos são de uma coorte e/ou estimativas em amostra"""
+    cohort = cohort_info(get_population_df())
+    if cohort is not None:
+        st.caption(f"👥 Coorte **{cohort['name']}**: {cohort['size']:,} de {cohort['population']:,} registros "
+                   f"({'; '.join(cohort['conditions'])})")
+    if is_sample(analysis_df):
+        info = sample_info(analysis_df)
+        st.info(
+            f"🔎 Modo exploratório: resultados estimados em uma amostra estratificada de "
+            f"{info['size']:,} de {info['population']:,} registros. "
+            f"Solicite o recálculo exato na página de Relatório."
+        )
+
+def compute_full_results(df, analysis_params, job=None, cohort=None):
+    """Recalcula com os dados completos (da coorte) as análises executadas em amostra"""
+    from analysis.descriptive import summarize_descriptive
+    from analysis.survival import compute_survival_results
+    from analysis.predictive import compute_predictive_results
+    from analysis.epidemiology import compute_epidemiological_results
+    from analysis.parametric_survival import compute_parametric_results
+    from analysis.screening import compute_screening_results
+
+    results = {}
+    for i, (name, params) in enumerate(analysis_params.items()):
+        if job is not None:
+            job.update(i / len(analysis_params), f"Recalculando {name}")
+        if name == 'descriptive':
+            results[name] = summarize_descriptive(df)
+        elif name == 'survival':
+            results[name] = compute_survival_results(df, params['time_col'], params['event_col'])
+        elif name == 'predictive':
+            results[name] = compute_predictive_results(df, params['target_col'], params['model_params'])
+        elif name == 'epidemiology':
+            results[name] = compute_epidemiological_results(df, params)
+        elif name == 'parametric_survival':
+            results[name] = compute_parametric_results(df, params)
+        elif name == 'screening':
+            results[name] = compute_screening_results(df, params)
+        if cohort is not None:
+            results[name]['cohort'] = cohort
+    return results
+
+def run_analysis(fn, args, metadata=None):
+    """Executa uma análise sem interface (em thread ou processo), anexando amostra e coorte"""
+    results = fn(*args)
+    results.update(metadata or {})
+    return results
+
+def submit_analysis(name, label, fn, args, params, analysis_df, use_process=False):
+    """Agenda uma análise em segundo plano; o resultado chega em analysis_results[name]"""
+    return submit_job(label, run_analysis, fn, args, analysis_metadata(analysis_df),
+                      result_key=name, params=params, use_process=use_process)
+
+def schedule_analysis(name, label, fn, args, params, use_process=False):
+    """Agenda a análise da página em segundo plano e informa o usuário"""
+    analysis_df = get_analysis_df()
+    try:
+        submit_analysis(name, label, fn, (analysis_df, *args), params, analysis_df, use_process)
+        st.info("🕒 Análise agendada em segundo plano; acompanhe na barra lateral. "
+                "O resultado estará disponível no Relatório.")
+    except Exception as e:
+        st.error(f"❌ {str(e)}")
+
+def sampled_analyses():
+    """Lista as análises da população atual cujos resultados ainda são estimativas em amostra"""
+    cohort = cohort_info(get_population_df())
+    current = cohort['name'] if cohort else None
+    return [
+        name for name, results in st.session_state.analysis_results.items()
+        if isinstance(results, dict) and 'sample' in results
+        and results.get('cohort', {}).get('name') == current
+    ]
+
+def submit_full_recompute():
+    """Agenda o recálculo exato das análises feitas em amostra"""
+    params = st.session_state.get('analysis_params', {})
+    pending = {name: params[name] for name in sampled_analyses() if name in params}
+    if pending:
+        st.session_state.full_recompute_job = submit_job(
+            "Recálculo com dados completos", compute_full_results, get_population_df(), pending,
+            cohort=cohort_info(get_population_df())
+        )
+
+def collect_full_recompute():
+    """Estado do recálculo exato (os resultados são entregues pelo gerenciador de tarefas)"""
+    job_id = st.session_state.get('full_recompute_job')
+    if job_id is None:
+        return None
+    # Só conta como terminado depois de entregue (está no histórico da sessão)
+    entry = next((e for e in st.session_state.get('job_history', []) if e['id'] == job_id), None)
+    if entry is None:
+        return 'running'
+
+    st.session_state.full_recompute_job = None
+    if entry['status'] == 'failed':
+        st.session_state.full_recompute_error = entry.get('error', '')
+    return entry['status']
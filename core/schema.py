@@ -0,0 +1,86 @@
+import re
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from core.data_processor import looks_like_date
+from core.model_registry import get_dataset_fingerprint
+import config
+
+# Palavras-chave dos nomes de coluna para cada papel
+TIME_KEYWORDS = ('tempo', 'time')
+EVENT_KEYWORDS = ('evento', 'status', 'obito')
+DATE_KEYWORDS = ('data', 'dt_', 'date', 'notific', 'sintoma', 'inicio', 'onset')
+ID_PATTERN = re.compile(r'(^|_)(id|cod|codigo|cpf|cns|prontuario)(_|$)')
+# Palavra inteira: evita casar 'comorbidades' ou 'message'
+AGE_PATTERN = re.compile(r'(^|_)(idade|age)(_|$)')
+
+def column_kind(series, n_unique):
+    """Classifica o tipo lógico da coluna (numérica, binária, categórica, data ou texto)"""
+    if pd.api.types.is_bool_dtype(series):
+        return 'binary'
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return 'datetime'
+    if pd.api.types.is_numeric_dtype(series):
+        if n_unique <= 2 and set(series.dropna().unique().tolist()) <= {0, 1}:
+            return 'binary'
+        return 'numeric'
+    return 'categorical' if n_unique <= config.CATEGORY_MAX_UNIQUE else 'text'
+
+def describe_column(name, series):
+    """Tipo, cardinalidade, ausentes e papéis de uma coluna"""
+    lower = name.lower()
+    n_unique = series.nunique(dropna=True)
+    kind = column_kind(series, n_unique)
+    numeric = kind in ('numeric', 'binary')
+
+    is_date = kind == 'datetime' or (
+        kind in ('categorical', 'text') and series.dtype == object
+        and any(k in lower for k in DATE_KEYWORDS) and looks_like_date(series)
+    )
+    # Identificadores: nome típico ou um valor distinto por linha (exceto contínuas)
+    is_id = bool(ID_PATTERN.search(lower)) or (
+        n_unique == len(series) > 1 and not pd.api.types.is_float_dtype(series) and not is_date
+    )
+
+    return {
+        'dtype': str(series.dtype),
+        'kind': kind,
+        'n_unique': n_unique,
+        'null_rate': series.isna().mean() if len(series) else 0.0,
+        'time': numeric and any(k in lower for k in TIME_KEYWORDS),
+        'event': any(k in lower for k in EVENT_KEYWORDS),
+        'id': is_id,
+        'date': is_date,
+        'age': kind == 'numeric' and bool(AGE_PATTERN.search(lower)),
+        'stratum': kind in ('categorical', 'binary') and not is_date and n_unique <= config.EXPLORATION_MAX_STRATA,
+        'target': numeric and not is_id and not is_date
+    }
+
+def build_schema(df):
+    """Índice de esquema: uma linha por coluna com tipo, cardinalidade, ausentes e papéis"""
+    schema = pd.DataFrame.from_dict(
+        {col: describe_column(col, df[col]) for col in df.columns}, orient='index'
+    )
+    schema.index.name = 'column'
+    return schema
+
+def get_schema(df=None):
+    """Esquema com cache por impressão digital do dataset (construído uma única vez)"""
+    df = st.session_state.df if df is None else df
+    cache = st.session_state.setdefault('schema_cache', {})
+    key = get_dataset_fingerprint(df)
+    if key not in cache:
+        cache[key] = build_schema(df)
+    return cache[key]
+
+def columns_with(role, df=None):
+    """Colunas com um papel, na ordem do dataset"""
+    schema = get_schema(df)
+    return schema.index[schema[role].astype(bool)].tolist()
+
+def columns_of_kind(kinds, df=None):
+    """Colunas de um ou mais tipos lógicos"""
+    schema = get_schema(df)
+    return schema.index[schema['kind'].isin(np.atleast_1d(kinds))].tolist()
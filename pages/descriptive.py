@@ -1,14 +1,21 @@
 import streamlit as st
-from analysis.descriptive import perform_descriptive_analysis
+from analysis.descriptive import perform_descriptive_analysis, show_sample_estimates
 from core.analyzer import SISADEAnalyzer
+from core.sampling import get_analysis_df, get_population_df, is_sample, register_analysis, render_sample_notice
+from config import COLOR_PRIMARY
 
 def render_descriptive():
     """Renderiza a página de análise descritiva com formatação melhorada"""
     st.subheader("📈 Análise Estatística Descritiva")
     
     if st.session_state.df is not None:
-        desc_results = perform_descriptive_analysis(st.session_state.df)
-        st.session_state.analysis_results['descriptive'] = desc_results
+        df = get_analysis_df()
+        render_sample_notice(df)
+        
+        desc_results = perform_descriptive_analysis(df)
+        if is_sample(df):
+            show_sample_estimates(df, len(get_population_df()))
+        register_analysis('descriptive', desc_results, {}, df)
         
         if st.session_state.api_key:
             analyzer = SISADEAnalyzer(st.session_state.api_key)
@@ -0,0 +1,33 @@
+import streamlit as st
+from analysis.epicurve import perform_epicurve_analysis, GRANULARITIES
+from core.sampling import get_population_df, render_sample_notice
+from core.schema import columns_with
+import config
+
+def render_epicurve():
+    """Renderiza a página da curva epidêmica"""
+    st.subheader("📅 Curva Epidêmica")
+    df = get_population_df()
+
+    date_cols = columns_with('date')
+    if not date_cols:
+        st.warning("Nenhuma coluna de data (notificação, início de sintomas etc.) encontrada.")
+        return
+
+    group_options = columns_with('stratum')
+
+    col1, col2 = st.columns(2)
+    with col1:
+        date_col = st.selectbox("Coluna de data:", date_cols, key="epicurve_date")
+        granularity = st.radio("Granularidade:", list(GRANULARITIES), horizontal=True, key="epicurve_granularity")
+    with col2:
+        group_col = st.selectbox("Separar por:", [None] + group_options, key="epicurve_group")
+        window = st.slider("Janela da média móvel (períodos):", 1, 30,
+                           config.EPICURVE_ROLLING_WINDOWS[GRANULARITIES[granularity]],
+                           key=f"epicurve_window_{granularity}")
+
+    # Agregações são baratas e usam cache: a curva usa sempre os dados completos (da coorte)
+    render_sample_notice(df)
+    epi_results = perform_epicurve_analysis(df, date_col, granularity, group_col, window)
+    if epi_results:
+        st.session_state.analysis_results['epicurve'] = epi_results
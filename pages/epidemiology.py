@@ -0,0 +1,70 @@
+import streamlit as st
+from analysis.epidemiology import perform_epidemiological_analysis, compute_epidemiological_results, AGE_BAND_COL
+from core.analyzer import SISADEAnalyzer
+from core.sampling import get_analysis_df, register_analysis, render_sample_notice, schedule_analysis
+from core.schema import columns_with, columns_of_kind
+from utils.data_validation import render_validation_errors
+
+def render_epidemiology():
+    """Renderiza a página de indicadores epidemiológicos"""
+    st.subheader("🧪 Indicadores Epidemiológicos")
+    df = st.session_state.df
+
+    # Desfechos binários (0/1 ou booleanos)
+    event_cols = columns_of_kind('binary')
+    if not event_cols:
+        st.warning("Nenhuma variável de desfecho binária (0/1) encontrada.")
+        return
+
+    numeric_cols = columns_of_kind('numeric')
+    categorical_cols = columns_with('stratum')
+    # Só colunas numéricas servem como idade (faixas em texto ficam de fora)
+    age_candidates = [col for col in columns_with('age') if col in numeric_cols]
+
+    event_col = st.selectbox("Desfecho:", event_cols, key="epi_event")
+    age_col = st.selectbox("Coluna de idade:", [None] + numeric_cols,
+                           index=1 + numeric_cols.index(age_candidates[0]) if age_candidates else 0,
+                           key="epi_age")
+
+    strata_options = categorical_cols + ([AGE_BAND_COL] if age_col else [])
+    strata = st.multiselect("Estratificar por:", strata_options, key="epi_strata")
+    exposure_col = st.selectbox("Exposição (razões de risco/chances):",
+                                [None] + [col for col in dict.fromkeys(categorical_cols + event_cols) if col != event_col],
+                                key="epi_exposure")
+    reference = None
+    if exposure_col:
+        reference = st.selectbox("Nível de referência:", sorted(df[exposure_col].dropna().unique(), key=str), key="epi_reference")
+    person_time_col = st.selectbox("Tempo-pessoa (opcional, para taxas de incidência):",
+                                   [None] + numeric_cols, key="epi_person_time")
+    multiplier = st.selectbox("Expressar por:", [100, 1_000, 10_000, 100_000], key="epi_multiplier")
+
+    params = {
+        'event_col': event_col,
+        'strata': [col for col in strata if col != exposure_col],
+        'age_col': age_col,
+        'exposure_col': exposure_col,
+        'reference': reference,
+        'person_time_col': person_time_col,
+        'multiplier': multiplier
+    }
+
+    blocked = render_validation_errors([event_col, age_col, exposure_col, person_time_col] + strata)
+
+    if st.button("🧪 Calcular Indicadores", key="run_epidemiology", disabled=blocked):
+        analysis_df = get_analysis_df()
+        render_sample_notice(analysis_df)
+
+        with st.spinner("Calculando taxas..."):
+            epi_results = perform_epidemiological_analysis(analysis_df, **params)
+        register_analysis('epidemiology', epi_results, params, analysis_df)
+
+        if st.session_state.api_key:
+            analyzer = SISADEAnalyzer(st.session_state.api_key)
+            with st.spinner("🤖 Interpretando indicadores epidemiológicos..."):
+                interpretation = analyzer.interpret_results(epi_results, "Análise Epidemiológica")
+                st.markdown("### 💡 Interpretação IA")
+                st.markdown(interpretation)
+
+    if st.button("🕒 Calcular em Segundo Plano", key="run_epidemiology_background", disabled=blocked):
+        schedule_analysis('epidemiology', f"Indicadores ({event_col})", compute_epidemiological_results,
+                          (params,), params)
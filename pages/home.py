@@ -1,6 +1,9 @@
+import pandas as pd
 import streamlit as st
 from core.analyzer import SISADEAnalyzer
 from components.metrics import analysis_card
+from core.schema import get_schema
+from utils.data_validation import COMPARISONS, custom_rules, describe_rule, get_validation
 from config import COLOR_PRIMARY, COLOR_SECONDARY
 
 def render_home():
@@ -16,8 +19,7 @@ def render_home():
         
         with col1:
             target_vars = "".join([f"<li style='margin-bottom: 5px;'><strong>{var}</strong></li>" 
-                                 for var in (analysis['target_variables'][:5] if isinstance(analysis['target_variables'], list) 
-                                           else list(analysis['target_variables'].keys())[:5])])
+                                 for var in analysis['target_variables'][:5]])
             
             issues = "".join([f"<li style='margin-bottom: 5px;'><strong>{k}:</strong> {v}</li>" 
                             for k, v in analysis['data_issues'].items()])
@@ -59,6 +61,8 @@ def render_home():
         
         with st.expander("👀 Visualizar Dados", expanded=False):
             st.dataframe(st.session_state.df.head(10))
+        
+        render_validation(st.session_state.df)
     
     else:
         st.info("👆 Carregue um arquivo de dados ou use os dados de exemplo na barra lateral.")
@@ -88,4 +92,75 @@ def render_home():
         - Estudos epidemiológicos
         - Análise de custos hospitalares
         - Pesquisa acadêmica em saúde
-        """)
\ No newline at end of file
+        """)
+
+def render_validation(df):
+    """Resultado das regras de validação e inclusão de regras próprias"""
+    results = get_validation(df)
+    errors = sum(1 for r in results if r['severity'] == 'erro' and (r['violations'] or r['error']))
+    
+    with st.expander(f"🛡️ Validação dos Dados ({errors} regra(s) com erro)", expanded=errors > 0):
+        if results:
+            table = pd.DataFrame([{
+                'Regra': r['label'] or r['rule'],
+                'Condição': r['rule'],
+                'Gravidade': r['severity'],
+                'Violações': r['violations'],
+                '%': r['rate'],
+                'Exemplos (linhas)': ', '.join(map(str, r['sample_rows'])) or r['error'] or ''
+            } for r in results])
+            st.dataframe(table.style.format({'%': '{:.2%}'}), use_container_width=True, hide_index=True)
+        else:
+            st.caption("Nenhuma regra aplicável às colunas deste dataset.")
+        st.caption("Regras com gravidade **erro** bloqueiam as análises que usam as colunas envolvidas.")
+        render_rule_builder(df)
+
+def render_rule_builder(df):
+    """Formulário de regras próprias (faixa, valores permitidos, comparação entre colunas...)"""
+    schema = get_schema(df)
+    checks = {
+        'Faixa de valores': 'range',
+        'Valores permitidos': 'allowed',
+        'Comparação entre colunas': 'compare',
+        'Preenchimento obrigatório': 'not_null',
+        'Sem repetições': 'unique'
+    }
+    
+    st.markdown("**➕ Nova regra**")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        check = checks[st.selectbox("Tipo:", list(checks), key="rule_check")]
+    with col2:
+        column = st.selectbox("Coluna:", df.columns.tolist(), key="rule_column")
+    with col3:
+        severity = st.selectbox("Gravidade:", ['erro', 'aviso'], key="rule_severity")
+    
+    rule = {'check': check, 'column': column, 'severity': severity}
+    kind = schema.at[column, 'kind']
+    if check == 'range' and kind in ('numeric', 'binary'):
+        # Coluna toda vazia: NaN quebraria o widget, então os limites começam em 0
+        low, high = df[column].min(), df[column].max()
+        rule['min'] = st.number_input("Mínimo:", value=0.0 if pd.isna(low) else float(low), key=f"rule_min_{column}")
+        rule['max'] = st.number_input("Máximo:", value=0.0 if pd.isna(high) else float(high), key=f"rule_max_{column}")
+    elif check == 'range' and kind == 'datetime':
+        rule['min'] = st.date_input("Início:", value=df[column].min(), key=f"rule_min_{column}").isoformat()
+        rule['max'] = st.date_input("Fim:", value=df[column].max(), key=f"rule_max_{column}").isoformat()
+    elif check == 'range':
+        st.caption("Faixas só se aplicam a colunas numéricas ou de data.")
+        rule = None
+    elif check == 'allowed':
+        options = df[column].dropna().unique().tolist()[:1000]
+        rule['values'] = st.multiselect("Valores permitidos:", sorted(options, key=str), key=f"rule_values_{column}")
+    elif check == 'compare':
+        rule['operator'] = st.selectbox("Operador:", list(COMPARISONS), key="rule_operator")
+        rule['other'] = st.selectbox("Outra coluna:", [c for c in df.columns if c != column], key="rule_other")
+    
+    if rule is not None and rule.get('values', True) and st.button("Adicionar regra", key="rule_add"):
+        custom_rules().append(rule)
+        st.rerun()
+    
+    rules = custom_rules()
+    for i, custom in enumerate(rules):
+        col1, col2 = st.columns([5, 1])
+        col1.caption(f"• {describe_rule(custom)} ({custom['severity']})")
+        col2.button("🗑️", key=f"rule_remove_{i}", on_click=rules.pop, args=(i,))
@@ -1,15 +1,18 @@
 import streamlit as st
-from analysis.predictive import perform_predictive_analysis
+import config
+from analysis.predictive import (perform_predictive_analysis, compute_predictive_results, perform_permutation_importance, predictive_settings,
+                                 save_fitted_model, restore_registered_model, evaluate_classification)
+from analysis.evaluation import summarize_evaluation
 from core.analyzer import SISADEAnalyzer
+from core.sampling import (get_analysis_df, get_population_df, is_sample, register_analysis, render_sample_notice,
+                           proportion_confidence_interval, schedule_analysis)
+from core.model_registry import list_models, compare_models, delete_model
 
 def render_predictive():
     """Renderiza a página de análise preditiva"""
     if 'data_info' in st.session_state.analysis_results:
-        target_options = (
-            st.session_state.analysis_results['data_info']['target_variables']
-            if isinstance(st.session_state.analysis_results['data_info']['target_variables'], list)
-            else list(st.session_state.analysis_results['data_info']['target_variables'].keys())
-        )
+        # Sugestões já normalizadas pelo analisador (colunas válidas do dataset)
+        target_options = st.session_state.analysis_results['data_info']['target_variables']
         
         if len(target_options) > 0:
             target_col = st.selectbox(
@@ -18,10 +21,19 @@ def render_predictive():
                 key="target_select"
             )
             
+            with st.expander("⚙️ Configurações do modelo", expanded=False):
+                params = predictive_settings()
+            
             if st.button("🚀 Executar Análise Preditiva", key="run_predictive"):
+                df = get_analysis_df()
+                render_sample_notice(df)
+                
                 with st.spinner("Treinando modelo..."):
-                    pred_results = perform_predictive_analysis(st.session_state.df, target_col)
-                    st.session_state.analysis_results['predictive'] = pred_results
+                    pred_results = perform_predictive_analysis(df, target_col, params)
+                    if is_sample(df):
+                        show_accuracy_ci(pred_results)
+                    register_analysis('predictive', pred_results,
+                                      {'target_col': target_col, 'model_params': pred_results['params']}, df)
                 
                 # Interpretação dos resultados preditivos
                 if st.session_state.api_key and pred_results:
@@ -30,5 +42,108 @@ def render_predictive():
                         interpretation = analyzer.interpret_results(pred_results, "Análise Preditiva")
                         st.markdown("### 💡 Interpretação IA")
                         st.markdown(interpretation)
+            
+            if st.button("🕒 Treinar em Segundo Plano", key="run_predictive_background"):
+                # Processo separado: o treino não disputa o GIL com o servidor
+                schedule_analysis('predictive', f"Modelo preditivo ({target_col})", compute_predictive_results,
+                                  (target_col, params), {'target_col': target_col, 'model_params': params},
+                                  use_process=True)
+            
+            if st.session_state.get('predictive_model'):
+                if st.session_state.predictive_model['model_type'] == "Classificação":
+                    render_classifier_evaluation()
+                render_permutation_importance()
+                render_save_model()
         else:
-            st.warning("Nenhuma variável alvo identificada automaticamente.")
\ No newline at end of file
+            st.warning("Nenhuma variável alvo identificada automaticamente.")
+    
+    render_model_registry()
+
+def render_save_model():
+    """Botão para salvar o último modelo treinado no registro"""
+    fitted = st.session_state.predictive_model
+    if fitted.get('registry_id'):
+        st.caption(f"💾 Modelo salvo no registro: `{fitted['registry_id']}`")
+    elif st.button("💾 Salvar Modelo no Registro", key="save_model"):
+        try:
+            model_id = save_fitted_model()
+            st.success(f"✅ Modelo salvo: `{model_id}`")
+        except Exception as e:
+            st.error(f"❌ Erro ao salvar modelo: {str(e)}")
+
+def render_model_registry():
+    """Lista, compara, recarrega e exclui modelos registrados"""
+    models = list_models()
+    if not models:
+        return
+    
+    with st.expander(f"🗂️ Registro de Modelos ({len(models)})", expanded=False):
+        by_id = {meta['id']: meta for meta in models}
+        table = compare_models(models)
+        
+        selected = st.multiselect("Comparar modelos:", list(by_id), default=list(by_id)[:2], key="registry_compare")
+        st.dataframe(table.loc[selected] if selected else table, use_container_width=True)
+        
+        model_id = st.selectbox("Modelo:", list(by_id), key="registry_model",
+                                format_func=lambda i: f"{i} — {by_id[i]['target_col']} ({by_id[i]['model_type']})")
+        col1, col2 = st.columns(2)
+        
+        if col1.button("📂 Carregar Modelo", key="registry_load"):
+            try:
+                with st.spinner("Carregando modelo..."):
+                    metrics, same_data = restore_registered_model(by_id[model_id], get_population_df())
+                origin = "conjunto de teste original" if same_data else "dataset atual (diferente do treino)"
+                st.success(f"✅ Modelo carregado e avaliado no {origin}.")
+                st.json({k: round(float(v), 4) for k, v in metrics.items()})
+            except Exception as e:
+                st.error(f"❌ Erro ao carregar modelo: {str(e)}")
+        
+        if col2.button("🗑️ Excluir Modelo", key="registry_delete"):
+            delete_model(model_id)
+            st.rerun()
+
+def render_classifier_evaluation():
+    """Curvas, calibração e IC por bootstrap do último classificador (treinado ou carregado do registro)"""
+    fitted = st.session_state.predictive_model
+    
+    with st.expander(f"📐 Avaliação do Classificador (modelo para {fitted['target_col']})", expanded=False):
+        st.caption("ROC, precisão-recall e calibração a partir das probabilidades previstas no conjunto de teste; "
+                   "os intervalos vêm de reamostragens bootstrap desse conjunto.")
+        col1, col2 = st.columns(2)
+        n_bootstrap = col1.select_slider("Reamostras bootstrap:", [200, 500, 1000, 2000, 5000],
+                                         value=config.EVAL_BOOTSTRAP_SAMPLES, key="eval_bootstrap")
+        ci_level = col2.select_slider("Nível de confiança:", [0.90, 0.95, 0.99], value=config.EVAL_CI_LEVEL,
+                                      key="eval_ci_level")
+        
+        if st.button("📐 Avaliar Classificador", key="run_evaluation"):
+            evaluation = evaluate_classification(n_bootstrap, ci_level)
+            if 'predictive' in st.session_state.analysis_results:
+                st.session_state.analysis_results['predictive']['evaluation'] = summarize_evaluation(evaluation)
+
+def render_permutation_importance():
+    """Importância por permutação reaproveitando o último modelo treinado"""
+    fitted = st.session_state.predictive_model
+    
+    with st.expander(f"🔀 Importância por Permutação (modelo para {fitted['target_col']})", expanded=False):
+        st.caption("Mede a queda de desempenho no conjunto de teste ao embaralhar cada variável; "
+                   "não favorece variáveis de alta cardinalidade como a importância por impureza.")
+        col1, col2 = st.columns(2)
+        n_repeats = col1.slider("Repetições:", 1, 30, config.PERMUTATION_N_REPEATS, key="perm_repeats")
+        max_samples = col2.number_input("Máximo de linhas do teste:", 100, 1_000_000,
+                                        config.PERMUTATION_MAX_SAMPLES, step=1_000, key="perm_max_samples")
+        
+        if st.button("📊 Calcular Importância por Permutação", key="run_permutation"):
+            importance = perform_permutation_importance(n_repeats, int(max_samples))
+            if 'predictive' in st.session_state.analysis_results:
+                st.session_state.analysis_results['predictive']['permutation_importance'] = (
+                    importance.head(20).set_index('feature')['importance_mean'].to_dict()
+                )
+
+def show_accuracy_ci(results):
+    """Exibe o intervalo de confiança da acurácia obtida na amostra"""
+    if results['model_type'] != "Classificação":
+        return
+    
+    n_test = results['predictions_made']
+    lower, upper = proportion_confidence_interval(results['metrics']['accuracy'], n_test, None)
+    st.caption(f"📏 Acurácia na amostra: IC 95% {lower:.3f} – {upper:.3f} ({n_test:,} predições de teste)")
\ No newline at end of file
@@ -1,5 +1,11 @@
+import os
+from datetime import datetime
+
 import streamlit as st
+from core.exporter import (FORMATS, arrow_schema, export_results, export_table, iter_frames,
+                           iter_predictions, survival_table)
 from core.report_generator import generate_report
+from core.sampling import sampled_analyses, submit_full_recompute, collect_full_recompute, get_population_df
 
 def render_report():
     """Renderiza a página de relatórios com tratamento robusto de erros"""
@@ -16,6 +22,8 @@ def render_report():
         st.error("❌ Dados não carregados. Por favor, importe um dataset primeiro.")
         return
     
+    render_full_recompute()
+    
     # Report generation button
     if st.button("📊 Gerar Relatório Completo", 
                 key="generate_report",
@@ -27,34 +35,116 @@ def render_report():
                 from core.analyzer import SISADEAnalyzer
                 with st.spinner("🤖 Gerando interpretação final com IA..."):
                     analyzer = SISADEAnalyzer(st.session_state.api_key)
-                    interpretation = analyzer.interpret_results(
-                        st.session_state.analysis_results, 
-                        "Relatório Executivo Completo"
-                    )
+                    # A interpretação anterior fica de fora para que resultados iguais reaproveitem o cache
+                    results = {k: v for k, v in st.session_state.analysis_results.items() if k != 'interpretation'}
+                    interpretation = analyzer.interpret_results(results, "Relatório Executivo Completo")
                     st.session_state.analysis_results['interpretation'] = interpretation
                     st.success("✅ Interpretação gerada com sucesso!")
             except Exception as e:
                 st.error(f"❌ Falha na interpretação por IA: {str(e)}")
                 st.session_state.analysis_results['interpretation'] = "Interpretação não disponível"
         
-        # Generate and display the report
+        # Generate the report (kept in the session so downloads don't discard it)
         try:
             with st.spinner("📝 Compilando relatório..."):
-                report = generate_report(st.session_state.analysis_results, st.session_state.df)
-                
-                # Display report in expandable sections
-                with st.expander("🔍 Visualizar Relatório Completo", expanded=True):
-                    st.markdown(report, unsafe_allow_html=True)
-                
-                # Add download option
-                st.download_button(
-                    label="⬇️ Download do Relatório (HTML)",
-                    data=report,
-                    file_name="relatorio_analitico.html",
-                    mime="text/html"
-                )
-                
+                st.session_state.report_text = generate_report(st.session_state.analysis_results, get_population_df())
         except KeyError as e:
             st.error(f"🔑 Dados incompletos para gerar relatório: {str(e)}")
         except Exception as e:
-            st.error(f"❌ Erro inesperado ao gerar relatório: {str(e)}")
\ No newline at end of file
+            st.error(f"❌ Erro inesperado ao gerar relatório: {str(e)}")
+    
+    report = st.session_state.get('report_text')
+    if report:
+        st.subheader("📄 Relatório Executivo")
+        
+        # Display report in expandable sections
+        with st.expander("🔍 Visualizar Relatório Completo", expanded=True):
+            st.markdown(report)
+        
+        # Add download option
+        st.download_button(
+            label="⬇️ Download do Relatório (Markdown)",
+            data=report,
+            file_name=f"relatorio_sisade_{datetime.now():%Y%m%d}.md",
+            mime="text/markdown",
+            key="download_report"
+        )
+    
+    render_export()
+
+def render_export():
+    """Exporta dataset tratado, previsões, tabela de sobrevivência e resultados, gravando em blocos"""
+    st.subheader("📦 Exportar Dados e Resultados")
+    
+    sources = ["Dataset tratado"]
+    if st.session_state.get('predictive_model'):
+        sources.append("Previsões do modelo")
+    if 'survival' in st.session_state.get('analysis_params', {}):
+        sources.append("Tabela de sobrevivência (Kaplan-Meier)")
+    sources.append("Resultados das análises (JSON)")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        source = st.selectbox("Conteúdo", sources, key="export_source")
+    with col2:
+        tabular = source != "Resultados das análises (JSON)"
+        fmt = st.selectbox("Formato", list(FORMATS) if tabular else ["JSON"], key="export_format")
+    
+    if st.button("💾 Gerar arquivo", key="run_export"):
+        try:
+            with st.spinner("💾 Gravando em blocos..."):
+                st.session_state.export_file = export_source(source, fmt)
+        except Exception as e:
+            st.error(f"❌ Erro ao exportar: {str(e)}")
+    
+    export_file = st.session_state.get('export_file')
+    if export_file and os.path.exists(export_file['path']):
+        path = export_file['path']
+        size_mb = os.path.getsize(path) / 1024 ** 2
+        rows = f"{export_file['rows']:,} linhas, " if export_file['rows'] is not None else ""
+        st.caption(f"📁 {export_file['source']}: {rows}{size_mb:.1f} MB em `{path}`")
+        # O botão de download carrega o arquivo inteiro na memória do servidor: só é criado
+        # no rerun em que o usuário pede, e não a cada interação com a página
+        if st.button("📥 Preparar download", key="prepare_export_download"):
+            with open(path, 'rb') as f:
+                st.download_button("⬇️ Baixar arquivo", data=f, file_name=os.path.basename(path),
+                                   mime=export_file['mime'], key="download_export")
+
+def export_source(source, fmt):
+    """Grava o conteúdo escolhido em disco; retorna os dados do arquivo gerado"""
+    df = get_population_df()
+    rows = None
+    if source == "Dataset tratado":
+        path, rows = export_table("dataset_tratado", iter_frames(df), fmt, schema=arrow_schema(df))
+    elif source == "Previsões do modelo":
+        path, rows = export_table("previsoes", iter_predictions(df, st.session_state.predictive_model), fmt)
+    elif source == "Tabela de sobrevivência (Kaplan-Meier)":
+        params = st.session_state.analysis_params['survival']
+        path, rows = export_table("sobrevivencia_km", [survival_table(df, params['time_col'], params['event_col'])], fmt)
+    else:
+        path = export_results(st.session_state.analysis_results)
+    mime = FORMATS[fmt][1] if fmt in FORMATS else "application/json"
+    return {'source': source, 'path': path, 'rows': rows, 'mime': mime}
+
+def render_full_recompute():
+    """Oferece o recálculo exato, em segundo plano, das análises feitas em amostra"""
+    status = collect_full_recompute()
+    
+    if status == 'running':
+        st.info("⏳ Recalculando as análises com os dados completos em segundo plano (acompanhe na barra lateral)...")
+        if st.button("🔄 Atualizar status", key="refresh_full_recompute"):
+            st.rerun()
+        return
+    if status == 'done':
+        st.success("✅ Resultados exatos com os dados completos incorporados ao relatório.")
+    elif status == 'failed':
+        st.error(f"❌ Falha no recálculo completo: {st.session_state.full_recompute_error}")
+    elif status == 'cancelled':
+        st.warning("🚫 Recálculo completo cancelado.")
+    
+    pending = sampled_analyses()
+    if pending:
+        st.warning(f"🔎 Resultados estimados em amostra: {', '.join(pending)}.")
+        if st.button("🎯 Recalcular com dados completos", key="run_full_recompute"):
+            submit_full_recompute()
+            st.rerun()
\ No newline at end of file
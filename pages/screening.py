@@ -0,0 +1,56 @@
+import streamlit as st
+from analysis.screening import perform_screening_analysis, compute_screening_results, NUMERIC_TESTS
+from core.analyzer import SISADEAnalyzer
+from core.sampling import get_analysis_df, register_analysis, render_sample_notice, schedule_analysis
+from core.schema import columns_with, columns_of_kind
+from utils.data_validation import render_validation_errors
+import config
+
+def render_screening():
+    """Renderiza a página de triagem univariada das variáveis contra um desfecho"""
+    st.subheader("🔬 Triagem Univariada")
+    st.caption("Testa cada variável contra o desfecho (qui-quadrado/Fisher, t/Mann-Whitney ou log-rank) "
+               "e corrige as comparações múltiplas por Benjamini-Hochberg (FDR).")
+
+    mode = st.radio("Tipo de desfecho:", ["Binário", "Sobrevivência"], horizontal=True, key="screening_mode")
+    if mode == "Binário":
+        event_cols = columns_of_kind('binary')
+        if not event_cols:
+            st.warning("Nenhuma variável de desfecho binária (0/1) encontrada.")
+            return
+        params = {'mode': 'binary', 'event_col': st.selectbox("Desfecho:", event_cols, key="screening_event")}
+        params['numeric_test'] = st.radio("Teste para variáveis numéricas:", NUMERIC_TESTS, horizontal=True,
+                                          key="screening_numeric_test")
+    else:
+        time_cols, event_cols = columns_with('time'), columns_with('event')
+        if not time_cols or not event_cols:
+            st.warning("Não foram encontradas colunas adequadas para análise de sobrevivência (tempo + evento).")
+            return
+        params = {
+            'mode': 'survival',
+            'time_col': st.selectbox("Coluna de tempo:", time_cols, key="screening_time"),
+            'event_col': st.selectbox("Coluna de evento:", event_cols, key="screening_survival_event"),
+            'numeric_test': 'Log-rank'
+        }
+    params['alpha'] = st.select_slider("Nível de significância (FDR):", [0.01, 0.05, 0.10],
+                                       value=config.SCREENING_ALPHA, key="screening_alpha")
+
+    blocked = render_validation_errors([params['event_col'], params.get('time_col')])
+
+    if st.button("🔬 Executar Triagem", key="run_screening", disabled=blocked):
+        analysis_df = get_analysis_df()
+        render_sample_notice(analysis_df)
+
+        screening_results = perform_screening_analysis(analysis_df, params)
+        register_analysis('screening', screening_results, params, analysis_df)
+
+        if st.session_state.api_key:
+            analyzer = SISADEAnalyzer(st.session_state.api_key)
+            with st.spinner("🤖 Interpretando a triagem..."):
+                interpretation = analyzer.interpret_results(screening_results, "Triagem Univariada")
+                st.markdown("### 💡 Interpretação IA")
+                st.markdown(interpretation)
+
+    if st.button("🕒 Executar em Segundo Plano", key="run_screening_background", disabled=blocked):
+        schedule_analysis('screening', f"Triagem ({params['event_col']})", compute_screening_results,
+                          (params,), params)
@@ -1,65 +1,64 @@
 import streamlit as st
-from analysis.survival import perform_survival_analysis
+from analysis.survival import (perform_survival_analysis, fit_survival, compare_survival_groups, compute_survival_results,
+                               SURVIVAL_TIMES)
 from core.analyzer import SISADEAnalyzer
-from lifelines import KaplanMeierFitter
-import matplotlib.pyplot as plt 
-from config import COLOR_SECONDARY
 from components.metrics import analysis_card
+from core.sampling import (get_analysis_df, is_sample, register_analysis, render_sample_notice, strata_candidates,
+                           schedule_analysis)
+from analysis.parametric_survival import perform_parametric_analysis
+from core.schema import columns_with
+from utils.data_validation import render_validation_errors
+import config
 
-def perform_survival_analysis(df, time_col, event_col):
-    """Realiza análise de sobrevivência com formatação melhorada"""
-    results = {}
-    df_surv = df[[time_col, event_col]].dropna()
-    kmf = KaplanMeierFitter()
-    kmf.fit(df_surv[time_col], df_surv[event_col])
-    
-    
-    # Plota a curva de sobrevivência
-    kmf.plot_survival_function()
-    plt.title("Curva de Sobrevivência (Kaplan-Meier)")
-    plt.xlabel("Tempo")
-    plt.ylabel("Probabilidade de Sobrevivência")
-    plt.show()  # Se estiver usando Streamlit, talvez precise ajustar
-    
-    #return kmf
-    
-    median_survival = kmf.median_survival_time_
-    survival_values = kmf.survival_function_at_times([30, 90, 180, 365]).values.flatten()
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        stats_content = f"""
-        <div style="line-height: 1.6;">
-            <p><strong style="color: {COLOR_SECONDARY};">Tempo mediano de sobrevivência:</strong> 
-               <span style="font-weight: bold;">{median_survival:.1f} dias</span></p>
+def show_survival_ci(results):
+    """Exibe os intervalos de confiança das probabilidades estimadas na amostra"""
+    items = "".join([
+        f"<li>{time.replace('_', ' ')}: <strong>{results['survival_probabilities'][time]:.2%}</strong> "
+        f"(IC 95%: {lower:.2%} – {upper:.2%})</li>"
+        for time, (lower, upper) in results['survival_probabilities_ci'].items()
+    ])
+    analysis_card("📏 Margens de Erro (amostra)", f"<ul style='padding-left: 20px;'>{items}</ul>")
+
+def render_parametric_models(time_col, event_col, blocked=False):
+    """Comparação de distribuições paramétricas com extrapolação"""
+    with st.expander("📐 Modelos Paramétricos (Weibull, log-normal, log-logística, exponencial)", expanded=False):
+        horizon = st.number_input("Horizonte de extrapolação (dias):", 30, 36_500,
+                                  config.SURVIVAL_EXTRAPOLATION_HORIZON, step=30, key="parametric_horizon")
+        
+        if st.button("📐 Comparar Modelos Paramétricos", key="run_parametric", disabled=blocked):
+            df = get_analysis_df()
+            render_sample_notice(df)
             
-            <p style="margin-top: 15px;"><strong style="color: {COLOR_SECONDARY};">Probabilidade de sobrevivência:</strong></p>
-            <ul style="margin-top: 5px; padding-left: 20px;">
-                <li style="margin-bottom: 5px;">30 dias: <strong>{survival_values[0]:.2%}</strong></li>
-                <li style="margin-bottom: 5px;">90 dias: <strong>{survival_values[1]:.2%}</strong></li>
-                <li style="margin-bottom: 5px;">180 dias: <strong>{survival_values[2]:.2%}</strong></li>
-                <li>365 dias: <strong>{survival_values[3]:.2%}</strong></li>
-            </ul>
-        </div>
-        """
-        analysis_card("📌 Estatísticas de Sobrevivência", stats_content)
-    
-    # ... (restante do código permanece igual)
+            horizons = sorted(set(SURVIVAL_TIMES + [horizon]))
+            kmf, _ = fit_survival(df, time_col, event_col)
+            param_results = perform_parametric_analysis(df, time_col, event_col, kmf, horizons)
+            if param_results:
+                register_analysis('parametric_survival', param_results,
+                                  {'time_col': time_col, 'event_col': event_col, 'horizons': horizons}, df)
 
 def render_survival():
     """Renderiza a página de análise de sobrevivência"""
     # Verificar se há colunas para análise de sobrevivência
-    time_cols = [col for col in st.session_state.df.columns if 'tempo' in col.lower() or 'time' in col.lower()]
-    event_cols = [col for col in st.session_state.df.columns if 'evento' in col.lower() or 'status' in col.lower() or 'obito' in col.lower()]
+    time_cols = columns_with('time')
+    event_cols = columns_with('event')
     
     if len(time_cols) > 0 and len(event_cols) > 0:
         time_col = st.selectbox("Selecione a coluna de tempo:", time_cols)
         event_col = st.selectbox("Selecione a coluna de evento:", event_cols)
+        group_col = st.selectbox("Comparar grupos (opcional):", [None] + strata_candidates(st.session_state.df),
+                                 key="survival_group")
+        blocked = render_validation_errors([time_col, event_col, group_col])
         
-        if st.button("⏳ Executar Análise de Sobrevivência", key="run_survival"):
-            surv_results = perform_survival_analysis(st.session_state.df, time_col, event_col)
-            st.session_state.analysis_results['survival'] = surv_results
+        if st.button("⏳ Executar Análise de Sobrevivência", key="run_survival", disabled=blocked):
+            df = get_analysis_df()
+            render_sample_notice(df)
+            
+            surv_results = perform_survival_analysis(df, time_col, event_col)
+            if is_sample(df):
+                show_survival_ci(surv_results)
+            if group_col:
+                compare_survival_groups(df, time_col, event_col, group_col)
+            register_analysis('survival', surv_results, {'time_col': time_col, 'event_col': event_col}, df)
             
             # Interpretação dos resultados
             if st.session_state.api_key:
@@ -68,5 +67,11 @@ def render_survival():
                     interpretation = analyzer.interpret_results(surv_results, "Análise de Sobrevivência")
                     st.markdown("### 💡 Interpretação IA")
                     st.markdown(interpretation)
+        
+        if st.button("🕒 Executar em Segundo Plano", key="run_survival_background", disabled=blocked):
+            schedule_analysis('survival', f"Sobrevivência ({time_col})", compute_survival_results,
+                              (time_col, event_col), {'time_col': time_col, 'event_col': event_col})
+        
+        render_parametric_models(time_col, event_col, blocked)
     else:
         st.warning("Não foram encontradas colunas adequadas para análise de sobrevivência (tempo + evento).")
\ No newline at end of file
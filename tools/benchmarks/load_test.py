@@ -0,0 +1,215 @@
+"""Teste de carga: N sessões simultâneas percorrendo o SISADE com AppTest e um Gemini simulado.
+
+Uso: python tools/benchmarks/load_test.py [--sessions 8] [--concurrency 4] [--rows 5000] [--llm-latency 0.3] [--json saida.json]
+Cada sessão carrega um dataset sintético próprio e percorre Início, Descritiva, Sobrevivência,
+Preditiva e Relatório. Relata latência p50/p95 por página e o crescimento de memória por sessão.
+
+O AppTest usa um Runtime global e não pode rodar em várias threads; por isso as sessões simultâneas
+são intercaladas passo a passo em um único processo, compartilhando os caches e pools do servidor.
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from collections import deque
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import config
+
+# Caches em disco (modelos, interpretações, Parquet) isolados em uma pasta temporária.
+# Precisa vir antes de importar os módulos do app, que montam os caminhos a partir de CACHE_DIR
+config.CACHE_DIR = tempfile.mkdtemp(prefix='sisade-load-')
+
+from streamlit.testing.v1 import AppTest
+
+import utils.api_handlers as api_handlers
+from core.data_processor import clean_data
+
+# Passos de cada sessão: (nome, página da navegação, botão a clicar)
+STEPS = [
+    ('Início', "🏠 Início", None),
+    ('Descritiva', "📈 Descritiva", None),
+    ('Sobrevivência', "⏳ Sobrevivência", 'run_survival'),
+    ('Preditiva', "🤖 Preditiva", 'run_predictive'),
+    ('Relatório', "📄 Relatório", 'generate_report')
+]
+
+# Resposta fixa para a análise de estrutura (as variáveis-alvo vêm do índice de esquema)
+STRUCTURE_RESPONSE = json.dumps({
+    'data_type': 'Epidemiológico (simulado)',
+    'target_variables': [],
+    'recommended_analyses': ['Estatística Descritiva', 'Análise de Sobrevivência', 'Análise Preditiva'],
+    'problem_type': 'Classificação',
+    'data_issues': {},
+    'interpretation': 'Resposta simulada para teste de carga.'
+}, ensure_ascii=False)
+
+class StubGeminiModel:
+    """Substitui o modelo Gemini: responde localmente após uma latência fixa"""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def generate_content(self, prompt, **kwargs):
+        time.sleep(self.latency)
+        if 'Responda em formato JSON' in prompt:
+            return SimpleNamespace(text=STRUCTURE_RESPONSE)
+        return SimpleNamespace(text="Interpretação simulada: resultados dentro do esperado.")
+
+def install_gemini_stub(latency):
+    """Faz o cliente Gemini compartilhado usar o modelo simulado (limites de taxa e métricas continuam ativos)"""
+    api_handlers.create_gemini_model = lambda api_key, model_name=config.GEMINI_MODEL_NAME: StubGeminiModel(latency)
+
+def synthetic_dataset(n_rows, seed):
+    """Dataset epidemiológico sintético (mesmas colunas dos dados de exemplo)"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'idade': rng.normal(65, 15, n_rows).clip(18, 95).astype(int),
+        'sexo': rng.choice(['Masculino', 'Feminino'], n_rows),
+        'hipertensao': rng.choice([0, 1], n_rows, p=[0.6, 0.4]),
+        'diabetes': rng.choice([0, 1], n_rows, p=[0.7, 0.3]),
+        'tabagismo': rng.choice(['Não', 'Sim'], n_rows, p=[0.8, 0.2]),
+        'tratamento': rng.choice(['A', 'B', 'C'], n_rows, p=[0.5, 0.3, 0.2]),
+        'tempo_internacao': rng.exponential(7, n_rows).clip(1, 30).round(1),
+        'tempo_sobrevivencia': (rng.weibull(1.5, n_rows) * 100).clip(1, 365),
+        'status_obito': rng.choice([1, 0], n_rows, p=[0.3, 0.7]),
+        'custo_tratamento': rng.normal(5000, 2000, n_rows).clip(1000, 15000).round(2),
+        'comorbidades': rng.integers(0, 4, n_rows),
+        'data_notificacao': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, n_rows), unit='D')
+    })
+    for col in rng.choice(df.columns[:-1], 3, replace=False):
+        df.loc[rng.random(n_rows) < 0.1, col] = np.nan
+    return df
+
+def upload(at, df, name):
+    """Simula o upload de um CSV pelo mesmo caminho da barra lateral (leitura + limpeza)"""
+    buffer = io.BytesIO(df.to_csv(index=False).encode('utf-8'))
+    at.session_state['df'] = clean_data(pd.read_csv(buffer))
+    at.session_state['loaded_file_key'] = (name, None)
+
+def rss_mb():
+    """Memória residente atual do processo (MB)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except OSError:
+        # Fora do Linux: pico de memória (ru_maxrss em KB no Linux, bytes no macOS)
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage / 1024 ** 2 if sys.platform == 'darwin' else usage / 1024
+
+def timed(record, step, action):
+    """Executa uma ação do AppTest e registra a latência"""
+    start = time.perf_counter()
+    at = action()
+    record.append({'step': step, 'seconds': time.perf_counter() - start,
+                   'errors': [e.message[:200] for e in at.exception] + [e.value[:200] for e in at.error]})
+    return at
+
+def run_session(index, args, record, sessions):
+    """Uma sessão completa (gerador: pausa após cada interação para intercalar as sessões)"""
+    at = AppTest.from_file(os.path.join(ROOT, 'app.py'), default_timeout=args.timeout)
+    sessions.append(at)
+    timed(record, 'Abertura', at.run)
+    at.text_input(key='api_key_input').set_value('stub-key')
+    yield
+
+    df = synthetic_dataset(args.rows, seed=index)
+    start = time.perf_counter()
+    upload(at, df, f"sessao_{index}.csv")
+    record.append({'step': 'Upload', 'seconds': time.perf_counter() - start, 'errors': []})
+    yield
+
+    for step, page, button in STEPS:
+        timed(record, step, at.sidebar.radio(key='page_navigation').set_value(page).run)
+        yield
+        if button:
+            timed(record, f"{step} (execução)", at.button(key=button).click().run)
+            yield
+
+def run_sessions(first, count, args):
+    """Executa as sessões intercaladas, no máximo `concurrency` ativas; retorna os AppTests vivos e os registros"""
+    sessions, record = [], []
+    pending = deque(run_session(i, args, record, sessions) for i in range(first, first + count))
+    active = deque()
+    while pending or active:
+        while pending and len(active) < args.concurrency:
+            active.append(pending.popleft())
+        session = active.popleft()
+        try:
+            next(session)
+            active.append(session)
+        except StopIteration:
+            pass
+    return sessions, record
+
+def summarize(records):
+    """Latência p50/p95/máx por passo e erros encontrados"""
+    table = pd.DataFrame(records)
+    summary = table.groupby('step', sort=False)['seconds'].agg(
+        n='count',
+        p50=lambda s: np.percentile(s, 50),
+        p95=lambda s: np.percentile(s, 95),
+        max='max'
+    )
+    errors = sorted({error for errors in table['errors'] for error in errors})
+    return summary, errors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=8)
+    parser.add_argument('--concurrency', type=int, default=4, help="sessões ativas ao mesmo tempo (intercaladas)")
+    parser.add_argument('--rows', type=int, default=5_000, help="linhas do dataset de cada sessão")
+    parser.add_argument('--llm-latency', type=float, default=0.3, help="latência simulada do Gemini (s)")
+    parser.add_argument('--warmup', type=int, default=1, help="sessões de aquecimento (fora das estatísticas)")
+    parser.add_argument('--timeout', type=float, default=300, help="tempo limite de cada rerun (s)")
+    parser.add_argument('--json', help="salva o resumo em JSON neste arquivo")
+    args = parser.parse_args()
+
+    install_gemini_stub(args.llm_latency)
+
+    # Aquecimento: importações e caches de processo não entram na conta por sessão
+    warm, _ = run_sessions(0, args.warmup, args) if args.warmup else ([], [])
+    baseline = rss_mb()
+
+    start = time.perf_counter()
+    sessions, records = run_sessions(args.warmup, args.sessions, args)
+    wall = time.perf_counter() - start
+    # As sessões continuam vivas (como em um servidor) enquanto a memória é medida
+    after = rss_mb()
+
+    summary, errors = summarize(records)
+    per_session = (after - baseline) / max(args.sessions, 1)
+
+    print(f"\n{args.sessions} sessões ({args.concurrency} simultâneas), {args.rows:,} linhas cada, "
+          f"Gemini simulado com {args.llm_latency:.2f}s — {wall:.1f}s no total\n")
+    print(summary.to_string(float_format=lambda v: f"{v:.3f}"))
+    print(f"\nMemória: {baseline:.0f} MB após aquecimento → {after:.0f} MB com as sessões ativas "
+          f"(+{per_session:.1f} MB por sessão)")
+    for error in errors:
+        print(f"⚠️ {error}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'sessions': args.sessions, 'concurrency': args.concurrency, 'rows': args.rows,
+                'llm_latency': args.llm_latency, 'wall_seconds': wall,
+                'latency': summary.reset_index().to_dict(orient='records'),
+                'memory_mb': {'baseline': baseline, 'after': after, 'per_session': per_session},
+                'errors': errors
+            }, f, ensure_ascii=False, indent=2)
+    del warm, sessions
+    return 1 if errors else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
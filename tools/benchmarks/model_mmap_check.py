@@ -0,0 +1,48 @@
+"""Verifica se um Random Forest carregado com joblib (mmap_mode='r') mantém as árvores mapeadas do disco.
+
+Uso: python tools/benchmarks/model_mmap_check.py [--trees 50] [--rows 20000]
+Retorna código 1 se os arrays das árvores forem copiados para a memória do processo. Enquanto isso
+acontecer, o registro de modelos não usa mmap_mode e cada processo mantém a própria cópia do modelo.
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+import joblib
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+from core.model_registry import tree_arrays_mapped
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--trees', type=int, default=50)
+    parser.add_argument('--rows', type=int, default=20000)
+    args = parser.parse_args()
+
+    from sklearn.ensemble import RandomForestClassifier
+
+    rng = np.random.default_rng(42)
+    X = rng.random((args.rows, 10))
+    y = (X[:, 0] + rng.normal(0, 0.3, args.rows) > 0.5).astype(int)
+    model = RandomForestClassifier(n_estimators=args.trees, random_state=42).fit(X, y)
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'model.joblib')
+        joblib.dump(model, path)
+        loaded = joblib.load(path, mmap_mode='r')
+        mapped = tree_arrays_mapped(loaded)
+        size_mb = os.path.getsize(path) / 1024 ** 2
+
+    print(f"Modelo: {args.trees} árvores, {size_mb:.1f} MB em disco")
+    if mapped:
+        print("✅ Nós e valores das árvores ficam mapeados do disco (compartilhados entre processos)")
+        return 0
+    print("❌ Nós e valores das árvores foram copiados para a memória do processo")
+    return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
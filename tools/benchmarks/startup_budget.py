@@ -0,0 +1,91 @@
+"""Mede o tempo de importação e a memória da inicialização do SISADE e verifica o orçamento.
+
+Uso: python tools/benchmarks/startup_budget.py [--budget-seconds 2.0] [--budget-mb 300] [--pages]
+                                                [--page-budget-seconds 4.0] [--page-budget-mb 400]
+Com --pages, cada página (app.py + página) também tem orçamento próprio, mais folgado: as páginas
+podem carregar as bibliotecas pesadas que usam. Retorna código 1 se algum limite for excedido
+(pode ser usado na integração contínua).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+from app import PAGES
+
+# Bibliotecas que não podem ser carregadas antes da primeira tela (página inicial)
+HEAVY_MODULES = ('sklearn', 'lifelines', 'scipy', 'matplotlib', 'google.generativeai', 'google.ai.generativelanguage')
+
+DEFAULT_BUDGET_SECONDS = 2.0
+DEFAULT_BUDGET_MB = 300
+DEFAULT_PAGE_BUDGET_SECONDS = 4.0
+DEFAULT_PAGE_BUDGET_MB = 400
+REPEATS = 3
+
+# Lidas do roteamento do app: páginas novas entram no orçamento automaticamente
+PAGE_MODULES = tuple(module for module, _ in PAGES.values())
+
+# Executado em um processo novo: importa os módulos e relata tempo, memória e bibliotecas pesadas
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - start
+rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{'seconds': elapsed, 'rss_mb': rss_mb, 'heavy': heavy}}))
+"""
+
+def measure(modules, repeats=REPEATS):
+    """Importa os módulos em processos novos; retorna a melhor medição (menor tempo)"""
+    runs = []
+    for _ in range(repeats):
+        code = PROBE.format(modules=tuple(modules), heavy=HEAVY_MODULES)
+        output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+        runs.append(json.loads(output.stdout.strip().splitlines()[-1]))
+    return min(runs, key=lambda run: run['seconds'])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget-seconds', type=float, default=DEFAULT_BUDGET_SECONDS)
+    parser.add_argument('--budget-mb', type=float, default=DEFAULT_BUDGET_MB)
+    parser.add_argument('--pages', action='store_true', help="também mede e verifica a importação de cada página")
+    parser.add_argument('--page-budget-seconds', type=float, default=DEFAULT_PAGE_BUDGET_SECONDS)
+    parser.add_argument('--page-budget-mb', type=float, default=DEFAULT_PAGE_BUDGET_MB)
+    args = parser.parse_args()
+
+    # Inicialização = app.py + página inicial (o que roda antes da primeira tela)
+    startup = measure(['app', 'pages.home'])
+    print(f"Inicialização: {startup['seconds']:.2f}s, {startup['rss_mb']:.0f} MB")
+
+    failures = []
+    if startup['seconds'] > args.budget_seconds:
+        failures.append(f"tempo {startup['seconds']:.2f}s > {args.budget_seconds:.2f}s")
+    if startup['rss_mb'] > args.budget_mb:
+        failures.append(f"memória {startup['rss_mb']:.0f} MB > {args.budget_mb:.0f} MB")
+    if startup['heavy']:
+        failures.append(f"bibliotecas pesadas carregadas na inicialização: {', '.join(startup['heavy'])}")
+
+    if args.pages:
+        for module in PAGE_MODULES:
+            page = measure(['app', module])
+            print(f"  {module:<20} {page['seconds']:.2f}s  {page['rss_mb']:.0f} MB  "
+                  f"{', '.join(page['heavy']) or '-'}")
+            if page['seconds'] > args.page_budget_seconds:
+                failures.append(f"{module}: tempo {page['seconds']:.2f}s > {args.page_budget_seconds:.2f}s")
+            if page['rss_mb'] > args.page_budget_mb:
+                failures.append(f"{module}: memória {page['rss_mb']:.0f} MB > {args.page_budget_mb:.0f} MB")
+
+    for failure in failures:
+        print(f"❌ Orçamento excedido: {failure}")
+    if not failures:
+        print("✅ Dentro do orçamento")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,143 @@
-import google.generativeai as genai
+import threading
+import time
+from collections import deque
+
+import streamlit as st
+
+import config
+
+# Limite de chamadas simultâneas ao Gemini somando todas as chaves/sessões
+_global_semaphore = threading.BoundedSemaphore(config.GEMINI_GLOBAL_MAX_CONCURRENCY)
 
 def configure_gemini_api(api_key):
     """Configura a API do Gemini"""
-    genai.configure(api_key=api_key)
\ No newline at end of file
+    import google.generativeai as genai
+    genai.configure(api_key=api_key)
+
+def create_gemini_model(api_key, model_name=config.GEMINI_MODEL_NAME):
+    """Cria um modelo Gemini com cliente próprio, independente da configuração global"""
+    return GeminiModel(api_key, model_name)
+
+class GeminiModel:
+    """Modelo Gemini com o próprio cliente gRPC (genai.configure vale para o processo inteiro
+    e misturaria as chaves das sessões)"""
+
+    def __init__(self, api_key, model_name=config.GEMINI_MODEL_NAME):
+        # Importado só ao criar o cliente: o SDK (gRPC/protobuf) é pesado para a inicialização
+        from google.ai import generativelanguage as glm
+
+        self.model_name = model_name if model_name.startswith('models/') else f"models/{model_name}"
+        # O cliente mantém o canal aberto e é reutilizado em todas as chamadas
+        self.client = glm.GenerativeServiceClient(client_options={"api_key": api_key})
+
+    def generate_content(self, prompt, request_options=None):
+        """Envia um prompt de texto; retorna a resposta do SDK (com `.text`)"""
+        import google.generativeai as genai
+        from google.ai import generativelanguage as glm
+
+        request = glm.GenerateContentRequest(
+            model=self.model_name,
+            contents=[glm.Content(role='user', parts=[glm.Part(text=prompt)])]
+        )
+        response = self.client.generate_content(request, **(request_options or {}))
+        return genai.types.GenerateContentResponse.from_response(response)
+
+class RateLimiter:
+    """Limitador de taxa (token bucket) seguro para múltiplas threads"""
+
+    def __init__(self, requests_per_minute):
+        self.capacity = max(1, requests_per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """Aguarda uma ficha disponível; retorna False se o tempo limite expirar"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+class GeminiClient:
+    """Cliente Gemini compartilhado entre sessões, com controle de taxa e métricas"""
+
+    def __init__(self, api_key, model_name=config.GEMINI_MODEL_NAME):
+        self.model_name = model_name
+        self.model = create_gemini_model(api_key, model_name)
+        self.rate_limiter = RateLimiter(config.GEMINI_REQUESTS_PER_MINUTE)
+        self._semaphore = threading.BoundedSemaphore(config.GEMINI_MAX_CONCURRENCY)
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=config.GEMINI_METRICS_WINDOW)
+        self.total_calls = 0
+        self.failed_calls = 0
+        self.in_flight = 0
+        self.last_error = None
+        self.last_success_at = None
+
+    def generate_content(self, prompt, **kwargs):
+        """Envia o prompt ao modelo respeitando os limites de taxa e concorrência"""
+        if not self.rate_limiter.acquire(timeout=config.GEMINI_QUEUE_TIMEOUT):
+            raise Exception("Limite de requisições ao Gemini atingido. Tente novamente em instantes.")
+
+        with _global_semaphore, self._semaphore:
+            with self._lock:
+                self.in_flight += 1
+            start = time.perf_counter()
+            try:
+                response = self.model.generate_content(prompt, **kwargs)
+            except Exception as e:
+                with self._lock:
+                    self.failed_calls += 1
+                    self.last_error = str(e)
+                raise
+            else:
+                with self._lock:
+                    self._latencies.append(time.perf_counter() - start)
+                    self.last_success_at = time.time()
+                return response
+            finally:
+                with self._lock:
+                    self.total_calls += 1
+                    self.in_flight -= 1
+
+    def metrics(self):
+        """Retorna métricas de saúde e latência do cliente"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            total, failed = self.total_calls, self.failed_calls
+            in_flight, last_error = self.in_flight, self.last_error
+            last_success_at = self.last_success_at
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        error_rate = failed / total if total else 0.0
+        return {
+            'model': self.model_name,
+            'total_calls': total,
+            'failed_calls': failed,
+            'error_rate': error_rate,
+            'in_flight': in_flight,
+            'latency_p50': percentile(0.50),
+            'latency_p95': percentile(0.95),
+            'last_error': last_error,
+            'last_success_at': last_success_at,
+            'healthy': total == 0 or error_rate < config.GEMINI_UNHEALTHY_ERROR_RATE
+        }
+
+@st.cache_resource(show_spinner=False)
+def get_gemini_client(api_key, model_name=config.GEMINI_MODEL_NAME):
+    """Retorna o cliente Gemini compartilhado do processo (um por chave de API)"""
+    return GeminiClient(api_key, model_name)
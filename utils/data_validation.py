@@ -1,12 +1,206 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
 import pandas as pd
+import streamlit as st
+
+from core.model_registry import get_dataset_fingerprint
+import config
+
+# Regras declarativas: dicionários com 'check', 'column', 'severity' ('erro' bloqueia as análises
+# que usam a coluna; 'aviso' só é exibido) e os parâmetros de cada verificação:
+# range (min/max), allowed (values), binary, compare (operator, other), not_null e unique
+COMPARISONS = {
+    '≥': np.greater_equal,
+    '>': np.greater,
+    '≤': np.less_equal,
+    '<': np.less,
+    '=': np.equal,
+    '≠': np.not_equal
+}
 
 def validate_data_for_analysis(df):
     """Valida se os dados são adequados para análise"""
     if not isinstance(df, pd.DataFrame):
         raise ValueError("Os dados devem ser um DataFrame do pandas")
-    
+
     if df.empty:
         raise ValueError("O DataFrame está vazio")
-    
+
     if len(df.columns) < 2:
-        raise ValueError("O DataFrame deve ter pelo menos 2 colunas")
\ No newline at end of file
+        raise ValueError("O DataFrame deve ter pelo menos 2 colunas")
+
+def rule_columns(rule):
+    """Colunas usadas por uma regra"""
+    return [rule['column']] + ([rule['other']] if rule['check'] == 'compare' else [])
+
+def describe_rule(rule):
+    """Texto legível de uma regra"""
+    column, check = rule['column'], rule['check']
+    if check == 'range':
+        if rule.get('min') is not None and rule.get('max') is not None:
+            return f"{column} entre {rule['min']} e {rule['max']}"
+        return f"{column} ≥ {rule['min']}" if rule.get('min') is not None else f"{column} ≤ {rule['max']}"
+    if check == 'allowed':
+        return f"{column} em {{{', '.join(map(str, rule['values']))}}}"
+    if check == 'binary':
+        return f"{column} codificado como 0/1"
+    if check == 'compare':
+        return f"{column} {rule['operator']} {rule['other']}"
+    if check == 'not_null':
+        return f"{column} preenchido"
+    if check == 'unique':
+        return f"{column} sem repetições"
+    raise ValueError(f"Regra não suportada: {check}")
+
+def _comparable(series):
+    """Valores para comparação vetorizada (datas como datetime64, demais como float)"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.to_numpy()
+    return series.to_numpy(dtype=float, na_value=np.nan)
+
+def _bound(series, value):
+    """Converte o limite de uma regra para o tipo da coluna"""
+    return np.datetime64(pd.Timestamp(value)) if pd.api.types.is_datetime64_any_dtype(series) else value
+
+def violation_mask(df, rule):
+    """Linhas que violam a regra (array booleano); ausentes só violam 'not_null'"""
+    series, check = df[rule['column']], rule['check']
+    if check == 'not_null':
+        return series.isna().to_numpy()
+
+    present = series.notna().to_numpy()
+    if check == 'range':
+        values = _comparable(series)
+        bad = np.zeros(len(series), dtype=bool)
+        with np.errstate(invalid='ignore'):
+            if rule.get('min') is not None:
+                bad |= values < _bound(series, rule['min'])
+            if rule.get('max') is not None:
+                bad |= values > _bound(series, rule['max'])
+        return bad & present
+    if check == 'allowed':
+        # isin usa os códigos das colunas categóricas, sem comparar textos linha a linha
+        return ~series.isin(list(rule['values'])).to_numpy() & present
+    if check == 'binary':
+        if pd.api.types.is_bool_dtype(series):
+            return np.zeros(len(series), dtype=bool)
+        if not pd.api.types.is_numeric_dtype(series):
+            return present
+        values = series.to_numpy(dtype=float, na_value=np.nan)
+        return present & (values != 0) & (values != 1)
+    if check == 'compare':
+        other = df[rule['other']]
+        with np.errstate(invalid='ignore'):
+            ok = COMPARISONS[rule['operator']](_comparable(series), _comparable(other))
+        return present & other.notna().to_numpy() & ~ok
+    if check == 'unique':
+        return series.duplicated(keep=False).to_numpy() & present
+    raise ValueError(f"Regra não suportada: {check}")
+
+def evaluate_rule(df, rule, sample_rows=config.VALIDATION_SAMPLE_ROWS):
+    """Contagem de violações e exemplos de linhas (índices) de uma regra"""
+    result = {
+        'rule': describe_rule(rule),
+        'label': rule.get('label', ''),
+        'columns': rule_columns(rule),
+        'severity': rule.get('severity', 'erro'),
+        'violations': 0,
+        'rate': 0.0,
+        'sample_rows': [],
+        'error': None
+    }
+    missing = [col for col in result['columns'] if col not in df.columns]
+    if missing:
+        result['error'] = f"Colunas ausentes: {', '.join(missing)}"
+        return result
+    try:
+        mask = violation_mask(df, rule)
+    except (TypeError, ValueError) as e:
+        result['error'] = f"Regra não aplicável: {str(e)}"
+        return result
+
+    rows = np.flatnonzero(mask)
+    result['violations'] = len(rows)
+    result['rate'] = len(rows) / len(df) if len(df) else 0.0
+    result['sample_rows'] = df.index[rows[:sample_rows]].tolist()
+    return result
+
+def _evaluate_block(df, block):
+    """Avalia um bloco de regras (agrupadas por coluna); retorna pares (posição, resultado)"""
+    return [(i, evaluate_rule(df, rule)) for i, rule in block]
+
+def validate_rules(df, rules, workers=config.VALIDATION_WORKERS):
+    """Avalia as regras, em paralelo por blocos de colunas quando a base é grande"""
+    # Regras da mesma coluna ficam no mesmo bloco (a coluna é lida uma vez por thread)
+    by_column = {}
+    for i, rule in enumerate(rules):
+        by_column.setdefault(rule['column'], []).append((i, rule))
+    groups = list(by_column.values())
+
+    n_blocks = min(workers, len(groups))
+    if n_blocks > 1 and len(df) * len(rules) >= config.VALIDATION_PARALLEL_MIN_CELLS:
+        blocks = [[item for group in groups[b::n_blocks] for item in group] for b in range(n_blocks)]
+        # Threads: as comparações do numpy liberam o GIL e o DataFrame não precisa ser copiado
+        with ThreadPoolExecutor(max_workers=n_blocks, thread_name_prefix="sisade-validation") as executor:
+            evaluated = [item for block in executor.map(_evaluate_block, [df] * n_blocks, blocks) for item in block]
+    else:
+        evaluated = _evaluate_block(df, [item for group in groups for item in group])
+    return [result for _, result in sorted(evaluated, key=lambda item: item[0])]
+
+def default_rules(schema):
+    """Regras derivadas dos papéis das colunas (índice de esquema)"""
+    rules = []
+    for column, info in schema.iterrows():
+        if info['time']:
+            rules.append({'check': 'range', 'column': column, 'min': 0, 'severity': 'erro',
+                          'label': 'Tempo negativo'})
+        if info['event'] and info['kind'] != 'datetime':
+            rules.append({'check': 'binary', 'column': column, 'severity': 'erro',
+                          'label': 'Evento fora da codificação 0/1'})
+        if info['age']:
+            rules.append({'check': 'range', 'column': column, 'min': 0, 'max': config.VALIDATION_MAX_AGE,
+                          'severity': 'erro', 'label': 'Idade impossível'})
+        if info['kind'] == 'datetime':
+            rules.append({'check': 'range', 'column': column, 'max': datetime.now().strftime('%Y-%m-%d'),
+                          'severity': 'aviso', 'label': 'Data no futuro'})
+        if info['id']:
+            rules.append({'check': 'unique', 'column': column, 'severity': 'aviso',
+                          'label': 'Identificador repetido'})
+    return rules
+
+def custom_rules():
+    """Regras definidas pelo usuário na sessão"""
+    return st.session_state.setdefault('validation_rules', [])
+
+def get_validation(df=None):
+    """Validação do dataset com cache por (dataset, regras)"""
+    from core.schema import get_schema
+
+    df = st.session_state.df if df is None else df
+    rules = default_rules(get_schema(df)) + custom_rules()
+    cache = st.session_state.setdefault('validation_cache', {})
+    key = (get_dataset_fingerprint(df), json.dumps(rules, sort_keys=True, default=str))
+    if key not in cache:
+        cache[key] = validate_rules(df, rules)
+    return cache[key]
+
+def blocking_violations(results, columns):
+    """Regras de erro violadas (ou não aplicáveis) que envolvem as colunas de uma análise"""
+    columns = {col for col in columns if col}
+    return [r for r in results if r['severity'] == 'erro' and (r['violations'] or r['error'])
+            and columns & set(r['columns'])]
+
+def render_validation_errors(columns, df=None):
+    """Exibe as violações que impedem a análise; retorna True quando ela deve ser bloqueada"""
+    problems = blocking_violations(get_validation(df), columns)
+    if problems:
+        items = "\n".join(
+            (f"- **{p['label']}** ({p['rule']}): " if p['label'] else f"- **{p['rule']}**: ")
+            + (p['error'] or f"{p['violations']:,} registros, ex.: linhas {', '.join(map(str, p['sample_rows']))}")
+            for p in problems
+        )
+        st.error(f"❌ Dados inválidos para esta análise; corrija-os antes de continuar:\n{items}")
+    return bool(problems)
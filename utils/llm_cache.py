@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from cachetools import TTLCache
+
+import config
+
+def canonicalize(value):
+    """Converte resultados em estruturas JSON estáveis (chaves em texto, tipos numpy nativos)"""
+    if isinstance(value, dict):
+        return {str(k): canonicalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        items = [canonicalize(v) for v in value]
+        return sorted(items, key=repr) if isinstance(value, set) else items
+    if isinstance(value, pd.DataFrame):
+        return canonicalize(value.to_dict(orient='split'))
+    if isinstance(value, (pd.Series, pd.Index, np.ndarray)):
+        return canonicalize(value.tolist())
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return str(value)
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+def interpretation_key(results, analysis_type, model_name, prompt_version):
+    """Hash canônico de (resultados, tipo de análise, modelo, versão do prompt)"""
+    payload = canonicalize({
+        'results': results,
+        'analysis_type': analysis_type,
+        'model': model_name,
+        'prompt_version': prompt_version
+    })
+    text = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+class InterpretationCache:
+    """Cache em dois níveis: memória (TTL/LRU) e disco, compartilhado entre sessões e reinícios"""
+
+    def __init__(self, directory, maxsize, ttl, disk_ttl, disk_max_files=config.LLM_CACHE_DISK_MAX_FILES):
+        self.directory = directory
+        self.disk_ttl = disk_ttl
+        self.disk_max_files = disk_max_files
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.lock = threading.Lock()
+        self.last_prune = 0.0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key):
+        """Busca na memória e, se não houver, no disco (promovendo para a memória)"""
+        with self.lock:
+            text = self.memory.get(key)
+        if text is not None:
+            return text
+
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry['created_at'] > self.disk_ttl:
+            return None
+
+        with self.lock:
+            self.memory[key] = entry['text']
+        return entry['text']
+
+    def set(self, key, text, **metadata):
+        """Guarda a interpretação na memória e no disco (escrita atômica)"""
+        with self.lock:
+            self.memory[key] = text
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'created_at': time.time(), 'text': text, **metadata}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+        with self.lock:
+            due = time.time() - self.last_prune > config.LLM_CACHE_PRUNE_SECONDS
+            if due:
+                self.last_prune = time.time()
+        if due:
+            self.prune()
+
+    def prune(self):
+        """Remove do disco as entradas expiradas e as mais antigas além do limite de arquivos"""
+        entries = []
+        for folder in os.scandir(self.directory):
+            if not folder.is_dir():
+                continue
+            for entry in os.scandir(folder.path):
+                if entry.name.endswith('.json'):
+                    try:
+                        entries.append((entry.stat().st_mtime, entry.path))
+                    except OSError:
+                        pass
+
+        # O mtime é o instante da gravação (mesmo critério do created_at usado na leitura)
+        entries.sort(reverse=True)
+        cutoff = time.time() - self.disk_ttl
+        stale = [path for i, (mtime, path) in enumerate(entries) if mtime < cutoff or i >= self.disk_max_files]
+        for path in stale:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return len(stale)
+
+@st.cache_resource(show_spinner=False)
+def get_interpretation_cache():
+    """Cache de interpretações único por processo"""
+    return InterpretationCache(
+        os.path.join(config.CACHE_DIR, 'llm'),
+        maxsize=config.LLM_CACHE_MAX_ENTRIES,
+        ttl=config.LLM_CACHE_TTL,
+        disk_ttl=config.LLM_CACHE_DISK_TTL
+    )
@@ -1,8 +1,9 @@
 import plotly.express as px
 import plotly.graph_objects as go
+import numpy as np
 import pandas as pd
 import streamlit as st
-from sklearn.feature_selection import mutual_info_regression
+import config
 
 def plot_correlation_matrix(data):
     """Plota matriz de correlação"""
@@ -30,11 +31,11 @@ def plot_distribution(df, column):
                     title=f'Boxplot de {column}')
         st.plotly_chart(fig, use_container_width=True)
 
-def plot_feature_importance(model, feature_names):
+def plot_feature_importance(feature_names, importances):
     """Plota importância das features"""
     feature_importance = pd.DataFrame({
         'feature': feature_names,
-        'importance': model.feature_importances_
+        'importance': importances
     }).sort_values('importance', ascending=False)
     
     fig = px.bar(feature_importance.head(10), 
@@ -45,6 +46,8 @@ def plot_feature_importance(model, feature_names):
 
 def plot_mutual_info(X, y, feature_names, model_type, random_state):
     """Plota informação mútua"""
+    from sklearn.feature_selection import mutual_info_regression, mutual_info_classif
+
     if model_type == "Regressão":
         mi = mutual_info_regression(X, y, random_state=random_state)
     else:
@@ -59,4 +62,88 @@ def plot_mutual_info(X, y, feature_names, model_type, random_state):
                 x='mutual_info', y='feature',
                 title='Top 10 Variáveis por Informação Mútua',
                 orientation='h')
-    st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+    st.plotly_chart(fig, use_container_width=True)
+
+def plot_permutation_importance(importance_df):
+    """Plota importância por permutação com desvio padrão entre repetições"""
+    top = importance_df.head(10)
+    fig = px.bar(top,
+                x='importance_mean', y='feature',
+                error_x='importance_std',
+                title='Top 10 Variáveis por Importância de Permutação',
+                labels={'importance_mean': 'Queda no score', 'feature': 'Variável'},
+                orientation='h')
+    st.plotly_chart(fig, use_container_width=True)
+
+def step_decimation_indices(x, y, max_points):
+    """Índices que preservam a forma de uma curva em degraus monótona (espaçados em x e em y)"""
+    x, y = np.asarray(x), np.asarray(y)
+    if len(x) <= max_points:
+        return np.arange(len(x))
+
+    # Metade do orçamento em posições uniformes no tempo, metade em níveis uniformes da curva
+    half = max(2, max_points // 2)
+    by_x = np.searchsorted(x, np.linspace(x[0], x[-1], half))
+    order = -y if y[0] >= y[-1] else y
+    by_y = np.searchsorted(order, np.linspace(order[0], order[-1], half))
+    return np.unique(np.concatenate(([0, len(x) - 1], by_x, by_y)).clip(0, len(x) - 1))
+
+def curve_decimation_indices(x, y, max_points):
+    """Índices espaçados ao longo do comprimento da curva (eixos normalizados), com as extremidades"""
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    if len(x) <= max_points:
+        return np.arange(len(x))
+
+    span = lambda v: (np.nanmax(v) - np.nanmin(v)) or 1.0
+    steps = np.hypot(np.diff(x) / span(x), np.nan_to_num(np.diff(y)) / span(y))
+    length = np.concatenate(([0.0], np.cumsum(steps)))
+    keep = np.searchsorted(length, np.linspace(0, length[-1], max_points))
+    return np.unique(np.concatenate(([0, len(x) - 1], keep)).clip(0, len(x) - 1))
+
+def km_curve(kmf, name='Kaplan-Meier'):
+    """Extrai a curva (e o IC, se houver) de um KaplanMeierFitter ajustado"""
+    ci = kmf.confidence_interval_survival_function_
+    return {
+        'name': name,
+        'x': kmf.timeline,
+        'y': kmf.survival_function_.iloc[:, 0].to_numpy(),
+        'lower': ci.iloc[:, 0].to_numpy(),
+        'upper': ci.iloc[:, 1].to_numpy()
+    }
+
+def curve_point_budget(n_curves):
+    """Pontos por curva: o orçamento total é dividido entre as curvas, com um mínimo"""
+    return max(config.SURVIVAL_PLOT_MIN_POINTS, config.SURVIVAL_PLOT_TOTAL_POINTS // max(1, n_curves))
+
+def build_survival_figure(curves, title, show_ci=True):
+    """Figura WebGL com curvas de sobrevivência em degraus, decimadas por orçamento de pontos"""
+    fig = go.Figure()
+    budget = curve_point_budget(len(curves))
+    colors = px.colors.qualitative.Plotly
+
+    for i, curve in enumerate(curves):
+        color = colors[i % len(colors)]
+        keep = step_decimation_indices(curve['x'], curve['y'], budget)
+        x = np.asarray(curve['x'])[keep]
+
+        if show_ci and curve.get('lower') is not None:
+            fig.add_trace(go.Scattergl(x=x, y=np.asarray(curve['lower'])[keep], mode='lines',
+                                       line=dict(width=0, shape='hv'), showlegend=False, hoverinfo='skip'))
+            fig.add_trace(go.Scattergl(x=x, y=np.asarray(curve['upper'])[keep], mode='lines',
+                                       line=dict(width=0, shape='hv'), fill='tonexty', opacity=0.2,
+                                       fillcolor=color, name=f"IC 95% ({curve['name']})", showlegend=len(curves) == 1))
+
+        fig.add_trace(go.Scattergl(x=x, y=np.asarray(curve['y'])[keep], mode='lines',
+                                   line=dict(color=color, shape='hv'), name=curve['name']))
+
+    fig.update_layout(
+        title=title,
+        xaxis_title='Tempo',
+        yaxis_title='Probabilidade de Sobrevivência',
+        hovermode='x'
+    )
+    return fig
+
+def plot_survival_curves(curves, title, show_ci=True):
+    """Plota uma ou várias curvas de sobrevivência"""
+    st.plotly_chart(build_survival_figure(curves, title, show_ci), use_container_width=True)
\ No newline at end of file